@@ -16,12 +16,26 @@ def generate_bio(resume_data: Dict[str, Any]) -> str:
         Generated bio text
     """
     if not openai_client.is_configured():
-        # Generate a more contextual placeholder bio based on resume data
-        name = resume_data.get('name', 'Professional')
-        summary = resume_data.get('summary', '')
-        skills = resume_data.get('skills', [])
-        
-        bio = f"""[AI Generated Bio - Placeholder]
+        return _placeholder_bio(resume_data)
+    
+    return openai_client.generate_text(_bio_prompt(resume_data), max_tokens=500)
+
+
+async def generate_bio_async(resume_data: Dict[str, Any]) -> str:
+    """``generate_bio`` for async views"""
+    if not await openai_client.is_configured_async():
+        return _placeholder_bio(resume_data)
+    
+    return await openai_client.generate_text_async(_bio_prompt(resume_data), max_tokens=500)
+
+
+def _placeholder_bio(resume_data: Dict[str, Any]) -> str:
+    # Generate a more contextual placeholder bio based on resume data
+    name = resume_data.get('name', 'Professional')
+    summary = resume_data.get('summary', '')
+    skills = resume_data.get('skills', [])
+    
+    bio = f"""[AI Generated Bio - Placeholder]
 
 I am {name}, a dedicated professional with a passion for excellence.
 
@@ -31,9 +45,11 @@ My expertise spans across {', '.join(skills[:5]) if skills else 'various technol
 
 To enable AI-powered bio generation, please add your GEMINI_API_KEY to the backend/.env file.
 """
-        return bio
-    
-    prompt = f"""
+    return bio
+
+
+def _bio_prompt(resume_data: Dict[str, Any]) -> str:
+    return f"""
     Create a professional "About Me" section for a portfolio based on the following resume information:
     
     Name: {resume_data.get('name', 'Professional')}
@@ -47,8 +63,6 @@ To enable AI-powered bio generation, please add your GEMINI_API_KEY to the backe
     - Is engaging and professional
     - Suitable for a portfolio website
     """
-    
-    return openai_client.generate_text(prompt, max_tokens=500)
 
 
 def generate_project_description(
@@ -4,14 +4,20 @@ This module provides a wrapper around Google Gemini API calls
 """
 import os
 from typing import Optional, Dict, Any, List, Tuple, Set
-import google.generativeai as genai
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from core.instrumentation import track_ai_call
+from core.lazy import lazy_import
+import asyncio
 import json
 import time
 import re
 import logging
 import random
 
+# The Gemini SDK (and grpc under it) takes about a second to import
+genai = lazy_import('google.generativeai')
+
 
 class GeminiClient:
     """
@@ -206,6 +212,15 @@ class GeminiClient:
         self._initialize()
         return self.api_key is not None and len(self.api_key) > 0 and self.model is not None
     
+    async def ainitialize(self):
+        """``_initialize`` for async callers: the first call lists models over the network, so run it off the event loop"""
+        if not self._initialized:
+            await sync_to_async(self._initialize, thread_sensitive=False)()
+    
+    async def is_configured_async(self) -> bool:
+        await self.ainitialize()
+        return self.is_configured()
+    
     def _is_quota_error(self, error: Exception) -> Tuple[bool, Optional[float], str]:
         """
         Check if error is a quota/rate limit error and extract retry delay
@@ -332,7 +347,7 @@ class GeminiClient:
         
         return available_candidates[0]
     
-    def _try_fallback_model(self, current_model_name: str, tried_models: Optional[Set[str]] = None) -> Optional[genai.GenerativeModel]:
+    def _try_fallback_model(self, current_model_name: str, tried_models: Optional[Set[str]] = None) -> Optional['genai.GenerativeModel']:
         """
         Try to get a fallback model if current one has quota issues
         
@@ -389,6 +404,144 @@ class GeminiClient:
         self.logger.warning(f"Could not find available fallback model after {max_fallback_attempts} attempts")
         return None
     
+    def _resolve_model(self, model: str) -> Tuple[Optional['genai.GenerativeModel'], Optional[str], Optional[str]]:
+        """
+        Pick the model instance for a request
+        
+        Returns:
+            (model instance, full model name, None), or (None, None, problem)
+            where problem is 'no_model' or 'model_unavailable'
+        """
+        # Always use the initialized model if available, or try to get a working model
+        if not model or model in ["gemini-pro", "gemini-1.5-flash", "gemini-1.5-pro"]:
+            if not self.model:
+                # Try to reinitialize
+                self._initialize()
+            if self.model:
+                return self.model, self.model_name_full or self.model_name, None
+            return None, None, 'no_model'
+        
+        # Try to use the specified model
+        try:
+            # Try with models/ prefix first
+            if not model.startswith('models/'):
+                try:
+                    return genai.GenerativeModel(f'models/{model}'), f'models/{model}', None
+                except:
+                    return genai.GenerativeModel(model), model, None
+            return genai.GenerativeModel(model), model, None
+        except Exception as e:
+            self.logger.error(f"Error creating model {model}: {e}")
+            # Fallback to default model if specified model fails
+            if self.model:
+                return self.model, self.model_name_full or self.model_name, None
+            return None, None, 'model_unavailable'
+    
+    def _handle_generation_error(
+        self,
+        error: Exception,
+        attempt: '_ModelAttempt',
+        retry: int,
+        max_retries: int
+    ) -> Tuple[str, Optional[float]]:
+        """
+        Mark the failing model and decide what the request does next
+        
+        Returns:
+            ('retry', None) after switching ``attempt`` to a fallback model,
+            ('wait', seconds) before retrying a quota error on the same model,
+            or (failure, None) to give up, where failure is 'unavailable',
+            'quota' or 'error'
+        """
+        error_str = str(error)
+        
+        # Check for model not found or API version errors
+        if '404' in error_str and ('not found' in error_str.lower() or 'not supported' in error_str.lower()):
+            self.logger.warning(f"Model error detected: {error_str}")
+            self._mark_model_failed(attempt.name, is_quota_error=False)
+            
+            # Try to switch to a different model (can try on any attempt)
+            if self._switch_to_fallback(attempt):
+                self.logger.info(f"Retrying with fallback model: {attempt.name}")
+                return 'retry', None
+            return 'unavailable', None
+        
+        is_quota, retry_delay, error_type = self._is_quota_error(error)
+        
+        if not is_quota:
+            self._mark_model_failed(attempt.name, is_quota_error=False)
+            self.logger.error(f"Non-quota error on model {attempt.short_name}: {error_str[:200]}")
+            return 'error', None
+        
+        self._mark_model_failed(attempt.name, is_quota_error=True)
+        self.logger.warning(
+            f"Quota error ({error_type}) on model {attempt.short_name}: {error_str[:200]}"
+        )
+        
+        # Try fallback model (can try multiple times)
+        if self._switch_to_fallback(attempt):
+            self.logger.info(f"Retrying with fallback model after quota error: {attempt.name}")
+            return 'retry', None
+        
+        # If still quota error and no fallback available, wait and retry
+        if retry < max_retries:
+            # Exponential backoff with jitter
+            base_wait = retry_delay or (60 * (retry + 1))
+            jitter = random.uniform(0, base_wait * 0.1)  # 10% jitter
+            wait_time = min(base_wait + jitter, 120)  # Cap at 2 minutes
+            
+            self.logger.warning(
+                f"Gemini API quota exceeded ({error_type}). "
+                f"Please check your plan and billing at https://ai.google.dev/gemini-api/docs/rate-limits. "
+                f"Retrying in {wait_time:.1f} seconds... (attempt {retry + 1}/{max_retries + 1})"
+            )
+            return 'wait', wait_time
+        
+        self.logger.error(f"Quota exceeded after all retries: {error_str[:200]}")
+        return 'quota', None
+    
+    def _switch_to_fallback(self, attempt: '_ModelAttempt') -> bool:
+        fallback_model = self._try_fallback_model(attempt.name, attempt.tried)
+        if not fallback_model:
+            return False
+        attempt.switch(fallback_model, self.model_name_full or self.model_name)
+        return True
+    
+    def _start_text(self, prompt: str, model: str) -> Tuple[Optional[str], Optional['_ModelAttempt']]:
+        """(early response, None) when generate_text cannot call a model, else (None, attempt)"""
+        if not self.is_configured():
+            # Return placeholder response when no API key is configured
+            return f"[AI Generated - Placeholder]\nThis is a placeholder response. To enable AI features, please add your GEMINI_API_KEY to the .env file.\n\nBased on your prompt about: {prompt[:100]}...", None
+        
+        self._initialize()
+        if not self.api_key:
+            return f"[AI Generated - Placeholder]\nGemini API key not configured.\n\nBased on your prompt: {prompt[:100]}...", None
+        
+        model_instance, model_name, problem = self._resolve_model(model)
+        if problem == 'model_unavailable':
+            return f"[AI Generated - Placeholder]\nGemini model '{model}' not available. Please check your API configuration.\n\nBased on your prompt: {prompt[:100]}...", None
+        if not model_instance:
+            return f"[AI Error] No Gemini model available. Please check your API key and model configuration.", None
+        return None, _ModelAttempt(model_instance, model_name)
+    
+    def _text_failure(self, failure: str, error: Exception, attempt: '_ModelAttempt', max_retries: int) -> str:
+        if failure == 'unavailable':
+            return f"[AI Error] Model '{attempt.name}' is not available or not supported. Please check your API key and model configuration. Error: {str(error)[:200]}"
+        if failure == 'quota':
+            return (
+                f"[AI Error] Gemini API quota exceeded after {max_retries + 1} attempts. "
+                f"Please check your plan and billing details at https://ai.google.dev/gemini-api/docs/rate-limits. "
+                f"To monitor usage: https://ai.dev/usage?tab=rate-limit. "
+                f"Error: {str(error)[:200]}"
+            )
+        if failure == 'error':
+            return f"[AI Error] {str(error)}"
+        # Ran out of attempts while switching models
+        error_msg = f"[AI Error] Failed after {max_retries + 1} attempts: {str(error)}"
+        self.logger.error(error_msg)
+        return error_msg
+    
+    @track_ai_call
     def generate_text(
         self,
         prompt: str,
@@ -410,157 +563,157 @@ class GeminiClient:
         Returns:
             Generated text
         """
-        if not self.is_configured():
-            # Return placeholder response when no API key is configured
-            return f"[AI Generated - Placeholder]\nThis is a placeholder response. To enable AI features, please add your GEMINI_API_KEY to the .env file.\n\nBased on your prompt about: {prompt[:100]}..."
+        early_response, attempt = self._start_text(prompt, model)
+        if attempt is None:
+            return early_response
         
-        self._initialize()
-        if not self.api_key:
-            return f"[AI Generated - Placeholder]\nGemini API key not configured.\n\nBased on your prompt: {prompt[:100]}..."
-        
-        # Get model instance
-        model_instance = None
-        current_model_name = None
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+        }
         
-        # Always use the initialized model if available, or try to get a working model
-        if not model or model in ["gemini-pro", "gemini-1.5-flash", "gemini-1.5-pro"]:
-            # Use the initialized model
-            if self.model:
-                model_instance = self.model
-                current_model_name = self.model_name_full or self.model_name
-            else:
-                # Try to reinitialize
-                self._initialize()
-                if self.model:
-                    model_instance = self.model
-                    current_model_name = self.model_name_full or self.model_name
-                else:
-                    return f"[AI Error] No Gemini model available. Please check your API key and model configuration."
-        else:
-            # Try to use the specified model
+        # Retry logic for quota errors
+        last_error = None
+        for retry in range(max_retries + 1):
             try:
-                # Try with models/ prefix first
-                if not model.startswith('models/'):
-                    try:
-                        model_instance = genai.GenerativeModel(f'models/{model}')
-                        current_model_name = f'models/{model}'
-                    except:
-                        model_instance = genai.GenerativeModel(model)
-                        current_model_name = model
-                else:
-                    model_instance = genai.GenerativeModel(model)
-                    current_model_name = model
+                response = attempt.model.generate_content(
+                    prompt,
+                    generation_config=generation_config
+                )
+                # Success - reset health tracking
+                self._reset_model_health()
+                return response.text
             except Exception as e:
-                self.logger.error(f"Error creating model {model}: {e}")
-                # Fallback to default model if specified model fails
-                if self.model:
-                    model_instance = self.model
-                    current_model_name = self.model_name_full or self.model_name
-                else:
-                    return f"[AI Generated - Placeholder]\nGemini model '{model}' not available. Please check your API configuration.\n\nBased on your prompt: {prompt[:100]}..."
+                last_error = e
+                action, wait_time = self._handle_generation_error(e, attempt, retry, max_retries)
+                if action == 'wait':
+                    time.sleep(wait_time)
+                if action not in ('retry', 'wait'):
+                    return self._text_failure(action, e, attempt, max_retries)
         
-        if not model_instance:
-            return f"[AI Error] No Gemini model available. Please check your API key and model configuration."
+        return self._text_failure('exhausted', last_error, attempt, max_retries)
+    
+    @track_ai_call
+    async def generate_text_async(
+        self,
+        prompt: str,
+        model: str = "gemini-pro",
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        max_retries: int = 2
+    ) -> str:
+        """
+        ``generate_text`` for async views: awaits the model call and quota
+        back-off instead of blocking a worker thread
+        """
+        await self.ainitialize()
+        # May reinitialize or build a model: keep it off the event loop
+        early_response, attempt = await sync_to_async(self._start_text, thread_sensitive=False)(prompt, model)
+        if attempt is None:
+            return early_response
         
         generation_config = {
             "temperature": temperature,
             "max_output_tokens": max_tokens,
         }
         
-        # Track models tried in this request
-        tried_models: Set[str] = set()
-        current_short = current_model_name.replace('models/', '') if current_model_name else ''
-        if current_short:
-            tried_models.add(current_short)
-        
-        # Retry logic for quota errors
         last_error = None
-        for attempt in range(max_retries + 1):
+        for retry in range(max_retries + 1):
             try:
-                response = model_instance.generate_content(
+                response = await attempt.model.generate_content_async(
                     prompt,
                     generation_config=generation_config
                 )
-                # Success - reset health tracking
                 self._reset_model_health()
                 return response.text
-                
             except Exception as e:
                 last_error = e
-                error_str = str(e)
-                
-                # Check for model not found or API version errors
-                if '404' in error_str and ('not found' in error_str.lower() or 'not supported' in error_str.lower()):
-                    # Try to reinitialize with a different model
-                    self.logger.warning(f"Model error detected: {error_str}")
-                    self._mark_model_failed(current_model_name, is_quota_error=False)
-                    
-                    # Try to switch to a different model (can try on any attempt)
-                    fallback_model = self._try_fallback_model(current_model_name, tried_models)
-                    if fallback_model:
-                        model_instance = fallback_model
-                        current_model_name = self.model_name_full or self.model_name
-                        current_short = self.model_name
-                        tried_models.add(current_short)
-                        self.logger.info(f"Retrying with fallback model: {current_model_name}")
-                        continue
-                    # If we can't switch models, return error
-                    return f"[AI Error] Model '{current_model_name}' is not available or not supported. Please check your API key and model configuration. Error: {error_str[:200]}"
-                
-                is_quota, retry_delay, error_type = self._is_quota_error(e)
-                
-                if is_quota:
-                    self._mark_model_failed(current_model_name, is_quota_error=True)
-                    self.logger.warning(
-                        f"Quota error ({error_type}) on model {current_short}: {error_str[:200]}"
-                    )
-                    
-                    # Try fallback model (can try multiple times)
-                    fallback_model = self._try_fallback_model(current_model_name, tried_models)
-                    if fallback_model:
-                        model_instance = fallback_model
-                        current_model_name = self.model_name_full or self.model_name
-                        current_short = self.model_name
-                        tried_models.add(current_short)
-                        self.logger.info(f"Retrying with fallback model after quota error: {current_model_name}")
-                        continue
-                    
-                    # If still quota error and no fallback available, wait and retry
-                    if attempt < max_retries:
-                        # Exponential backoff with jitter
-                        base_wait = retry_delay or (60 * (attempt + 1))
-                        jitter = random.uniform(0, base_wait * 0.1)  # 10% jitter
-                        wait_time = min(base_wait + jitter, 120)  # Cap at 2 minutes
-                        
-                        error_msg = (
-                            f"Gemini API quota exceeded ({error_type}). "
-                            f"Please check your plan and billing at https://ai.google.dev/gemini-api/docs/rate-limits. "
-                            f"Retrying in {wait_time:.1f} seconds... (attempt {attempt + 1}/{max_retries + 1})"
-                        )
-                        self.logger.warning(error_msg)
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        # Max retries reached
-                        error_msg = (
-                            f"[AI Error] Gemini API quota exceeded after {max_retries + 1} attempts. "
-                            f"Please check your plan and billing details at https://ai.google.dev/gemini-api/docs/rate-limits. "
-                            f"To monitor usage: https://ai.dev/usage?tab=rate-limit. "
-                            f"Error: {str(e)[:200]}"
-                        )
-                        self.logger.error(error_msg)
-                        return error_msg
-                else:
-                    # Non-quota error, mark as failed and return
-                    self._mark_model_failed(current_model_name, is_quota_error=False)
-                    self.logger.error(f"Non-quota error on model {current_short}: {error_str[:200]}")
-                    return f"[AI Error] {str(e)}"
+                # Switching to a fallback may list models over the network
+                action, wait_time = await sync_to_async(self._handle_generation_error, thread_sensitive=False)(
+                    e, attempt, retry, max_retries
+                )
+                if action == 'wait':
+                    await asyncio.sleep(wait_time)
+                if action not in ('retry', 'wait'):
+                    return self._text_failure(action, e, attempt, max_retries)
         
-        # Should not reach here, but handle it
-        error_msg = f"[AI Error] Failed after {max_retries + 1} attempts: {str(last_error)}"
-        self.logger.error(error_msg)
-        return error_msg
+        return self._text_failure('exhausted', last_error, attempt, max_retries)
+    
+    def _start_json(self, prompt: str, model: str) -> Tuple[Optional[Dict[str, Any]], Optional['_ModelAttempt']]:
+        """(early response, None) when generate_json cannot call a model, else (None, attempt)"""
+        if not self.is_configured():
+            return {"status": "placeholder", "data": {}, "message": "Gemini API key not configured"}, None
+        
+        self._initialize()
+        if not self.api_key:
+            return {"status": "placeholder", "data": {}, "message": "Gemini API key not configured"}, None
+        
+        model_instance, model_name, problem = self._resolve_model(model)
+        if problem == 'model_unavailable':
+            return {"status": "error", "error": f"Gemini model '{model}' not available"}, None
+        if not model_instance:
+            return {"status": "error", "error": "No Gemini model available. Please check your API key and model configuration."}, None
+        return None, _ModelAttempt(model_instance, model_name)
+    
+    @staticmethod
+    def _json_prompt(prompt: str) -> str:
+        # Enhance prompt to ensure JSON response
+        return f"""You are a helpful assistant that returns JSON responses only. 
+Return valid JSON format only, no markdown, no code blocks, just pure JSON.
+
+{prompt}
+
+Return your response as a valid JSON object."""
     
+    @staticmethod
+    def _parse_json_response(response) -> Dict[str, Any]:
+        # Extract JSON from response
+        response_text = response.text.strip()
+        
+        # Remove markdown code blocks if present
+        if response_text.startswith("```json"):
+            response_text = response_text[7:]
+        if response_text.startswith("```"):
+            response_text = response_text[3:]
+        if response_text.endswith("```"):
+            response_text = response_text[:-3]
+        response_text = response_text.strip()
+        
+        # Parse JSON
+        try:
+            return json.loads(response_text)
+        except json.JSONDecodeError:
+            # If JSON parsing fails, try to extract JSON object from text
+            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+            if json_match:
+                return json.loads(json_match.group())
+            return {"status": "error", "error": "Failed to parse JSON response", "raw_response": response_text}
+    
+    def _json_failure(self, failure: str, error: Exception, attempt: '_ModelAttempt', max_retries: int) -> Dict[str, Any]:
+        if failure == 'unavailable':
+            return {
+                "status": "error",
+                "error": f"Model '{attempt.name}' is not available or not supported. Please check your API key and model configuration.",
+                "details": str(error)[:200]
+            }
+        if failure == 'quota':
+            return {
+                "status": "error",
+                "error": (
+                    f"Gemini API quota exceeded after {max_retries + 1} attempts. "
+                    f"Please check your plan and billing at https://ai.google.dev/gemini-api/docs/rate-limits. "
+                    f"To monitor usage: https://ai.dev/usage?tab=rate-limit"
+                ),
+                "quota_exceeded": True,
+                "details": str(error)[:200]
+            }
+        if failure == 'error':
+            return {"status": "error", "error": str(error)}
+        error_response = {"status": "error", "error": f"Failed after {max_retries + 1} attempts: {str(error)}"}
+        self.logger.error(error_response["error"])
+        return error_response
+    
+    @track_ai_call
     def generate_json(
         self,
         prompt: str,
@@ -580,190 +733,103 @@ class GeminiClient:
         Returns:
             Dictionary with generated data
         """
-        if not self.is_configured():
-            return {"status": "placeholder", "data": {}, "message": "Gemini API key not configured"}
+        early_response, attempt = self._start_json(prompt, model)
+        if attempt is None:
+            return early_response
         
-        self._initialize()
-        if not self.api_key:
-            return {"status": "placeholder", "data": {}, "message": "Gemini API key not configured"}
-        
-        # Get model instance
-        model_instance = None
-        current_model_name = None
+        json_prompt = self._json_prompt(prompt)
+        generation_config = {
+            "temperature": 0.3,  # Lower temperature for more structured responses
+            "max_output_tokens": max_tokens,
+        }
         
-        # Always use the initialized model if available, or try to get a working model
-        if not model or model in ["gemini-pro", "gemini-1.5-flash", "gemini-1.5-pro"]:
-            # Use the initialized model
-            if self.model:
-                model_instance = self.model
-                current_model_name = self.model_name_full or self.model_name
-            else:
-                # Try to reinitialize
-                self._initialize()
-                if self.model:
-                    model_instance = self.model
-                    current_model_name = self.model_name_full or self.model_name
-                else:
-                    return {"status": "error", "error": "No Gemini model available. Please check your API key and model configuration."}
-        else:
-            # Try to use the specified model
+        # Retry logic for quota errors
+        last_error = None
+        for retry in range(max_retries + 1):
             try:
-                # Try with models/ prefix first
-                if not model.startswith('models/'):
-                    try:
-                        model_instance = genai.GenerativeModel(f'models/{model}')
-                        current_model_name = f'models/{model}'
-                    except:
-                        model_instance = genai.GenerativeModel(model)
-                        current_model_name = model
-                else:
-                    model_instance = genai.GenerativeModel(model)
-                    current_model_name = model
+                response = attempt.model.generate_content(
+                    json_prompt,
+                    generation_config=generation_config
+                )
+                # Success - reset health tracking
+                self._reset_model_health()
+                return self._parse_json_response(response)
             except Exception as e:
-                self.logger.error(f"Error creating model {model}: {e}")
-                if self.model:
-                    model_instance = self.model
-                    current_model_name = self.model_name_full or self.model_name
-                else:
-                    return {"status": "error", "error": f"Gemini model '{model}' not available"}
-        
-        if not model_instance:
-            return {"status": "error", "error": "No Gemini model available. Please check your API key and model configuration."}
+                last_error = e
+                action, wait_time = self._handle_generation_error(e, attempt, retry, max_retries)
+                if action == 'wait':
+                    time.sleep(wait_time)
+                if action not in ('retry', 'wait'):
+                    return self._json_failure(action, e, attempt, max_retries)
         
-        # Enhance prompt to ensure JSON response
-        json_prompt = f"""You are a helpful assistant that returns JSON responses only. 
-Return valid JSON format only, no markdown, no code blocks, just pure JSON.
-
-{prompt}
-
-Return your response as a valid JSON object."""
+        return self._json_failure('exhausted', last_error, attempt, max_retries)
+    
+    @track_ai_call
+    async def generate_json_async(
+        self,
+        prompt: str,
+        model: str = "gemini-pro",
+        max_tokens: int = 1000,
+        max_retries: int = 2
+    ) -> Dict[str, Any]:
+        """
+        ``generate_json`` for async views: awaits the model call and quota
+        back-off instead of blocking a worker thread
+        """
+        await self.ainitialize()
+        # May reinitialize or build a model: keep it off the event loop
+        early_response, attempt = await sync_to_async(self._start_json, thread_sensitive=False)(prompt, model)
+        if attempt is None:
+            return early_response
         
+        json_prompt = self._json_prompt(prompt)
         generation_config = {
-            "temperature": 0.3,  # Lower temperature for more structured responses
+            "temperature": 0.3,
             "max_output_tokens": max_tokens,
         }
         
-        # Track models tried in this request
-        tried_models: Set[str] = set()
-        current_short = current_model_name.replace('models/', '') if current_model_name else ''
-        if current_short:
-            tried_models.add(current_short)
-        
-        # Retry logic for quota errors
         last_error = None
-        for attempt in range(max_retries + 1):
+        for retry in range(max_retries + 1):
             try:
-                response = model_instance.generate_content(
+                response = await attempt.model.generate_content_async(
                     json_prompt,
                     generation_config=generation_config
                 )
-                
-                # Success - reset health tracking
                 self._reset_model_health()
-                
-                # Extract JSON from response
-                response_text = response.text.strip()
-                
-                # Remove markdown code blocks if present
-                if response_text.startswith("```json"):
-                    response_text = response_text[7:]
-                if response_text.startswith("```"):
-                    response_text = response_text[3:]
-                if response_text.endswith("```"):
-                    response_text = response_text[:-3]
-                response_text = response_text.strip()
-                
-                # Parse JSON
-                try:
-                    return json.loads(response_text)
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, try to extract JSON object from text
-                    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                    if json_match:
-                        return json.loads(json_match.group())
-                    return {"status": "error", "error": "Failed to parse JSON response", "raw_response": response_text}
-                    
+                return self._parse_json_response(response)
             except Exception as e:
                 last_error = e
-                error_str = str(e)
-                
-                # Check for model not found or API version errors
-                if '404' in error_str and ('not found' in error_str.lower() or 'not supported' in error_str.lower()):
-                    # Try to reinitialize with a different model
-                    self.logger.warning(f"Model error detected: {error_str}")
-                    self._mark_model_failed(current_model_name, is_quota_error=False)
-                    
-                    # Try to switch to a different model (can try on any attempt)
-                    fallback_model = self._try_fallback_model(current_model_name, tried_models)
-                    if fallback_model:
-                        model_instance = fallback_model
-                        current_model_name = self.model_name_full or self.model_name
-                        current_short = self.model_name
-                        tried_models.add(current_short)
-                        self.logger.info(f"Retrying with fallback model: {current_model_name}")
-                        continue
-                    # If we can't switch models, return error
-                    return {
-                        "status": "error",
-                        "error": f"Model '{current_model_name}' is not available or not supported. Please check your API key and model configuration.",
-                        "details": error_str[:200]
-                    }
-                
-                is_quota, retry_delay, error_type = self._is_quota_error(e)
-                
-                if is_quota:
-                    self._mark_model_failed(current_model_name, is_quota_error=True)
-                    self.logger.warning(
-                        f"Quota error ({error_type}) on model {current_short}: {error_str[:200]}"
-                    )
-                    
-                    # Try fallback model (can try multiple times)
-                    fallback_model = self._try_fallback_model(current_model_name, tried_models)
-                    if fallback_model:
-                        model_instance = fallback_model
-                        current_model_name = self.model_name_full or self.model_name
-                        current_short = self.model_name
-                        tried_models.add(current_short)
-                        self.logger.info(f"Retrying with fallback model after quota error: {current_model_name}")
-                        continue
-                    
-                    # If still quota error and no fallback available, wait and retry
-                    if attempt < max_retries:
-                        # Exponential backoff with jitter
-                        base_wait = retry_delay or (60 * (attempt + 1))
-                        jitter = random.uniform(0, base_wait * 0.1)  # 10% jitter
-                        wait_time = min(base_wait + jitter, 120)  # Cap at 2 minutes
-                        
-                        self.logger.warning(
-                            f"Quota exceeded ({error_type}), retrying in {wait_time:.1f}s... "
-                            f"(attempt {attempt + 1}/{max_retries + 1})"
-                        )
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        error_response = {
-                            "status": "error",
-                            "error": (
-                                f"Gemini API quota exceeded after {max_retries + 1} attempts. "
-                                f"Please check your plan and billing at https://ai.google.dev/gemini-api/docs/rate-limits. "
-                                f"To monitor usage: https://ai.dev/usage?tab=rate-limit"
-                            ),
-                            "quota_exceeded": True,
-                            "details": str(e)[:200]
-                        }
-                        self.logger.error(f"Quota exceeded after all retries: {error_str[:200]}")
-                        return error_response
-                else:
-                    # Non-quota error
-                    self._mark_model_failed(current_model_name, is_quota_error=False)
-                    self.logger.error(f"Non-quota error on model {current_short}: {error_str[:200]}")
-                    return {"status": "error", "error": str(e)}
+                # Switching to a fallback may list models over the network
+                action, wait_time = await sync_to_async(self._handle_generation_error, thread_sensitive=False)(
+                    e, attempt, retry, max_retries
+                )
+                if action == 'wait':
+                    await asyncio.sleep(wait_time)
+                if action not in ('retry', 'wait'):
+                    return self._json_failure(action, e, attempt, max_retries)
         
-        error_response = {"status": "error", "error": f"Failed after {max_retries + 1} attempts: {str(last_error)}"}
-        self.logger.error(error_response["error"])
-        return error_response
+        return self._json_failure('exhausted', last_error, attempt, max_retries)
+
+
+class _ModelAttempt:
+    """The model one generate call is using, and the models it has already tried"""
+    
+    def __init__(self, model: 'genai.GenerativeModel', name: Optional[str]):
+        self.model = model
+        self.name = name
+        self.tried: Set[str] = set()
+        if self.short_name:
+            self.tried.add(self.short_name)
+    
+    @property
+    def short_name(self) -> str:
+        return self.name.replace('models/', '') if self.name else ''
+    
+    def switch(self, model: 'genai.GenerativeModel', name: Optional[str]):
+        self.model = model
+        self.name = name
+        self.tried.add(self.short_name)
 
 
 # Global client instance
 gemini_client = GeminiClient()
-
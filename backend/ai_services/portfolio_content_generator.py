@@ -129,8 +129,55 @@ def generate_component_content(component_type: str, context: Dict[str, Any]) ->
         return _generate_placeholder_content(component_type, resume_data, template_type)
 
 
+async def generate_component_content_async(component_type: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ``generate_component_content`` for async views. Only the header and about
+    components call the model; every other type is built from the resume
+    data alone, so it comes straight from the sync generator.
+    """
+    resume_data = context.get('resume_data', {})
+    template_type = context.get('template_type', 'modern')
+    
+    if not await openai_client.is_configured_async():
+        return _generate_placeholder_content(component_type, resume_data, template_type)
+    
+    if component_type == 'header':
+        return await _generate_header_content_async(resume_data, template_type)
+    elif component_type == 'about':
+        from .content_generator import generate_bio_async
+        return {'bio': await generate_bio_async(resume_data)}
+    return generate_component_content(component_type, context)
+
+
 def _generate_header_content(resume_data: Dict[str, Any], template_type: str) -> Dict[str, Any]:
     """Generate header component content"""
+    name, title = _header_name_and_title(resume_data)
+    
+    if not openai_client.is_configured():
+        return _fallback_header(resume_data, name, title)
+    
+    try:
+        result = openai_client.generate_json(_header_prompt(resume_data, name, title, template_type))
+        return _header_from_result(result, name, title)
+    except:
+        pass
+    
+    return _header_from_result(None, name, title)
+
+
+async def _generate_header_content_async(resume_data: Dict[str, Any], template_type: str) -> Dict[str, Any]:
+    name, title = _header_name_and_title(resume_data)
+    
+    try:
+        result = await openai_client.generate_json_async(_header_prompt(resume_data, name, title, template_type))
+        return _header_from_result(result, name, title)
+    except:
+        pass
+    
+    return _header_from_result(None, name, title)
+
+
+def _header_name_and_title(resume_data: Dict[str, Any]):
     name = resume_data.get('name', 'Professional')
     
     # Try to extract professional title from various sources
@@ -152,16 +199,21 @@ def _generate_header_content(resume_data: Dict[str, Any], template_type: str) ->
     if not title:
         title = 'Professional'
     
-    if not openai_client.is_configured():
-        subtitle = title[:100] if isinstance(title, str) else 'Professional'
-        # Create a more professional subtitle if we have more info
-        if resume_data.get('experience'):
-            subtitle = f"{title} | Portfolio"
-        return {
-            'title': name,
-            'subtitle': subtitle
-        }
-    
+    return name, title
+
+
+def _fallback_header(resume_data: Dict[str, Any], name: str, title: str) -> Dict[str, Any]:
+    subtitle = title[:100] if isinstance(title, str) else 'Professional'
+    # Create a more professional subtitle if we have more info
+    if resume_data.get('experience'):
+        subtitle = f"{title} | Portfolio"
+    return {
+        'title': name,
+        'subtitle': subtitle
+    }
+
+
+def _header_prompt(resume_data: Dict[str, Any], name: str, title: str, template_type: str) -> str:
     # Build context for AI
     experience_summary = ""
     if resume_data.get('experience') and isinstance(resume_data.get('experience'), list):
@@ -172,7 +224,7 @@ def _generate_header_content(resume_data: Dict[str, Any], template_type: str) ->
             if isinstance(exp, dict)
         ])
     
-    prompt = f"""
+    return f"""
     Create a professional header for a {template_type} portfolio template with:
     Name: {name}
     Professional Title: {title}
@@ -190,17 +242,14 @@ def _generate_header_content(resume_data: Dict[str, Any], template_type: str) ->
         "subtitle": "Professional tagline or role description"
     }}
     """
-    
-    try:
-        result = openai_client.generate_json(prompt)
-        if isinstance(result, dict) and 'subtitle' in result:
-            return {
-                'title': result.get('title', name),
-                'subtitle': result.get('subtitle', title[:100])
-            }
-    except:
-        pass
-    
+
+
+def _header_from_result(result: Any, name: str, title: str) -> Dict[str, Any]:
+    if isinstance(result, dict) and 'subtitle' in result:
+        return {
+            'title': result.get('title', name),
+            'subtitle': result.get('subtitle', title[:100])
+        }
     return {
         'title': name, 
         'subtitle': title[:100] if isinstance(title, str) else 'Professional'
@@ -1,12 +1,15 @@
 """
 Resume parsing service using NLP and AI
 """
-import PyPDF2
-import pdfplumber
-from docx import Document
 from typing import Dict, Any, List
+from core.lazy import lazy_import
 from .gemini_client import gemini_client as openai_client
 
+# Parsers are only needed when a resume is uploaded
+PyPDF2 = lazy_import('PyPDF2')
+pdfplumber = lazy_import('pdfplumber')
+docx = lazy_import('docx')
+
 
 def extract_text_from_pdf(file_path: str) -> str:
     """
@@ -49,7 +52,7 @@ def extract_text_from_docx(file_path: str) -> str:
         Extracted text
     """
     try:
-        doc = Document(file_path)
+        doc = docx.Document(file_path)
         text = ""
         for paragraph in doc.paragraphs:
             text += paragraph.text + "\n"
@@ -15,7 +15,26 @@ def analyze_seo(portfolio_content: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dictionary with SEO analysis and recommendations
     """
-    # Basic analysis without AI
+    analysis = _basic_analysis(portfolio_content)
+    if openai_client.is_configured():
+        result = openai_client.generate_json(_seo_prompt(portfolio_content))
+        _merge_ai_analysis(analysis, result)
+    analysis['score'] = max(0, min(100, analysis['score']))
+    return analysis
+
+
+async def analyze_seo_async(portfolio_content: Dict[str, Any]) -> Dict[str, Any]:
+    """``analyze_seo`` for async views"""
+    analysis = _basic_analysis(portfolio_content)
+    if await openai_client.is_configured_async():
+        result = await openai_client.generate_json_async(_seo_prompt(portfolio_content))
+        _merge_ai_analysis(analysis, result)
+    analysis['score'] = max(0, min(100, analysis['score']))
+    return analysis
+
+
+def _basic_analysis(portfolio_content: Dict[str, Any]) -> Dict[str, Any]:
+    """Rule-based checks; the score is clamped by the caller after the AI merge"""
     title = portfolio_content.get('title', '')
     description = portfolio_content.get('description', '')
     keywords = portfolio_content.get('keywords', '')
@@ -109,8 +128,28 @@ def analyze_seo(portfolio_content: Dict[str, Any]) -> Dict[str, Any]:
     # Calculate readability score (basic)
     readability_score = 70  # Placeholder
     
-    if openai_client.is_configured():
-        prompt = f"""
+    return {
+        "score": score,
+        "recommendations": recommendations,
+        "keyword_density": keyword_density,
+        "meta_tags": {
+            "title": bool(title),
+            "description": bool(description),
+            "keywords": bool(keywords)
+        },
+        "content_length": len(content_text),
+        "readability_score": readability_score,
+        "image_alt_text": image_alt_info,
+        "links": links_info
+    }
+
+
+def _seo_prompt(portfolio_content: Dict[str, Any]) -> str:
+    title = portfolio_content.get('title', '')
+    description = portfolio_content.get('description', '')
+    keywords = portfolio_content.get('keywords', '')
+    content_text = portfolio_content.get('content_text', '')
+    return f"""
         Analyze the following portfolio content for SEO and provide detailed recommendations:
         
         Title: {title}
@@ -128,31 +167,16 @@ def analyze_seo(portfolio_content: Dict[str, Any]) -> Dict[str, Any]:
             "readability_score": 0-100
         }}
         """
-        
-        result = openai_client.generate_json(prompt)
-        if isinstance(result, dict):
-            # Merge AI recommendations with basic checks
-            if 'recommendations' in result:
-                recommendations.extend(result['recommendations'])
-            if 'readability_score' in result:
-                readability_score = result['readability_score']
-            if 'keyword_density' in result:
-                keyword_density.update(result['keyword_density'])
-            if 'score' in result:
-                score = result['score']
-    
-    return {
-        "score": max(0, min(100, score)),
-        "recommendations": recommendations,
-        "keyword_density": keyword_density,
-        "meta_tags": {
-            "title": bool(title),
-            "description": bool(description),
-            "keywords": bool(keywords)
-        },
-        "content_length": len(content_text),
-        "readability_score": readability_score,
-        "image_alt_text": image_alt_info,
-        "links": links_info
-    }
 
+
+def _merge_ai_analysis(analysis: Dict[str, Any], result: Any):
+    """Merge AI recommendations with basic checks"""
+    if isinstance(result, dict):
+        if 'recommendations' in result:
+            analysis['recommendations'].extend(result['recommendations'])
+        if 'readability_score' in result:
+            analysis['readability_score'] = result['readability_score']
+        if 'keyword_density' in result:
+            analysis['keyword_density'].update(result['keyword_density'])
+        if 'score' in result:
+            analysis['score'] = result['score']
@@ -1,3 +1,170 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.testing import QueryBudgetTestCase
+from portfolios.models import Portfolio, PortfolioComponent
+from resumes.models import ParsedSkill, ResumeUpload
+from .gemini_client import _ModelAttempt, gemini_client
 
-# Create your tests here.
+
+class FakeModel:
+    """Stands in for a Gemini model; every call takes ``delay`` seconds"""
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+    
+    async def generate_content_async(self, prompt, generation_config=None):
+        await asyncio.sleep(self.delay)
+        if 'JSON' in prompt:
+            return mock.Mock(text='{"subtitle": "Builds things", "score": 80, "recommendations": []}')
+        return mock.Mock(text='Generated text')
+
+
+@contextmanager
+def fake_gemini(delay=0.0):
+    model = FakeModel(delay)
+    with mock.patch.object(gemini_client, '_initialized', True), \
+            mock.patch.object(gemini_client, 'is_configured', return_value=True), \
+            mock.patch.object(gemini_client, '_start_text', lambda *args: (None, _ModelAttempt(model, 'models/fake'))), \
+            mock.patch.object(gemini_client, '_start_json', lambda *args: (None, _ModelAttempt(model, 'models/fake'))):
+        yield model
+
+
+class MissingModel:
+    async def generate_content_async(self, prompt, generation_config=None):
+        raise Exception('404 models/gone is not found for API version v1beta')
+
+
+class GeminiFallbackTests(SimpleTestCase):
+    
+    async def test_fallback_runs_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        threads = []
+        
+        def switch(attempt):
+            threads.append(threading.get_ident())
+            attempt.switch(FakeModel(), 'models/fallback')
+            return True
+        
+        with mock.patch.object(gemini_client, '_initialized', True), \
+                mock.patch.object(gemini_client, '_start_text', lambda *args: (None, _ModelAttempt(MissingModel(), 'models/gone'))), \
+                mock.patch.object(gemini_client, '_mark_model_failed'), \
+                mock.patch.object(gemini_client, '_switch_to_fallback', side_effect=switch):
+            text = await gemini_client.generate_text_async('hello')
+        self.assertEqual(text, 'Generated text')
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
+
+class AsyncAIViewTests(QueryBudgetTestCase):
+    """The AI endpoints are async views that await the model call"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.client = self.api_client(self.user)
+        self.portfolio = Portfolio.objects.create(user=self.user, title='Portfolio', seo_title='My portfolio')
+        PortfolioComponent.objects.bulk_create([
+            PortfolioComponent(portfolio=self.portfolio, component_type='custom', order=order, content={'text': f'Part {order}'})
+            for order in range(5)
+        ])
+    
+    def test_requires_authentication(self):
+        response = self.api_client().post('/api/v1/ai/improve-text/', {'text': 'hello'}, format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+    
+    def test_validation_error(self):
+        response = self.client.post('/api/v1/ai/generate-bio/', {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'resume_data is required'})
+    
+    def test_improve_text(self):
+        with fake_gemini():
+            response = self.client.post('/api/v1/ai/improve-text/', {'text': 'hello'}, format='json')
+        self.assertEqual(response.json(), {'improved_text': 'Generated text'})
+        self.assertEqual(response.request_metrics.ai_calls, 1)
+    
+    def test_analyze_seo(self):
+        with fake_gemini():
+            response = self.client.post('/api/v1/ai/analyze-seo/', {'portfolio_id': self.portfolio.pk}, format='json')
+        self.assertWithinBudget(response)
+        self.assertEqual(response.json()['score'], 80)
+        
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        response = self.api_client(other).post('/api/v1/ai/analyze-seo/', {'portfolio_id': self.portfolio.pk}, format='json')
+        self.assertEqual(response.status_code, 404)
+    
+    def test_generate_content(self):
+        url = f'/api/v1/portfolios/portfolios/{self.portfolio.pk}/generate_content/'
+        with fake_gemini():
+            response = self.client.post(url, {'component_type': 'header', 'context': {'resume_data': {'name': 'Ada'}}}, format='json')
+        self.assertWithinBudget(response)
+        self.assertEqual(response.json()['content'], {'title': 'Ada', 'subtitle': 'Builds things'})
+    
+    async def test_concurrent_requests_overlap(self):
+        client = AsyncClient()
+        headers = {'Authorization': f'Bearer {self.token}'}
+        delay, requests = 0.3, 5
+        with fake_gemini(delay):
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[
+                client.post('/api/v1/ai/improve-text/', {'text': 'hello'}, content_type='application/json', headers=headers)
+                for _ in range(requests)
+            ])
+            elapsed = time.perf_counter() - start
+        self.assertEqual([response.status_code for response in responses], [200] * requests)
+        self.assertLess(elapsed, delay * requests / 2)
+        self.assertGreaterEqual(responses[0].request_metrics.ai_ms, delay * 1000 * 0.9)
+
+
+class ParseResumeSkillTests(TestCase):
+    """Parsing a resume saves its skills in the same number of queries however many there are"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.first = ResumeUpload.objects.create(user=self.user, file='resumes/first.pdf')
+        self.second = ResumeUpload.objects.create(user=self.user, file='resumes/second.pdf')
+    
+    def parse(self, upload, skill_names):
+        parsed = {'raw_text': 'Resume', 'structured_data': {'name': 'Ada'}}
+        skills = [{'name': name, 'category': 'technical', 'confidence': 0.9} for name in skill_names]
+        with mock.patch('ai_services.resume_parser.parse_resume_file', return_value=parsed), \
+                mock.patch('ai_services.skill_extractor.extract_skills', return_value=skills):
+            response = self.client.post('/api/v1/ai/parse-resume/', {'resume_id': upload.pk}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+    
+    def count_queries(self, upload, skill_names):
+        with CaptureQueriesContext(connection) as queries:
+            self.parse(upload, skill_names)
+        return len(queries)
+    
+    def skill_names(self, upload):
+        return set(ParsedSkill.objects.filter(resume_data__resume_upload=upload).values_list('name', flat=True))
+    
+    def test_skill_upsert(self):
+        many = [f'Skill {index}' for index in range(20)]
+        baseline = self.count_queries(self.first, ['Python'])
+        with self.assertNumQueries(baseline):
+            self.parse(self.second, many)
+        self.assertEqual(self.skill_names(self.second), set(many))
+        
+        # Parsing again replaces the previous set
+        baseline = self.count_queries(self.second, ['Python'])
+        self.assertEqual(self.skill_names(self.second), {'Python'})
+        replacement = ['Python'] + many[10:] + [f'Other {index}' for index in range(10)]
+        with self.assertNumQueries(baseline):
+            response = self.parse(self.first, replacement)
+        self.assertEqual(self.skill_names(self.first), set(replacement))
+        self.assertEqual(len(response.data['skills']), len(replacement))
@@ -28,6 +28,26 @@ def improve_text(
     if not openai_client.is_configured():
         return f"[AI Improved - Placeholder]\n{text}"
     
+    prompt = _improve_text_prompt(text, tone, purpose, improve_grammar, improve_seo)
+    return openai_client.generate_text(prompt, max_tokens=1000, temperature=0.7)
+
+
+async def improve_text_async(
+    text: str,
+    tone: str = "professional",
+    purpose: str = "portfolio",
+    improve_grammar: bool = True,
+    improve_seo: bool = False
+) -> str:
+    """``improve_text`` for async views"""
+    if not await openai_client.is_configured_async():
+        return f"[AI Improved - Placeholder]\n{text}"
+    
+    prompt = _improve_text_prompt(text, tone, purpose, improve_grammar, improve_seo)
+    return await openai_client.generate_text_async(prompt, max_tokens=1000, temperature=0.7)
+
+
+def _improve_text_prompt(text: str, tone: str, purpose: str, improve_grammar: bool, improve_seo: bool) -> str:
     improvements = []
     if improve_grammar:
         improvements.append("fix any grammar and spelling errors")
@@ -36,7 +56,7 @@ def improve_text(
     
     improvements_str = ", ".join(improvements) if improvements else "enhance the writing"
     
-    prompt = f"""
+    return f"""
     Improve the following text for a {purpose}.
     Tone: {tone}
     Please {improvements_str} while maintaining the original meaning and message.
@@ -46,6 +66,3 @@ def improve_text(
     
     Return only the improved text, without explanations or markdown formatting.
     """
-    
-    return openai_client.generate_text(prompt, max_tokens=1000, temperature=0.7)
-
@@ -1,8 +1,12 @@
+from django.http import JsonResponse
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from resumes.models import ResumeUpload, ResumeData
+from core.async_views import async_api_view
+from core.bulk import bulk_upsert
+from core.instrumentation import query_budget
 from . import resume_parser
 from . import content_generator
 from . import skill_extractor
@@ -67,15 +71,28 @@ def parse_resume(request):
         
         # Extract skills
         from resumes.models import ParsedSkill
-        ParsedSkill.objects.filter(resume_data=resume_data).delete()
         skills = skill_extractor.extract_skills(parsed_data['raw_text'])
+        parsed_skills = {}
         for skill_data in skills:
-            ParsedSkill.objects.create(
-                resume_data=resume_data,
-                name=skill_data['name'],
-                category=skill_data.get('category', 'technical'),
-                confidence_score=skill_data.get('confidence', 0.5)
-            )
+            name = (skill_data.get('name') or '').strip()[:100]
+            if name and name not in parsed_skills:
+                parsed_skills[name] = ParsedSkill(
+                    resume_data=resume_data,
+                    name=name,
+                    category=skill_data.get('category', 'technical'),
+                    confidence_score=skill_data.get('confidence', 0.5)
+                )
+        
+        # Upsert current skills and drop stale ones: two queries in total
+        bulk_upsert(
+            ParsedSkill,
+            list(parsed_skills.values()),
+            unique_fields=['resume_data', 'name'],
+            update_fields=['category', 'confidence_score']
+        )
+        ParsedSkill.objects.filter(resume_data=resume_data).exclude(
+            name__in=list(parsed_skills)
+        ).delete()
         
         resume_upload.status = 'completed'
         resume_upload.save()
@@ -103,21 +120,20 @@ def parse_resume(request):
         )
 
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def generate_bio(request):
+@async_api_view(['POST'])
+async def generate_bio(request):
     """
     Generate "About Me" section from resume data
     """
     resume_data_dict = request.data.get('resume_data', {})
     if not resume_data_dict:
-        return Response(
+        return JsonResponse(
             {'error': 'resume_data is required'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    bio = content_generator.generate_bio(resume_data_dict)
-    return Response({'bio': bio})
+    bio = await content_generator.generate_bio_async(resume_data_dict)
+    return JsonResponse({'bio': bio})
 
 
 @api_view(['POST'])
@@ -159,15 +175,14 @@ def generate_project_description(request):
     return Response({'description': description})
 
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def improve_text(request):
+@async_api_view(['POST'])
+async def improve_text(request):
     """
     Improve text (grammar, tone, SEO)
     """
     text = request.data.get('text', '')
     if not text:
-        return Response(
+        return JsonResponse(
             {'error': 'text is required'},
             status=status.HTTP_400_BAD_REQUEST
         )
@@ -177,30 +192,30 @@ def improve_text(request):
     improve_grammar = request.data.get('improve_grammar', True)
     improve_seo = request.data.get('improve_seo', False)
     
-    improved_text = text_improver.improve_text(
+    improved_text = await text_improver.improve_text_async(
         text, tone, purpose, improve_grammar, improve_seo
     )
-    return Response({'improved_text': improved_text})
+    return JsonResponse({'improved_text': improved_text})
 
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def analyze_seo(request):
+@query_budget(3)
+@async_api_view(['POST'])
+async def analyze_seo(request):
     """
     Analyze portfolio content for SEO
     """
     portfolio_id = request.data.get('portfolio_id')
     if not portfolio_id:
-        return Response(
+        return JsonResponse(
             {'error': 'portfolio_id is required'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    from portfolios.models import Portfolio
     try:
-        from portfolios.models import Portfolio
-        portfolio = Portfolio.objects.get(pk=portfolio_id, user=request.user)
-    except Portfolio.DoesNotExist:
-        return Response(
+        portfolio = await Portfolio.objects.aget(pk=portfolio_id, user=request.user)
+    except (Portfolio.DoesNotExist, ValueError):
+        return JsonResponse(
             {'error': 'Portfolio not found'},
             status=status.HTTP_404_NOT_FOUND
         )
@@ -221,12 +236,11 @@ def analyze_seo(request):
         }
     }
     
-    # Extract text from components
+    # Extract text from visible components
     content_parts = [portfolio.title]
-    for component in portfolio.components.all():
-        if component.is_visible:
-            content_parts.append(str(component.content))
+    async for content in portfolio.components.filter(is_visible=True).values_list('content', flat=True):
+        content_parts.append(str(content))
     portfolio_content['content_text'] = ' '.join(content_parts)
     
-    analysis = seo_analyzer.analyze_seo(portfolio_content)
-    return Response(analysis)
+    analysis = await seo_analyzer.analyze_seo_async(portfolio_content)
+    return JsonResponse(analysis)
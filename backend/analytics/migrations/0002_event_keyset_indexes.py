@@ -0,0 +1,30 @@
+# Generated by Django 5.0.3 on 2026-10-19 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('portfolios', '0005_portfoliorevision'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='clickevent',
+            name='analytics_c_portfol_f46da9_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='portfolioview',
+            name='analytics_p_portfol_c3467b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='clickevent',
+            index=models.Index(fields=['portfolio', '-clicked_at', '-id'], name='analytics_c_portfol_81362a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolioview',
+            index=models.Index(fields=['portfolio', '-viewed_at', '-id'], name='analytics_p_portfol_a75c36_idx'),
+        ),
+    ]
@@ -24,7 +24,8 @@ class PortfolioView(models.Model):
     class Meta:
         ordering = ['-viewed_at']
         indexes = [
-            models.Index(fields=['portfolio', '-viewed_at']),
+            # Trailing id backs keyset pagination of the raw event listing
+            models.Index(fields=['portfolio', '-viewed_at', '-id']),
             models.Index(fields=['viewed_at']),
         ]
     
@@ -53,7 +54,7 @@ class ClickEvent(models.Model):
     class Meta:
         ordering = ['-clicked_at']
         indexes = [
-            models.Index(fields=['portfolio', '-clicked_at']),
+            models.Index(fields=['portfolio', '-clicked_at', '-id']),
             models.Index(fields=['element_type', '-clicked_at']),
         ]
     
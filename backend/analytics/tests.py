@@ -1,3 +1,51 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from portfolios.models import Portfolio
+from .models import ClickEvent, PortfolioView
 
-# Create your tests here.
+
+class EventPaginationTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.portfolio = Portfolio.objects.create(user=self.user, title='Portfolio')
+        self.url = f'/api/v1/analytics/portfolios/{self.portfolio.pk}/'
+    
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [event['id'] for event in response.data['results']]
+            url = response.data['next']
+        return ids
+    
+    def test_view_events_newest_first_with_id_tie_break(self):
+        views = PortfolioView.objects.bulk_create([PortfolioView(portfolio=self.portfolio) for _ in range(7)])
+        # Three views in the same instant, two earlier
+        now = timezone.now()
+        PortfolioView.objects.filter(pk__in=[view.pk for view in views[2:5]]).update(viewed_at=now)
+        PortfolioView.objects.filter(pk__in=[views[0].pk, views[1].pk]).update(viewed_at=now - timedelta(hours=1))
+        expected = list(
+            PortfolioView.objects.order_by('-viewed_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(self.walk(f'{self.url}views/events/?page_size=2'), expected)
+    
+    def test_click_events(self):
+        clicks = ClickEvent.objects.bulk_create([
+            ClickEvent(portfolio=self.portfolio, element_id=f'link-{index}', element_type='link')
+            for index in range(5)
+        ])
+        ClickEvent.objects.update(clicked_at=timezone.now())
+        self.assertEqual(
+            self.walk(f'{self.url}clicks/events/?page_size=2'),
+            [click.pk for click in reversed(clicks)]
+        )
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'{self.url}clicks/events/').status_code, 404)
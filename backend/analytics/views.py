@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Count, Avg, Q
+from core.pagination import ClickEventPagination, PortfolioViewPagination
 from portfolios.models import Portfolio
 from .models import PortfolioView, ClickEvent, AnalyticsReport
 from django.contrib.auth.models import User
@@ -64,6 +65,57 @@ def portfolio_views(request, portfolio_id):
     return Response(list(daily_views))
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def portfolio_view_events(request, portfolio_id):
+    """
+    Raw view events for a portfolio, newest first (cursor paginated)
+    """
+    portfolio = get_object_or_404(Portfolio, pk=portfolio_id, user=request.user)
+    
+    paginator = PortfolioViewPagination()
+    page = paginator.paginate_queryset(
+        PortfolioView.objects.filter(portfolio=portfolio),
+        request
+    )
+    return paginator.get_paginated_response([
+        {
+            'id': view.id,
+            'viewed_at': view.viewed_at.isoformat(),
+            'ip_address': view.ip_address,
+            'user_agent': view.user_agent,
+            'referrer': view.referrer,
+            'duration': view.duration,
+        }
+        for view in page
+    ])
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def portfolio_click_events(request, portfolio_id):
+    """
+    Raw click events for a portfolio, newest first (cursor paginated)
+    """
+    portfolio = get_object_or_404(Portfolio, pk=portfolio_id, user=request.user)
+    
+    paginator = ClickEventPagination()
+    page = paginator.paginate_queryset(
+        ClickEvent.objects.filter(portfolio=portfolio),
+        request
+    )
+    return paginator.get_paginated_response([
+        {
+            'id': click.id,
+            'clicked_at': click.clicked_at.isoformat(),
+            'element_id': click.element_id,
+            'element_type': click.element_type,
+            'ip_address': click.ip_address,
+        }
+        for click in page
+    ])
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def portfolio_clicks(request, portfolio_id):
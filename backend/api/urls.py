@@ -32,5 +32,8 @@ urlpatterns = [
     
     # Export endpoints
     path('export/', include('export.urls')),
+    
+    # Search endpoints
+    path('search/', include('search.urls')),
 ]
 
@@ -19,7 +19,7 @@ class BlogPostAdmin(admin.ModelAdmin):
     list_display = ['title', 'user', 'category', 'published', 'views', 'published_date']
     list_filter = ['published', 'category', 'published_date', 'created_at', 'tags']
     search_fields = ['title', 'content_markdown', 'user__email']
-    readonly_fields = ['slug', 'views', 'created_at', 'updated_at', 'published_date']
+    readonly_fields = ['slug', 'views', 'word_count', 'reading_time', 'created_at', 'updated_at', 'published_date']
     filter_horizontal = ['tags']
     prepopulated_fields = {'slug': ('title',)}
     
@@ -0,0 +1,9 @@
+from django.conf import settings
+from core.counters import BufferedCounter
+from .models import BlogPost
+
+post_views = BufferedCounter(
+    BlogPost,
+    'views',
+    flush_interval=settings.VIEW_COUNTER_FLUSH_INTERVAL
+)
@@ -0,0 +1,24 @@
+"""
+Re-render blog posts whose stored HTML is out of date (see blogs.rendering).
+
+Run it after deploying a change that bumps ``RENDER_VERSION``:
+
+    python manage.py render_blog_posts
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from blogs.models import BlogPost
+from blogs.rendering import render_stale_posts
+
+
+class Command(BaseCommand):
+    help = 'Re-render blog posts rendered from other content or by an older RENDER_VERSION'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Posts read and updated per query')
+    
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        count = render_stale_posts(BlogPost.objects.all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Re-rendered {count} posts'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.3 on 2026-10-19 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0002_blogpost_unique_blogpost_slug_per_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False, help_text='Rendered content_markdown'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Estimated minutes'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Table of contents'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.3 on 2026-10-19 07:07
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0003_blogpost_rendered_content'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(models.OrderBy(django.db.models.functions.comparison.Coalesce('published_date', 'created_at'), descending=True), models.OrderBy(models.F('id'), descending=True), name='blogpost_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 5.0.3 on 2026-10-19 08:40
+
+import hashlib
+import html
+import math
+import re
+import markdown
+from django.db import migrations
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+from markdown.util import AMP_SUBSTITUTE
+
+# A frozen copy of blogs.rendering at RENDER_VERSION 2, so this migration
+# keeps doing the same thing whatever later happens to the renderer.
+# Later versions are rendered on save or by the render_blog_posts command.
+RENDER_VERSION = 2
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'blockquote', 'br', 'code', 'dd', 'div', 'dl', 'dt', 'em', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'hr', 'img', 'li', 'ol', 'p', 'pre', 'span', 'strong', 'sup', 'table',
+    'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+}
+
+ALLOWED_ATTRIBUTES = {
+    '*': {'id', 'class', 'title'},
+    'a': {'href'},
+    'img': {'src', 'alt'},
+    'ol': {'start'},
+    'td': {'style'},
+    'th': {'style'},
+}
+
+URL_ATTRIBUTES = {'href', 'src'}
+
+ALLOWED_URL_SCHEMES = {'http', 'https', 'mailto'}
+
+ALLOWED_STYLE_RE = re.compile(r'^text-align: (left|right|center);$')
+
+URL_SCHEME_RE = re.compile(r'^([a-z][a-z0-9+.-]*):')
+
+WORDS_PER_MINUTE = 200
+
+
+def is_safe_url(url):
+    url = html.unescape(url.replace(AMP_SUBSTITUTE, '&'))
+    url = re.sub(r'[\x00-\x20]', '', url).lower()
+    match = URL_SCHEME_RE.match(url)
+    return match is None or match.group(1) in ALLOWED_URL_SCHEMES
+
+
+class SanitizeTreeprocessor(Treeprocessor):
+    
+    def run(self, root):
+        for element in root.iter():
+            if element.tag not in ALLOWED_TAGS:
+                element.tag = 'span'
+            allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(element.tag, set())
+            for name, value in list(element.items()):
+                if (
+                    name not in allowed
+                    or (name in URL_ATTRIBUTES and not is_safe_url(value))
+                    or (name == 'style' and not ALLOWED_STYLE_RE.match(value))
+                ):
+                    del element.attrib[name]
+
+
+class SanitizeExtension(Extension):
+    
+    def extendMarkdown(self, md):
+        md.preprocessors.deregister('html_block')
+        md.inlinePatterns.deregister('html')
+        md.treeprocessors.register(SanitizeTreeprocessor(md), 'sanitize', -10)
+
+
+def content_hash(text):
+    return hashlib.sha256(f'{RENDER_VERSION}:{text}'.encode('utf-8')).hexdigest()
+
+
+def _toc_entries(tokens):
+    return [
+        {
+            'id': token['id'],
+            'name': token['name'],
+            'level': token['level'],
+            'children': _toc_entries(token['children']),
+        }
+        for token in tokens
+    ]
+
+
+def render_markdown(text):
+    md = markdown.Markdown(extensions=['extra', 'sane_lists', 'toc', SanitizeExtension()])
+    content_html = md.convert(text or '')
+    word_count = len(re.findall(r'\w+', re.sub(r'<[^>]+>', ' ', content_html)))
+    return {
+        'content_html': content_html,
+        'content_hash': content_hash(text or ''),
+        'word_count': word_count,
+        'reading_time': max(1, math.ceil(word_count / WORDS_PER_MINUTE)) if word_count else 0,
+        'toc': _toc_entries(md.toc_tokens),
+    }
+
+
+def rerender_posts(apps, schema_editor):
+    # RENDER_VERSION 2 escapes raw HTML and filters attributes; HTML stored
+    # by version 1 may carry scripts or event handlers
+    BlogPost = apps.get_model('blogs', 'BlogPost')
+    stale = []
+    for post in BlogPost.objects.only('id', 'content_markdown', 'content_hash').iterator(chunk_size=200):
+        if post.content_hash != content_hash(post.content_markdown or ''):
+            for field, value in render_markdown(post.content_markdown).items():
+                setattr(post, field, value)
+            stale.append(post)
+    BlogPost.objects.bulk_update(
+        stale,
+        ['content_html', 'content_hash', 'word_count', 'reading_time', 'toc'],
+        batch_size=200
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0004_blogpost_feed_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(rerender_posts, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
-from django.utils.text import slugify
+from core.slugs import UniqueSlugMixin
 
 
 class BlogCategory(models.Model):
@@ -33,7 +35,7 @@ class BlogTag(models.Model):
         return self.name
 
 
-class BlogPost(models.Model):
+class BlogPost(UniqueSlugMixin, models.Model):
     """
     Blog posts
     """
@@ -54,25 +56,57 @@ class BlogPost(models.Model):
     published = models.BooleanField(default=False)
     published_date = models.DateTimeField(null=True, blank=True)
     views = models.IntegerField(default=0, help_text="Number of views")
+    content_html = models.TextField(blank=True, editable=False, help_text="Rendered content_markdown")
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False, help_text="Estimated minutes")
+    toc = models.JSONField(default=list, blank=True, editable=False, help_text="Table of contents")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    slug_scope_fields = ('user',)
+    
+    RENDERED_FIELDS = ['content_html', 'content_hash', 'word_count', 'reading_time', 'toc']
+    
+    # Sort key of the blog feed: drafts have no published_date yet
+    FEED_DATE = Coalesce('published_date', 'created_at')
+    
     class Meta:
         ordering = ['-published_date', '-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'slug'], name='unique_blogpost_slug_per_user'),
+        ]
+        indexes = [
+            # Backs the keyset-paginated feed (ordered by FEED_DATE, id)
+            models.Index(
+                Coalesce('published_date', 'created_at').desc(),
+                F('id').desc(),
+                name='blogpost_feed_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.title}"
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while BlogPost.objects.filter(slug=slug, user=self.user).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
         if self.published and not self.published_date:
             from django.utils import timezone
             self.published_date = timezone.now()
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content_markdown' in update_fields:
+            if self.render_content() and update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.RENDERED_FIELDS)
         super().save(*args, **kwargs)
+    
+    def render_content(self):
+        """
+        Render content_markdown into the stored HTML and derived fields.
+        Skipped (returns False) when the content hash is unchanged.
+        """
+        from .rendering import content_hash, render_markdown
+        if self.content_hash == content_hash(self.content_markdown or ''):
+            return False
+        for field, value in render_markdown(self.content_markdown).items():
+            setattr(self, field, value)
+        return True
@@ -0,0 +1,136 @@
+"""
+Markdown rendering for blog posts, done once on save and keyed by a content hash.
+
+The stored HTML is served as is, so it is made safe while rendering: raw
+HTML in the Markdown is escaped rather than passed through, and the
+generated elements keep only allow-listed tags, attributes and URL schemes
+(``attr_list`` would otherwise let authors add ``onclick`` and friends).
+"""
+import hashlib
+import html
+import math
+import re
+import markdown
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+from markdown.util import AMP_SUBSTITUTE
+
+# Bump when the extensions or derived fields change so stored HTML is re-rendered
+# (on save, or for every post by the render_blog_posts command)
+RENDER_VERSION = 2
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'blockquote', 'br', 'code', 'dd', 'div', 'dl', 'dt', 'em', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'hr', 'img', 'li', 'ol', 'p', 'pre', 'span', 'strong', 'sup', 'table',
+    'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+}
+
+ALLOWED_ATTRIBUTES = {
+    '*': {'id', 'class', 'title'},
+    'a': {'href'},
+    'img': {'src', 'alt'},
+    'ol': {'start'},
+    'td': {'style'},
+    'th': {'style'},
+}
+
+URL_ATTRIBUTES = {'href', 'src'}
+
+ALLOWED_URL_SCHEMES = {'http', 'https', 'mailto'}
+
+# The only inline style Markdown generates (table column alignment)
+ALLOWED_STYLE_RE = re.compile(r'^text-align: (left|right|center);$')
+
+URL_SCHEME_RE = re.compile(r'^([a-z][a-z0-9+.-]*):')
+
+
+def is_safe_url(url):
+    """Relative URLs and allow-listed schemes only"""
+    # Browsers decode entities and ignore control characters and spaces in the scheme
+    url = html.unescape(url.replace(AMP_SUBSTITUTE, '&'))
+    url = re.sub(r'[\x00-\x20]', '', url).lower()
+    match = URL_SCHEME_RE.match(url)
+    return match is None or match.group(1) in ALLOWED_URL_SCHEMES
+
+
+class SanitizeTreeprocessor(Treeprocessor):
+    
+    def run(self, root):
+        for element in root.iter():
+            if element.tag not in ALLOWED_TAGS:
+                element.tag = 'span'
+            allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(element.tag, set())
+            for name, value in list(element.items()):
+                if (
+                    name not in allowed
+                    or (name in URL_ATTRIBUTES and not is_safe_url(value))
+                    or (name == 'style' and not ALLOWED_STYLE_RE.match(value))
+                ):
+                    del element.attrib[name]
+
+
+class SanitizeExtension(Extension):
+    """Escape raw HTML and filter the generated elements; load it last"""
+    
+    def extendMarkdown(self, md):
+        md.preprocessors.deregister('html_block')
+        md.inlinePatterns.deregister('html')
+        # After every other tree processor, including unescaping backslash escapes
+        md.treeprocessors.register(SanitizeTreeprocessor(md), 'sanitize', -10)
+
+
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists', 'toc']
+
+WORDS_PER_MINUTE = 200
+
+
+def content_hash(text):
+    return hashlib.sha256(f'{RENDER_VERSION}:{text}'.encode('utf-8')).hexdigest()
+
+
+def _toc_entries(tokens):
+    return [
+        {
+            'id': token['id'],
+            'name': token['name'],
+            'level': token['level'],
+            'children': _toc_entries(token['children']),
+        }
+        for token in tokens
+    ]
+
+
+def render_markdown(text):
+    """
+    Render Markdown and derive the read-path fields stored on BlogPost
+    """
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS + [SanitizeExtension()])
+    html = md.convert(text or '')
+    word_count = len(re.findall(r'\w+', re.sub(r'<[^>]+>', ' ', html)))
+    return {
+        'content_html': html,
+        'content_hash': content_hash(text or ''),
+        'word_count': word_count,
+        'reading_time': max(1, math.ceil(word_count / WORDS_PER_MINUTE)) if word_count else 0,
+        'toc': _toc_entries(md.toc_tokens),
+    }
+
+
+def render_stale_posts(posts, batch_size=200):
+    """
+    Re-render the posts in ``posts`` (a queryset) whose stored HTML was
+    rendered from other content or by an older RENDER_VERSION. Returns the
+    number of posts updated.
+    """
+    stale = []
+    fields = None
+    for post in posts.only('id', 'content_markdown', 'content_hash').iterator(chunk_size=batch_size):
+        if post.content_hash != content_hash(post.content_markdown or ''):
+            rendered = render_markdown(post.content_markdown)
+            for field, value in rendered.items():
+                setattr(post, field, value)
+            fields = list(rendered)
+            stale.append(post)
+    if stale:
+        posts.model.objects.bulk_update(stale, fields, batch_size=batch_size)
+    return len(stale)
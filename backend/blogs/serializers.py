@@ -1,22 +1,25 @@
 from rest_framework import serializers
+from core.bulk import set_related_by_names
+from core.serializers import SparseFieldsetMixin
 from .models import BlogPost, BlogTag, BlogCategory
+from .counters import post_views
 
 
-class BlogTagSerializer(serializers.ModelSerializer):
+class BlogTagSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = BlogTag
         fields = ['id', 'name']
         read_only_fields = ['id']
 
 
-class BlogCategorySerializer(serializers.ModelSerializer):
+class BlogCategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = BlogCategory
         fields = ['id', 'name', 'description']
         read_only_fields = ['id']
 
 
-class BlogPostSerializer(serializers.ModelSerializer):
+class BlogPostSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     tags = BlogTagSerializer(many=True, read_only=True)
     tag_names = serializers.ListField(
         child=serializers.CharField(),
@@ -26,6 +29,7 @@ class BlogPostSerializer(serializers.ModelSerializer):
     )
     category_name = serializers.CharField(source='category.name', read_only=True)
     user_email = serializers.EmailField(source='user.email', read_only=True)
+    views = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogPost
@@ -33,9 +37,17 @@ class BlogPostSerializer(serializers.ModelSerializer):
             'id', 'user', 'user_email', 'title', 'slug', 'content_markdown',
             'excerpt', 'featured_image', 'category', 'category_name',
             'tags', 'tag_names', 'published', 'published_date', 'views',
+            'content_html', 'word_count', 'reading_time', 'toc',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'user', 'slug', 'views', 'content_html', 'word_count', 'reading_time', 'toc',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['user', 'slug', 'views', 'created_at', 'updated_at']
+    
+    select_related_fields = {'user_email': 'user', 'category_name': 'category'}
+    prefetch_related_fields = {'tags': 'tags'}
+    deferrable_fields = ['content_markdown', 'content_html', 'toc', 'excerpt']
     
     def create(self, validated_data):
         tag_names = validated_data.pop('tag_names', [])
@@ -43,22 +55,20 @@ class BlogPostSerializer(serializers.ModelSerializer):
         post = super().create(validated_data)
         
         # Create or get tags
-        for tag_name in tag_names:
-            tag, _ = BlogTag.objects.get_or_create(name=tag_name.strip())
-            post.tags.add(tag)
+        set_related_by_names(post, 'tags', BlogTag, tag_names)
         
         return post
     
+    def get_views(self, obj):
+        return post_views.value(obj)
+    
     def update(self, instance, validated_data):
         tag_names = validated_data.pop('tag_names', None)
         post = super().update(instance, validated_data)
         
         # Update tags if provided
         if tag_names is not None:
-            post.tags.clear()
-            for tag_name in tag_names:
-                tag, _ = BlogTag.objects.get_or_create(name=tag_name.strip())
-                post.tags.add(tag)
+            set_related_by_names(post, 'tags', BlogTag, tag_names)
         
         return post
 
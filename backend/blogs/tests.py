@@ -1,3 +1,278 @@
-from django.test import TestCase
+import atexit
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.counters import BufferedCounter
+from core.testing import QueryBudgetTestCase
+from . import rendering
+from .models import BlogPost, BlogTag
+from .rendering import render_markdown, render_stale_posts
 
-# Create your tests here.
+
+class BlogPostQueryBudgetTests(QueryBudgetTestCase):
+    """The blog feed stays within its query budget however many posts and tags it shows"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user('author', 'author@example.com', 'password')
+        self.client = self.api_client(self.user)
+        tags = [BlogTag.objects.create(name=f'tag-{index}') for index in range(3)]
+        for index in range(10):
+            self.post = BlogPost.objects.create(
+                user=self.user,
+                title=f'Post {index}',
+                content_markdown='# Hello',
+                published=True
+            )
+            self.post.tags.set(tags)
+    
+    def test_list(self):
+        self.assertWithinBudget(self.client.get('/api/v1/blogs/posts/'))
+    
+    def test_detail(self):
+        self.assertWithinBudget(self.client.get(f'/api/v1/blogs/posts/{self.post.id}/'))
+
+
+class BlogPostTagWriteTests(TestCase):
+    """Saving a post costs the same number of queries however many tags it has"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user('author', 'author@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        BlogTag.objects.bulk_create([BlogTag(name=f'existing-{index}') for index in range(5)])
+    
+    def count_queries(self, send):
+        with CaptureQueriesContext(connection) as queries:
+            response = send()
+        self.assertIn(response.status_code, (200, 201), response.data)
+        return len(queries)
+    
+    def create(self, title, tag_names):
+        return self.client.post(
+            '/api/v1/blogs/posts/', {'title': title, 'content_markdown': 'Text', 'tag_names': tag_names}, format='json'
+        )
+    
+    def update(self, post, tag_names):
+        return self.client.patch(f'/api/v1/blogs/posts/{post.pk}/', {'tag_names': tag_names}, format='json')
+    
+    def test_create(self):
+        self.create('Warm up', ['warm-up'])
+        baseline = self.count_queries(lambda: self.create('One tag', ['new-0']))
+        # Existing and new tags mixed
+        tag_names = [f'existing-{index}' for index in range(5)] + [f'new-{index}' for index in range(1, 11)]
+        with self.assertNumQueries(baseline):
+            response = self.create('Many tags', tag_names)
+        self.assertEqual([tag['name'] for tag in response.data['tags']], sorted(tag_names))
+    
+    def test_update(self):
+        one = BlogPost.objects.create(user=self.user, title='One', content_markdown='Text')
+        one.tags.set(BlogTag.objects.filter(name='existing-0'))
+        many = BlogPost.objects.create(user=self.user, title='Many', content_markdown='Text')
+        many.tags.set(BlogTag.objects.all())
+        
+        baseline = self.count_queries(lambda: self.update(one, ['new-0']))
+        # Keeps two tags, drops three and adds ten
+        tag_names = ['existing-0', 'existing-1'] + [f'new-{index}' for index in range(1, 11)]
+        with self.assertNumQueries(baseline):
+            self.update(many, tag_names)
+        self.assertEqual(sorted(many.tags.values_list('name', flat=True)), sorted(tag_names))
+
+
+class BlogPostViewCountTests(TestCase):
+    """Views still buffered in the counter change the ETag"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user('author', 'author@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = BlogPost.objects.create(user=self.user, title='Post', content_markdown='Text', published=True)
+        counter = BufferedCounter(BlogPost, 'views', flush_interval=60, background=False)
+        self.addCleanup(atexit.unregister, counter.close)
+        for target in ('blogs.views.post_views', 'blogs.serializers.post_views'):
+            patcher = mock.patch(target, counter)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.counter = counter
+    
+    def test_pending_views_change_the_etag(self):
+        for url in ('/api/v1/blogs/posts/', f'/api/v1/blogs/posts/{self.post.pk}/'):
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            
+            self.counter.incr(self.post.pk)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            self.counter.flush()
+
+
+class MarkdownSanitizingTests(SimpleTestCase):
+    
+    def render(self, text):
+        return render_markdown(text)['content_html']
+    
+    def test_raw_html_is_escaped(self):
+        self.assertEqual(self.render('<script>alert(1)</script>'), '<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>')
+        html = self.render('Hi <img src=x onerror=alert(1)>\n\n<div onclick="steal()">block</div>')
+        self.assertNotIn('<img', html)
+        self.assertNotIn('<div', html)
+    
+    def test_event_handlers_and_styles_are_dropped(self):
+        html = self.render('# Title {: onclick="steal()" id="intro" }\n\nText\n{: style="color: red" onmouseover="steal()" }')
+        self.assertEqual(html, '<h1 id="intro">Title</h1>\n<p>Text</p>')
+    
+    def test_unsafe_urls_are_dropped(self):
+        html = self.render(
+            '[a](javascript:alert(1)) [b](JaVa\tScript:alert(1)) [c](&#106;avascript:alert(1)) '
+            '![d](data:text/html,x) [e](https://example.com) [f](/relative) <me@example.com>'
+        )
+        self.assertNotIn('javascript', html.lower())
+        self.assertIn('<a>a</a> <a>b</a> <a>c</a> <img alt="d" />', html)
+        self.assertIn('<a href="https://example.com">e</a> <a href="/relative">f</a>', html)
+        self.assertIn('<a href="&#109;&#97;', html)
+    
+    def test_markdown_features_are_kept(self):
+        html = self.render('| a | b |\n|:-|-:|\n| 1 | 2 |\n\nNote[^1]\n\n[^1]: Footnote\n\n```python\n<x>\n```')
+        self.assertIn('<th style="text-align: left;">a</th>', html)
+        self.assertIn('<sup id="fnref:1"><a class="footnote-ref" href="#fn:1">1</a></sup>', html)
+        self.assertIn('<pre><code class="language-python">&lt;x&gt;', html)
+
+
+class BlogPostRenderingTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('author', 'author@example.com', 'password')
+    
+    def test_rendered_on_save(self):
+        post = BlogPost.objects.create(user=self.user, title='Post', content_markdown='# Intro\n\nOne two three')
+        self.assertEqual(post.content_html, '<h1 id="intro">Intro</h1>\n<p>One two three</p>')
+        self.assertEqual((post.word_count, post.reading_time), (4, 1))
+        self.assertEqual(post.toc, [{'id': 'intro', 'name': 'Intro', 'level': 1, 'children': []}])
+        
+        # Unchanged content is not rendered again
+        with mock.patch.object(rendering, 'render_markdown') as render:
+            post.title = 'Renamed'
+            post.save()
+        render.assert_not_called()
+        
+        post.content_markdown = 'Changed <b>text</b>'
+        post.save(update_fields=['content_markdown'])
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, '<p>Changed &lt;b&gt;text&lt;/b&gt;</p>')
+    
+    def test_backfill(self):
+        post = BlogPost.objects.create(user=self.user, title='Post', content_markdown='Safe <script>x</script>')
+        fresh = BlogPost.objects.create(user=self.user, title='Fresh', content_markdown='Fresh')
+        # HTML stored by an older RENDER_VERSION
+        BlogPost.objects.filter(pk=post.pk).update(content_html='<p>Safe <script>x</script></p>', content_hash='old')
+        
+        # The migration renders with its own frozen copy of the renderer
+        migration = import_module('blogs.migrations.0005_rerender_sanitized_content')
+        with mock.patch.object(rendering, 'render_markdown') as render:
+            migration.rerender_posts(apps, None)
+        render.assert_not_called()
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, '<p>Safe &lt;script&gt;x&lt;/script&gt;</p>')
+        self.assertEqual(post.content_hash, rendering.content_hash(post.content_markdown))
+        self.assertEqual(render_stale_posts(BlogPost.objects.filter(pk__in=[post.pk, fresh.pk])), 0)
+    
+    def test_render_command(self):
+        post = BlogPost.objects.create(user=self.user, title='Post', content_markdown='Safe <script>x</script>')
+        BlogPost.objects.create(user=self.user, title='Fresh', content_markdown='Fresh')
+        BlogPost.objects.filter(pk=post.pk).update(content_html='<p>Safe <script>x</script></p>', content_hash='old')
+        
+        out = StringIO()
+        call_command('render_blog_posts', stdout=out)
+        self.assertIn('Re-rendered 1 posts', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, '<p>Safe &lt;script&gt;x&lt;/script&gt;</p>')
+
+
+class BlogFeedPaginationTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('author', 'author@example.com', 'password')
+        self.other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        # Published posts and drafts (ordered by created_at), with ties on the feed date
+        for index, (published_date, created_at) in enumerate([
+            (now - timedelta(days=1), now - timedelta(days=9)),
+            (now - timedelta(days=1), now - timedelta(days=8)),
+            (None, now - timedelta(days=2)),
+            (now - timedelta(days=3), now - timedelta(days=7)),
+            (None, now - timedelta(days=3)),
+            (now - timedelta(days=1), now - timedelta(days=6)),
+            (None, now),
+        ]):
+            post = BlogPost.objects.create(
+                user=self.user, title=f'Post {index}', content_markdown='Text',
+                published=published_date is not None, published_date=published_date
+            )
+            BlogPost.objects.filter(pk=post.pk).update(created_at=created_at)
+        BlogPost.objects.create(user=self.other, title='Other draft', content_markdown='Text')
+        BlogPost.objects.create(
+            user=self.other, title='Other post', content_markdown='Text', published=True, published_date=now - timedelta(days=5)
+        )
+    
+    def expected_order(self):
+        return list(
+            BlogPost.objects.exclude(user=self.other, published=False)
+            .annotate(feed_date=BlogPost.FEED_DATE)
+            .order_by('-feed_date', '-id')
+            .values_list('id', flat=True)
+        )
+    
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [post['id'] for post in response.data['results']]
+            url = response.data['next']
+        return ids
+    
+    def test_pages_follow_feed_order(self):
+        expected = self.expected_order()
+        self.assertEqual(len(expected), 8)
+        self.assertEqual(self.walk('/api/v1/blogs/posts/?page_size=2'), expected)
+        self.assertEqual(self.walk('/api/v1/blogs/posts/?page_size=3'), expected)
+    
+    def test_new_posts_do_not_shift_later_pages(self):
+        expected = self.expected_order()
+        first = self.client.get('/api/v1/blogs/posts/?page_size=3').data
+        BlogPost.objects.create(user=self.user, title='New', content_markdown='Text')
+        ids = [post['id'] for post in first['results']] + self.walk(first['next'])
+        self.assertEqual(ids, expected)
+        
+        # Paging back returns the same first page
+        second = self.client.get(first['next']).data
+        previous = self.client.get(second['previous']).data
+        self.assertEqual([post['id'] for post in previous['results']], expected[:3])
+    
+    def test_validators_cover_the_page_only(self):
+        expected = self.expected_order()
+        url = '/api/v1/blogs/posts/?page_size=2'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        # Edits further down the feed leave the first page valid
+        BlogPost.objects.get(pk=expected[-1]).save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        post = BlogPost.objects.get(pk=expected[0])
+        post.title = 'Edited'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['title'], 'Edited')
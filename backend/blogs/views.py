@@ -3,7 +3,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.db import models
+from core.conditional import ConditionalGetMixin
+from core.pagination import BlogFeedPagination
 from .models import BlogPost, BlogTag, BlogCategory
+from .counters import post_views
 from .serializers import (
     BlogPostSerializer,
     BlogTagSerializer,
@@ -17,22 +20,34 @@ from ai_services.content_generator import (
 )
 
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class BlogPostViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing blog posts
     """
     serializer_class = BlogPostSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = BlogFeedPagination
+    # View counts are written without touching updated_at
+    etag_aggregates = {'views': models.Sum('views')}
+    query_budgets = {'list': 4, 'retrieve': 4}
     
     def get_queryset(self):
         user = self.request.user
         if self.action == 'list':
             # Users can see their own posts and published posts from others
-            return BlogPost.objects.filter(
+            queryset = BlogPost.objects.filter(
                 models.Q(user=user) | models.Q(published=True)
-            )
-        # For other actions, only own posts
-        return BlogPost.objects.filter(user=user)
+            ).annotate(feed_date=BlogPost.FEED_DATE)
+        else:
+            # For other actions, only own posts
+            queryset = BlogPost.objects.filter(user=user)
+        return BlogPostSerializer.setup_eager_loading(queryset, self.request)
+    
+    def get_etag_extra(self, pks):
+        # Views still buffered in this process are served but not yet summed
+        # by the aggregate
+        pending = post_views.pending_many(pks)
+        return ','.join(f'{pk}+{delta}' for pk, delta in sorted(pending.items()))
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -43,9 +58,8 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     def increment_views(self, request, pk=None):
         """Increment view count (public endpoint)"""
         post = self.get_object()
-        post.views += 1
-        post.save(update_fields=['views'])
-        return Response({'views': post.views})
+        pending = post_views.incr(post.pk)
+        return Response({'views': post.views + pending})
     
     @action(detail=False, methods=['post'])
     def generate_outline(self, request):
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+    
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import signals  # noqa: F401
+        from .db import configure_sqlite
+        from .instrumentation import install_query_counter
+        connection_created.connect(configure_sqlite, dispatch_uid='core.configure_sqlite')
+        connection_created.connect(install_query_counter, dispatch_uid='core.install_query_counter')
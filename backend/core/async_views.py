@@ -0,0 +1,68 @@
+"""
+Async function views authenticated by DRF.
+
+DRF 3.15 only dispatches sync views, so endpoints that spend their time
+waiting on the network are plain Django ``async def`` views wrapped in
+``async_api_view``. The wrapper runs the project's DRF authentication
+classes (JWT, session with its CSRF check, forced auth in tests), requires
+an authenticated user and parses the body with DRF's parsers, so clients
+get the same status codes and error bodies as from ``@api_view`` views.
+
+The view receives the DRF ``Request`` (``request.user``, ``request.data``)
+and returns a ``JsonResponse``. Do database work with the async ORM
+(``aget``, ``afirst``, ``async for``).
+"""
+import functools
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+def _initial(request):
+    """Authenticate, require a user and parse the body, like APIView.initial"""
+    if not (request.user and request.user.is_authenticated):
+        raise exceptions.NotAuthenticated()
+    # Parse errors become a 400 here rather than a 500 inside the view
+    request.data
+
+
+def _error_response(request, exc):
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = JsonResponse(data, status=exc.status_code, safe=False)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        authenticators = request.authenticators
+        header = authenticators[0].authenticate_header(request) if authenticators else None
+        if header:
+            response['WWW-Authenticate'] = header
+        else:
+            response.status_code = 403
+    return response
+
+
+def async_api_view(http_method_names):
+    """Turn an ``async def`` view into an authenticated JSON API view"""
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        async def view(request, *args, **kwargs):
+            if request.method not in http_method_names:
+                response = JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+                response['Allow'] = ', '.join(http_method_names)
+                return response
+            
+            drf_request = Request(
+                request,
+                parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+                authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+            )
+            try:
+                await sync_to_async(_initial)(drf_request)
+            except exceptions.APIException as exc:
+                return _error_response(drf_request, exc)
+            return await view_func(drf_request, *args, **kwargs)
+        
+        # Like APIView: SessionAuthentication enforces CSRF itself
+        return csrf_exempt(view)
+    return decorator
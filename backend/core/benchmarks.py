@@ -0,0 +1,388 @@
+"""
+Repeatable endpoint and startup benchmarks.
+
+Requests go through Django's test client in-process, so the numbers cover
+the full middleware/view/serializer/database stack without network noise.
+Startup cost is measured in a fresh interpreter with ``-X importtime``.
+Each run is saved as JSON under ``BENCHMARK_RESULTS_DIR`` together with the
+git revision, and can be compared with an earlier run. Response sizes are
+recorded as sent on the wire, so runs with and without ``Accept-Encoding``
+show the bandwidth compression saves.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import count
+from pathlib import Path
+from typing import Callable, Optional
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from .synthetic import USERNAME_PREFIX
+
+
+@dataclass
+class Scenario:
+    """
+    One endpoint to measure. ``path`` is a format string filled from the
+    fixture ids; list-valued ids are rotated through so repeated requests
+    do not all hit the same row.
+    """
+    name: str
+    path: str
+    method: str = 'get'
+    authenticated: bool = True
+    # JSON request body
+    data: Optional[dict] = None
+    # Cap for slow or side-effecting endpoints (each export writes a file)
+    max_iterations: Optional[int] = None
+    # Called before every request, outside the timed section
+    before: Optional[Callable] = None
+
+
+def _clear_dashboard_cache(fixtures):
+    from portfolios.dashboard import invalidate_dashboard_stats
+    invalidate_dashboard_stats(fixtures['user_id'])
+
+
+SCENARIOS = [
+    Scenario('public_view', '/api/v1/portfolios/portfolios/public/{slugs}/', authenticated=False),
+    Scenario('portfolio_list', '/api/v1/portfolios/portfolios/'),
+    Scenario('portfolio_detail', '/api/v1/portfolios/portfolios/{portfolio_id}/'),
+    Scenario('dashboard_stats', '/api/v1/portfolios/dashboard/stats/'),
+    Scenario('dashboard_stats_uncached', '/api/v1/portfolios/dashboard/stats/', before=_clear_dashboard_cache),
+    Scenario('analytics_stats', '/api/v1/analytics/portfolios/{portfolio_id}/stats/'),
+    Scenario('analytics_daily_views', '/api/v1/analytics/portfolios/{portfolio_id}/views/'),
+    Scenario('analytics_clicks', '/api/v1/analytics/portfolios/{portfolio_id}/clicks/'),
+    Scenario('analytics_view_events', '/api/v1/analytics/portfolios/{portfolio_id}/views/events/'),
+    Scenario('blog_list', '/api/v1/blogs/posts/'),
+    Scenario('project_list', '/api/v1/projects/projects/'),
+    Scenario('template_list', '/api/v1/portfolios/templates/'),
+    Scenario('search', '/api/v1/search/?q=python'),
+    Scenario('export_html', '/api/v1/export/html/{portfolio_id}/', method='post', max_iterations=20),
+    # Public write endpoints: run with --concurrency to measure write contention
+    Scenario(
+        'track_view',
+        '/api/v1/analytics/portfolios/{published_ids}/track-view/',
+        method='post',
+        authenticated=False,
+    ),
+    Scenario(
+        'track_click',
+        '/api/v1/analytics/portfolios/{published_ids}/track-click/',
+        method='post',
+        authenticated=False,
+        data={'element_id': 'hero-cta', 'element_type': 'button'},
+    ),
+]
+
+
+def get_fixtures():
+    """
+    Ids the scenarios need: the first generated portfolio (the one that
+    receives the hot share of analytics events), its owner and the slugs of
+    published generated portfolios
+    """
+    from portfolios.models import Portfolio
+    
+    bench = Portfolio.objects.filter(user__username__startswith=USERNAME_PREFIX)
+    hot = bench.order_by('pk').first()
+    if hot is None:
+        raise ValueError('No benchmark data found. Run "python manage.py seed_benchmark_data" first.')
+    published = bench.filter(is_published=True).order_by('pk')[:500]
+    return {
+        'user_id': hot.user_id,
+        'portfolio_id': hot.pk,
+        'slugs': list(published.values_list('slug', flat=True)),
+        'published_ids': list(published.values_list('pk', flat=True)),
+    }
+
+
+def get_dataset_size():
+    from analytics.models import ClickEvent, PortfolioView
+    from blogs.models import BlogPost
+    from portfolios.models import Portfolio, PortfolioComponent
+    
+    return {
+        'users': User.objects.count(),
+        'portfolios': Portfolio.objects.count(),
+        'components': PortfolioComponent.objects.count(),
+        'blog_posts': BlogPost.objects.count(),
+        'portfolio_views': PortfolioView.objects.count(),
+        'click_events': ClickEvent.objects.count(),
+    }
+
+
+def get_git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def get_database_options():
+    """Settings that change write behaviour, so runs on different profiles can be told apart"""
+    if connection.vendor != 'sqlite':
+        return {'CONN_MAX_AGE': connection.settings_dict.get('CONN_MAX_AGE')}
+    options = {}
+    with connection.cursor() as cursor:
+        for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size'):
+            cursor.execute(f'PRAGMA {pragma}')
+            row = cursor.fetchone()  # mmap_size returns no row for in-memory databases
+            options[pragma] = row[0] if row else None
+    return options
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies_ms, wall_seconds, statuses, queries, sizes=()):
+    latencies = sorted(latencies_ms)
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'max_ms': round(latencies[-1], 2),
+        'throughput_rps': round(len(latencies) / wall_seconds, 1) if wall_seconds else None,
+        'queries': statistics.median(queries) if queries else None,
+        'bytes': round(statistics.median(sizes)) if sizes else None,
+        'statuses': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+    }
+
+
+class BenchmarkRunner:
+    """
+    Run scenarios ``iterations`` times each (after ``warmup`` untimed
+    requests) with ``concurrency`` client threads
+    """
+    
+    def __init__(self, iterations=200, warmup=10, concurrency=1, scenarios=None, accept_encoding='', log=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.concurrency = concurrency
+        self.accept_encoding = accept_encoding
+        self.scenarios = [s for s in SCENARIOS if not scenarios or s.name in scenarios]
+        self.log = log or (lambda message: None)
+    
+    def make_client(self, scenario, token):
+        client = Client()
+        if self.accept_encoding:
+            client.defaults['HTTP_ACCEPT_ENCODING'] = self.accept_encoding
+        if scenario.authenticated:
+            client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        return client
+    
+    def build_path(self, scenario, fixtures, sequence):
+        values = {
+            key: value[sequence % len(value)] if isinstance(value, list) else value
+            for key, value in fixtures.items()
+        }
+        return scenario.path.format(**values)
+    
+    def request(self, client, scenario, fixtures, sequence):
+        if scenario.before:
+            scenario.before(fixtures)
+        path = self.build_path(scenario, fixtures, sequence)
+        start = time.perf_counter()
+        if scenario.method == 'get':
+            response = client.get(path)
+        else:
+            response = getattr(client, scenario.method)(path, scenario.data or {}, content_type='application/json')
+        elapsed = (time.perf_counter() - start) * 1000
+        metrics = getattr(response, 'request_metrics', None)
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        return elapsed, response.status_code, metrics.queries if metrics else None, size
+    
+    def run_scenario(self, scenario, fixtures, token):
+        iterations = min(self.iterations, scenario.max_iterations or self.iterations)
+        client = self.make_client(scenario, token)
+        for sequence in range(min(self.warmup, iterations)):
+            self.request(client, scenario, fixtures, sequence)
+        
+        sequences = count(self.warmup)
+        
+        def worker(_):
+            # Test clients are not thread safe, and each thread needs its own DB connection
+            worker_client = self.make_client(scenario, token)
+            try:
+                return [
+                    self.request(worker_client, scenario, fixtures, next(sequences))
+                    for _ in range(iterations // self.concurrency)
+                ]
+            finally:
+                if self.concurrency > 1:
+                    connection.close()
+        
+        start = time.perf_counter()
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(self.concurrency) as pool:
+                samples = [sample for batch in pool.map(worker, range(self.concurrency)) for sample in batch]
+        else:
+            samples = worker(0)
+        wall = time.perf_counter() - start
+        
+        latencies, statuses, queries, sizes = zip(*samples)
+        return summarize(latencies, wall, list(statuses), [q for q in queries if q is not None], sizes)
+    
+    def run(self, label=''):
+        fixtures = get_fixtures()
+        token = str(RefreshToken.for_user(User.objects.get(pk=fixtures['user_id'])).access_token)
+        results = {}
+        # The test client sends Host: testserver; skip the budget check so
+        # measurements are not cut short by QUERY_BUDGET_STRICT
+        with override_settings(ALLOWED_HOSTS=['*'], QUERY_BUDGET_STRICT=False):
+            for scenario in self.scenarios:
+                self.log(f'Running {scenario.name}')
+                close_old_connections()
+                results[scenario.name] = self.run_scenario(scenario, fixtures, token)
+        return {
+            'label': label,
+            'created_at': timezone.now().isoformat(),
+            'git_revision': get_git_revision(),
+            'database': connection.vendor,
+            'database_options': get_database_options(),
+            'iterations': self.iterations,
+            'concurrency': self.concurrency,
+            'accept_encoding': self.accept_encoding,
+            'dataset': get_dataset_size(),
+            'results': results,
+        }
+
+
+def get_results_dir(kind=''):
+    directory = Path(getattr(settings, 'BENCHMARK_RESULTS_DIR', settings.BASE_DIR / 'benchmark_results'))
+    return directory / kind if kind else directory
+
+
+def save_run(run, kind=''):
+    directory = get_results_dir(kind)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    suffix = f"-{run['label']}" if run['label'] else ''
+    path = directory / f'{stamp}{suffix}.json'
+    path.write_text(json.dumps(run, indent=2))
+    return path
+
+
+def load_run(name, kind=''):
+    """
+    Load a saved run by path, file name, label (latest run with that label)
+    or ``latest`` (most recent saved run)
+    """
+    path = Path(name)
+    if not path.exists():
+        directory = get_results_dir(kind)
+        pattern = '*.json' if name == 'latest' else f'*-{name}.json'
+        runs = sorted(directory.glob(pattern))
+        if (directory / name).exists():
+            path = directory / name
+        elif runs:
+            path = runs[-1]
+        else:
+            raise FileNotFoundError(f'No saved run matching "{name}" in {directory}')
+    return json.loads(path.read_text())
+
+
+def compare_runs(baseline, current):
+    """
+    Per-scenario change of p50/p95/p99, throughput and response size
+    between two runs, as a percentage of the baseline (negative latency
+    and size change is better)
+    """
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if not before:
+            continue
+        row = {'scenario': name}
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'bytes'):
+            old, new = before.get(metric), result.get(metric)
+            row[metric] = round((new - old) / old * 100, 1) if old and new is not None else None
+        rows.append(row)
+    return rows
+
+
+# What a worker does before serving its first request
+STARTUP_CODE = (
+    'import django; django.setup(); '
+    'from django.urls import get_resolver; get_resolver().url_patterns'
+)
+
+# Heavy dependencies that must only be imported on first use (see core.lazy)
+DEFERRED_MODULES = ['google.generativeai', 'grpc', 'PyPDF2', 'pdfplumber', 'docx', 'weasyprint']
+
+
+def profile_startup(code=STARTUP_CODE):
+    """
+    Run ``code`` in a fresh interpreter with ``-X importtime``.
+    
+    Returns wall time, total import time, cumulative import time per
+    top-level package and which ``DEFERRED_MODULES`` got imported.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'portfolioai_backend.settings'))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+    script = f'{code}\nimport json, sys; print(json.dumps(sorted(sys.modules)))'
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    
+    packages = defaultdict(float)
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        # Skip the header and nested imports (already in their parent's cumulative time)
+        if not cumulative.strip().isdigit() or name.startswith('  '):
+            continue
+        packages[name.strip().split('.')[0]] += int(cumulative) / 1000
+    loaded = set(json.loads(process.stdout.strip().splitlines()[-1]))
+    return {
+        'wall_ms': round(wall_ms, 1),
+        'import_ms': round(sum(packages.values()), 1),
+        'packages': {name: round(ms, 1) for name, ms in sorted(packages.items(), key=lambda item: -item[1])},
+        'deferred_loaded': [name for name in DEFERRED_MODULES if name in loaded],
+    }
+
+
+def run_startup_benchmark(repeat=5, label=''):
+    """Median of ``repeat`` fresh-interpreter startups"""
+    profiles = [profile_startup() for _ in range(repeat)]
+    packages = {
+        name: round(statistics.median(profile['packages'].get(name, 0) for profile in profiles), 1)
+        for name in profiles[0]['packages']
+    }
+    return {
+        'label': label,
+        'created_at': timezone.now().isoformat(),
+        'git_revision': get_git_revision(),
+        'python': sys.version.split()[0],
+        'repeat': repeat,
+        'wall_ms': round(statistics.median(profile['wall_ms'] for profile in profiles), 1),
+        'import_ms': round(statistics.median(profile['import_ms'] for profile in profiles), 1),
+        'packages': dict(sorted(packages.items(), key=lambda item: -item[1])),
+        'deferred_loaded': profiles[0]['deferred_loaded'],
+    }
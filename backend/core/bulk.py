@@ -0,0 +1,82 @@
+"""
+Bulk write helpers shared across apps
+"""
+from typing import Iterable, List
+
+
+def normalize_names(names: Iterable[str]) -> List[str]:
+    """
+    Strip names, drop blanks and remove duplicates while keeping input order
+    """
+    seen = set()
+    result = []
+    for name in names or []:
+        name = (name or '').strip()
+        if name and name not in seen:
+            seen.add(name)
+            result.append(name)
+    return result
+
+
+def get_or_create_by_names(model, names: Iterable[str], field: str = 'name') -> list:
+    """
+    Resolve names to model instances, creating missing rows in bulk.
+
+    Uses one SELECT for the existing rows, one INSERT for the missing ones
+    and one SELECT to pick up their primary keys, regardless of how many
+    names are passed. Rows created concurrently by another request are
+    absorbed by ``ignore_conflicts``.
+
+    Args:
+        model: Model class with a unique ``field``
+        names: Iterable of names
+        field: Name of the unique lookup field
+
+    Returns:
+        Instances in the same order as the (normalized) names
+    """
+    names = normalize_names(names)
+    if not names:
+        return []
+
+    lookup = f'{field}__in'
+    found = {getattr(obj, field): obj for obj in model.objects.filter(**{lookup: names})}
+
+    missing = [name for name in names if name not in found]
+    if missing:
+        model.objects.bulk_create(
+            [model(**{field: name}) for name in missing],
+            ignore_conflicts=True
+        )
+        found.update({
+            getattr(obj, field): obj
+            for obj in model.objects.filter(**{lookup: missing})
+        })
+
+    return [found[name] for name in names if name in found]
+
+
+def set_related_by_names(instance, relation: str, model, names: Iterable[str], field: str = 'name') -> list:
+    """
+    Replace the many-to-many ``relation`` of ``instance`` with the rows named in ``names``.
+
+    The M2M links are written with a single ``set()`` call, which only
+    inserts and deletes the difference against the current links.
+    """
+    objs = get_or_create_by_names(model, names, field=field)
+    getattr(instance, relation).set(objs)
+    return objs
+
+
+def bulk_upsert(model, objs: list, unique_fields: List[str], update_fields: List[str]) -> list:
+    """
+    Insert ``objs`` or update the existing rows matching ``unique_fields``, in one query
+    """
+    if not objs:
+        return []
+    return model.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=update_fields,
+    )
@@ -0,0 +1,138 @@
+"""
+Namespaced cache keys with generation-based invalidation.
+
+Every app caches through its own ``CacheNamespace`` so keys never collide
+and a whole namespace can be dropped at once. Keys can also be tied to a
+scope such as ``('portfolio', 12)`` or ``('user', 3)``: saving or deleting a
+Portfolio, PortfolioComponent, PortfolioSettings, Project or BlogPost bumps
+the matching scopes (see core.signals), which orphans every key in every
+namespace built for that scope.
+
+Invalidation never scans or deletes keys, so it works the same on the
+local-memory, file and Redis backends. Generations are stored without
+expiry; if one is evicted anyway it restarts from the current time, never
+from a value an orphaned key could still carry.
+"""
+import time
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import transaction
+
+# Cache-wide default timeout (CACHES['default']['TIMEOUT'])
+DEFAULT = object()
+
+
+def _generation_key(name):
+    return f'generation:{name}'
+
+
+def _scope_name(scope):
+    kind, pk = scope
+    return f'{kind}:{pk}'
+
+
+def get_generations(names, alias=DEFAULT_CACHE_ALIAS):
+    """Current generation of each name, creating missing ones"""
+    cache = caches[alias]
+    keys = {_generation_key(name): name for name in names}
+    values = cache.get_many(keys)
+    for key in keys.keys() - values.keys():
+        cache.add(key, time.time_ns(), None)
+        values[key] = cache.get(key)
+    return {name: values[key] for key, name in keys.items()}
+
+
+def bump_generation(name, alias=DEFAULT_CACHE_ALIAS):
+    cache = caches[alias]
+    key = _generation_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_scopes(*scopes, alias=DEFAULT_CACHE_ALIAS):
+    """
+    Orphan every cached key tied to one of ``scopes`` (``(kind, pk)`` pairs),
+    once the current transaction commits so no request can re-cache the
+    old rows in between
+    """
+    names = [f'scope:{_scope_name(scope)}' for scope in scopes if scope[1] is not None]
+    
+    def bump():
+        for name in names:
+            bump_generation(name, alias)
+    
+    if names:
+        transaction.on_commit(bump)
+
+
+class CacheNamespace:
+    """
+    Cache access for one app. Build keys with ``key()``/``keys()`` and read
+    and write them through the namespace so its default timeout applies.
+    """
+    
+    def __init__(self, name, timeout=DEFAULT, alias=DEFAULT_CACHE_ALIAS):
+        self.name = name
+        self.timeout = timeout
+        self.alias = alias
+    
+    @property
+    def cache(self):
+        return caches[self.alias]
+    
+    def _timeout(self, timeout):
+        timeout = self.timeout if timeout is DEFAULT else timeout
+        return {} if timeout is DEFAULT else {'timeout': timeout}
+    
+    def prefix(self, scope=None):
+        names = [f'namespace:{self.name}']
+        if scope is not None:
+            names.append(f'scope:{_scope_name(scope)}')
+        generations = get_generations(names, self.alias)
+        prefix = f"{self.name}:{generations[names[0]]}"
+        if scope is not None:
+            prefix += f":{_scope_name(scope)}.{generations[names[1]]}"
+        return prefix
+    
+    def key(self, *parts, scope=None):
+        return f"{self.prefix(scope)}:{':'.join(str(part) for part in parts)}"
+    
+    def keys(self, parts_list, scope=None):
+        """Several keys sharing one generation lookup"""
+        prefix = self.prefix(scope)
+        return [f"{prefix}:{':'.join(str(part) for part in parts)}" for parts in parts_list]
+    
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+    
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+    
+    def set(self, key, value, timeout=DEFAULT):
+        self.cache.set(key, value, **self._timeout(timeout))
+    
+    def set_many(self, mapping, timeout=DEFAULT):
+        self.cache.set_many(mapping, **self._timeout(timeout))
+    
+    def get_or_set(self, key, default, timeout=DEFAULT):
+        """``default`` may be a callable, only called on a miss"""
+        return self.cache.get_or_set(key, default, **self._timeout(timeout))
+    
+    def delete(self, key):
+        self.cache.delete(key)
+    
+    def clear(self):
+        """Orphan every key in this namespace"""
+        bump_generation(f'namespace:{self.name}', self.alias)
+
+
+portfolio_cache = CacheNamespace('portfolios')
+analytics_cache = CacheNamespace('analytics')
+ai_cache = CacheNamespace('ai_services')
+export_cache = CacheNamespace('export')
+
+NAMESPACES = {
+    namespace.name: namespace
+    for namespace in (portfolio_cache, analytics_cache, ai_cache, export_cache)
+}
@@ -0,0 +1,248 @@
+"""
+Negotiated response compression and precompressed files.
+
+``CompressionMiddleware`` replaces Django's GZipMiddleware: it picks brotli
+or gzip from the client's ``Accept-Encoding`` (q-values honoured, brotli
+preferred when the ``brotli`` package is installed), and only compresses
+text-like responses of at least ``COMPRESSION_MIN_SIZE`` bytes. Small
+responses are not worth the CPU and rarely shrink below one packet.
+
+Artifacts that are written once and served many times (static published
+portfolios, collected static files) are compressed at maximum level ahead
+of time by ``write_precompressed``, so the front server can serve the
+``.br``/``.gz`` variant directly (nginx ``brotli_static``/``gzip_static``).
+
+Like Django's GZipMiddleware, gzip responses carry a random-length file
+name in the gzip header, so their length does not reveal how well secrets
+in the body compress (BREACH). Brotli has no such field: responses that
+set cookies (a new CSRF token or session) are sent with gzip instead.
+"""
+import gzip
+import os
+import secrets
+import string
+import struct
+import zlib
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/javascript',
+    'application/json',
+    'application/vnd.oai.openapi',
+    'application/xml',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+    'text/xml',
+}
+
+# File extensions write_precompressed is worth running on
+COMPRESSIBLE_EXTENSIONS = {'.css', '.csv', '.html', '.js', '.json', '.map', '.svg', '.txt', '.xml'}
+
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def available_encodings():
+    """Supported content codings, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding, encodings=None):
+    """
+    Best supported coding (of ``encodings``, default all available) for an
+    ``Accept-Encoding`` header, or None when the response should be sent
+    uncompressed
+    """
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    
+    best, best_quality = None, 0.0
+    for encoding in encodings or available_encodings():
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    return (
+        media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith('+json')
+        or media_type.endswith('+xml')
+    )
+
+
+def compress(data, encoding, max_random_bytes=None):
+    if encoding == 'br':
+        return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return compress_string(data, max_random_bytes=max_random_bytes)
+
+
+def gzip_header(max_random_bytes=None):
+    """
+    gzip member header; with ``max_random_bytes`` its FNAME field holds 1 to
+    ``max_random_bytes`` random letters, as in Django's ``compress_string``
+    """
+    if not max_random_bytes:
+        return b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+    length = secrets.randbelow(max_random_bytes) + 1
+    filename = ''.join(secrets.choice(string.ascii_letters) for _ in range(length))
+    return b'\x1f\x8b\x08' + bytes([gzip.FNAME]) + b'\x00\x00\x00\x00\x00\xff' + filename.encode() + b'\x00'
+
+
+def _stream_compressor(encoding, max_random_bytes=None):
+    """(process, finish) functions compressing a stream chunk by chunk"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    
+    # Raw deflate between our own (padded) header and the CRC/size trailer
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    state = {'header': gzip_header(max_random_bytes), 'crc': 0, 'size': 0}
+    
+    def process(chunk):
+        state['crc'] = zlib.crc32(chunk, state['crc'])
+        state['size'] += len(chunk)
+        header, state['header'] = state['header'], b''
+        return header + compressor.compress(chunk)
+    
+    def finish():
+        trailer = struct.pack('<II', state['crc'], state['size'] & 0xffffffff)
+        return state['header'] + compressor.flush() + trailer
+    
+    return process, finish
+
+
+def compress_sequence(chunks, encoding, max_random_bytes=None):
+    process, finish = _stream_compressor(encoding, max_random_bytes)
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def acompress_sequence(chunks, encoding, max_random_bytes=None):
+    process, finish = _stream_compressor(encoding, max_random_bytes)
+    async for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress text-like responses with the best coding the client accepts.
+    Place it right after RequestMetricsMiddleware, above anything that
+    reads or changes the response body.
+    """
+    # Upper bound of the random gzip header padding (BREACH mitigation), as
+    # in Django's GZipMiddleware
+    max_random_bytes = 100
+    
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if not is_compressible(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        
+        patch_vary_headers(response, ('Accept-Encoding',))
+        
+        encodings = available_encodings()
+        if response.cookies:
+            # Brotli cannot be padded; the body may contain the token the
+            # cookie carries (e.g. a CSRF token in a form)
+            encodings = ('gzip',)
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), encodings)
+        if encoding is None:
+            return response
+        
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_sequence(
+                    response.streaming_content, encoding, self.max_random_bytes
+                )
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, encoding, self.max_random_bytes
+                )
+            # The compressed size is unknown until the stream ends
+            del response.headers['Content-Length']
+        else:
+            compressed = compress(response.content, encoding, self.max_random_bytes)
+            # Only keep it if it is actually shorter
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+        
+        # A strong ETag would claim byte equality with the uncompressed
+        # representation (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def write_precompressed(path, min_size=None):
+    """
+    Write maximum-level ``path.br`` and ``path.gz`` next to ``path``.
+    Variants that would not be smaller are removed rather than written.
+    
+    Returns {encoding: compressed size} for the variants written.
+    """
+    min_size = settings.COMPRESSION_MIN_SIZE if min_size is None else min_size
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    written = {}
+    for encoding in available_encodings():
+        variant = path + PRECOMPRESSED_SUFFIXES[encoding]
+        compressed = None
+        if len(data) >= min_size:
+            if encoding == 'br':
+                compressed = brotli.compress(data, quality=11)
+            else:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if compressed is None or len(compressed) >= len(data):
+            if os.path.exists(variant):
+                os.remove(variant)
+            continue
+        tmp_path = f'{variant}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, variant)
+        # Same mtime as the source, so Last-Modified matches whichever variant is served
+        stat = os.stat(path)
+        os.utime(variant, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        written[encoding] = len(compressed)
+    return written
@@ -0,0 +1,116 @@
+"""
+Conditional GET for DRF viewsets.
+
+Validators come from one aggregate query (max ``updated_at``, row count and
+any extra aggregates) instead of the serialized payload, so an unchanged
+resource answers ``304 Not Modified`` without running the serializer.
+Paginated lists aggregate over the rows of the requested page only, looked
+up by primary key, so the cost does not grow with the length of the list.
+"""
+import hashlib
+from datetime import datetime
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag/Last-Modified handling to ``list`` and ``retrieve``.
+    
+    ``etag_aggregates`` maps names to extra aggregate expressions that change
+    when nested data changes (e.g. ``Max('components__updated_at')``).
+    ``get_etag_extra`` adds state kept outside the database for the rows of
+    a page or a detail looked up by primary key.
+    """
+    last_modified_field = 'updated_at'
+    etag_aggregates = {}
+    
+    def get_etag_aggregates(self):
+        return self.etag_aggregates
+    
+    def get_etag_extra(self, pks):
+        """Extra ETag input for the rows with primary keys ``pks``"""
+        return ''
+    
+    def get_validators(self, request, queryset, extra_key=''):
+        """
+        Return (etag, last_modified timestamp in whole seconds) for ``queryset``.
+        
+        Last-Modified is the newest timestamp among the aggregates, so a
+        change to related data also invalidates ``If-Modified-Since``.
+        """
+        values = queryset.order_by().aggregate(
+            _last_modified=Max(self.last_modified_field),
+            _count=Count('pk', distinct=True),
+            **self.get_etag_aggregates()
+        )
+        # The key keeps the full-precision timestamps, so edits within the
+        # same second still change the ETag
+        last_modified = max(
+            (value for value in values.values() if isinstance(value, datetime)),
+            default=None
+        )
+        user_id = getattr(request.user, 'pk', None)
+        key = '|'.join([request.get_full_path(), str(user_id), extra_key] + [
+            f'{name}={values[name]}' for name in sorted(values)
+        ])
+        etag = f'W/"{hashlib.md5(key.encode("utf-8")).hexdigest()}"'
+        return etag, int(last_modified.timestamp()) if last_modified else None
+    
+    def conditional_response(self, request, queryset, render, extra_key=''):
+        """
+        Answer 304 when the client's validators still match, otherwise call
+        ``render()`` and attach ETag/Last-Modified to its response
+        """
+        etag, last_modified = self.get_validators(request, queryset, extra_key)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        response = not_modified or render()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Private data: browsers may store it but must revalidate every time
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization', 'Cookie'])
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return self.conditional_response(
+                request,
+                queryset,
+                lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+            )
+        
+        pks = [obj.pk for obj in page]
+        # Which rows are on the page, in order, and the envelope (count,
+        # next/previous links) that comes with them
+        envelope = self.get_paginated_response([]).data
+        extra_key = f"{pks}|{dict(envelope)}|{self.get_etag_extra(pks)}"
+        return self.conditional_response(
+            request,
+            queryset.model._default_manager.filter(pk__in=pks),
+            lambda: self.get_paginated_response(self.get_serializer(page, many=True).data),
+            extra_key
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = self.kwargs[lookup_url_kwarg]
+        queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: lookup})
+        extra_key = ''
+        if self.lookup_field == 'pk':
+            try:
+                extra_key = self.get_etag_extra([queryset.model._meta.pk.to_python(lookup)])
+            except ValidationError:
+                pass
+        return self.conditional_response(
+            request,
+            queryset,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+            extra_key
+        )
@@ -0,0 +1,16 @@
+"""
+Per-connection database tuning
+"""
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Apply ``SQLITE_PRAGMAS`` to every new SQLite connection (connected to
+    ``connection_created`` in CoreConfig.ready)
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,218 @@
+"""
+Per-request instrumentation: SQL count and time, AI-call time and total time.
+
+``RequestMetricsMiddleware`` collects the numbers, emits them as a
+``Server-Timing`` header and a structured log line, and checks them against
+the view's declared budget. Budgets are declared with ``query_budgets`` on
+viewsets (action name -> max queries) or the ``query_budget`` decorator on
+function views.
+"""
+import functools
+import json
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('portfolioai.requests')
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode (tests) when a view runs more queries than declared"""
+
+
+@dataclass
+class RequestMetrics:
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    sql_ms: float = 0.0
+    ai_calls: int = 0
+    ai_ms: float = 0.0
+    total_ms: float = 0.0
+    view: str = ''
+    query_budget: int = None
+    time_budget_ms: float = None
+    
+    @property
+    def over_query_budget(self):
+        return self.query_budget is not None and self.queries > self.query_budget
+    
+    @property
+    def over_time_budget(self):
+        return self.time_budget_ms is not None and self.total_ms > self.time_budget_ms
+    
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.sql_ms:.1f};desc="{self.queries} queries"',
+            f'ai;dur={self.ai_ms:.1f};desc="{self.ai_calls} calls"',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+    
+    def as_log_extra(self):
+        return {
+            'view': self.view,
+            'queries': self.queries,
+            'sql_ms': round(self.sql_ms, 1),
+            'ai_calls': self.ai_calls,
+            'ai_ms': round(self.ai_ms, 1),
+            'total_ms': round(self.total_ms, 1),
+            'query_budget': self.query_budget,
+        }
+
+
+def get_current_metrics():
+    return _current_metrics.get()
+
+
+class MetricsFormatter(logging.Formatter):
+    """Render a request log record as one JSON object"""
+    
+    def format(self, record):
+        payload = dict(getattr(record, 'metrics', {}), message=record.getMessage(), level=record.levelname)
+        return json.dumps(payload, default=str)
+
+
+def _count_queries(execute, sql, params, many, context):
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_ms += (time.perf_counter() - start) * 1000
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver that adds the query counter to every
+    connection. Async views run their queries through ``sync_to_async`` on
+    another thread's connection, so a per-request wrapper would miss them.
+    """
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+def track_ai_call(func):
+    """Add the wrapped call's wall time to the current request's AI metrics"""
+    if iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            metrics = _current_metrics.get()
+            if metrics is None:
+                return await func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                metrics.ai_calls += 1
+                metrics.ai_ms += (time.perf_counter() - start) * 1000
+        return async_wrapper
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.ai_calls += 1
+            metrics.ai_ms += (time.perf_counter() - start) * 1000
+    return wrapper
+
+
+def query_budget(queries, ms=None):
+    """
+    Declare the budget of a function view. Apply it above ``@api_view``.
+    """
+    def decorator(view_func):
+        view_func.query_budget = queries
+        view_func.time_budget_ms = ms
+        return view_func
+    return decorator
+
+
+def get_view_budget(view_func, request):
+    """Return (max queries, max ms) declared for the view handling ``request``"""
+    viewset = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None)
+    if viewset is not None and actions:
+        action = actions.get(request.method.lower())
+        return (
+            getattr(viewset, 'query_budgets', {}).get(action),
+            getattr(viewset, 'time_budgets_ms', {}).get(action),
+        )
+    return getattr(view_func, 'query_budget', None), getattr(view_func, 'time_budget_ms', None)
+
+
+class RequestMetricsMiddleware:
+    """
+    Record per-request metrics. Place it first in MIDDLEWARE so the total
+    covers the whole stack. Runs natively under both WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+    
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+    
+    def finish(self, request, response, metrics):
+        metrics.total_ms = (time.perf_counter() - metrics.started) * 1000
+        
+        if getattr(settings, 'SERVER_TIMING_ENABLED', settings.DEBUG):
+            response['Server-Timing'] = metrics.server_timing()
+        response.request_metrics = metrics
+        
+        extra = dict(metrics.as_log_extra(), method=request.method, path=request.path, status=response.status_code)
+        if metrics.over_query_budget or metrics.over_time_budget:
+            logger.warning('Request over budget', extra={'metrics': extra})
+            if metrics.over_query_budget and getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(
+                    f'{metrics.view} ran {metrics.queries} queries, budget is {metrics.query_budget}'
+                )
+        else:
+            logger.info('Request served', extra={'metrics': extra})
+        return response
+    
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            view_class = getattr(view_func, 'cls', None)
+            actions = getattr(view_func, 'actions', None)
+            if view_class is None:
+                metrics.view = view_func.__name__
+            elif actions:
+                metrics.view = f"{view_class.__name__}.{actions.get(request.method.lower(), '')}"
+            else:
+                metrics.view = view_class.__name__
+            metrics.query_budget, metrics.time_budget_ms = get_view_budget(view_func, request)
+        return None
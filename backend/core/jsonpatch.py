@@ -0,0 +1,215 @@
+"""
+JSON Patch (RFC 6902) and JSON Merge Patch (RFC 7396) for JSONField documents
+"""
+import copy
+import re
+from typing import Any, List
+
+
+# RFC 6901 array index: ASCII digits without leading zeros
+ARRAY_INDEX_RE = re.compile(r'0|[1-9][0-9]*')
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch is malformed or cannot be applied"""
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith('/')):
+        raise JsonPatchError(f'Invalid JSON pointer: {pointer!r}')
+    if pointer == '':
+        return []
+    return [part.replace('~1', '/').replace('~0', '~') for part in pointer[1:].split('/')]
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    """
+    Equality by JSON type (RFC 6902 section 4.6): booleans never equal
+    numbers, while numbers compare by value (``1`` equals ``1.0``)
+    """
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return type(a) is type(b) and a == b
+
+
+def _list_index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == '-':
+        return len(container)
+    if not ARRAY_INDEX_RE.fullmatch(token):
+        raise JsonPatchError(f'Invalid array index: {token!r}')
+    index = int(token)
+    limit = len(container) if allow_end else len(container) - 1
+    if index > limit:
+        raise JsonPatchError(f'Array index out of range: {index}')
+    return index
+
+
+def _resolve(doc: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise JsonPatchError(f'Path not found: {token!r}')
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_list_index(doc, token)]
+        else:
+            raise JsonPatchError(f'Cannot traverse into a scalar at {token!r}')
+    return doc
+
+
+def _get(doc: Any, path: str) -> Any:
+    return _resolve(doc, _parse_pointer(path))
+
+
+def _add(doc: Any, path: str, value: Any) -> Any:
+    tokens = _parse_pointer(path)
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens[:-1])
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, tokens[-1], allow_end=True), value)
+    else:
+        raise JsonPatchError(f'Cannot add to a scalar at {path!r}')
+    return doc
+
+
+def _remove(doc: Any, path: str) -> Any:
+    tokens = _parse_pointer(path)
+    if not tokens:
+        raise JsonPatchError('Cannot remove the document root')
+    parent = _resolve(doc, tokens[:-1])
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise JsonPatchError(f'Path not found: {path!r}')
+        del parent[tokens[-1]]
+    elif isinstance(parent, list):
+        del parent[_list_index(parent, tokens[-1])]
+    else:
+        raise JsonPatchError(f'Cannot remove from a scalar at {path!r}')
+    return doc
+
+
+def _replace(doc: Any, path: str, value: Any) -> Any:
+    tokens = _parse_pointer(path)
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens[:-1])
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise JsonPatchError(f'Path not found: {path!r}')
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent[_list_index(parent, tokens[-1])] = value
+    else:
+        raise JsonPatchError(f'Cannot replace inside a scalar at {path!r}')
+    return doc
+
+
+def apply_patch(doc: Any, operations: list) -> Any:
+    """
+    Apply an RFC 6902 JSON Patch and return the patched document.
+    
+    The input document is not modified. The patch is applied atomically:
+    any failing operation (including a failed ``test``) raises
+    ``JsonPatchError`` and nothing is returned.
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError('A JSON Patch must be a list of operations')
+    
+    doc = copy.deepcopy(doc)
+    for operation in operations:
+        if not isinstance(operation, dict) or 'op' not in operation or 'path' not in operation:
+            raise JsonPatchError(f'Invalid operation: {operation!r}')
+        op, path = operation['op'], operation['path']
+        
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise JsonPatchError(f'"{op}" requires a value')
+        if op in ('move', 'copy') and 'from' not in operation:
+            raise JsonPatchError(f'"{op}" requires a from path')
+        # Checked up front: move compares the two pointers as strings
+        _parse_pointer(path)
+        if op in ('move', 'copy'):
+            _parse_pointer(operation['from'])
+        
+        if op == 'add':
+            doc = _add(doc, path, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            doc = _remove(doc, path)
+        elif op == 'replace':
+            doc = _replace(doc, path, copy.deepcopy(operation['value']))
+        elif op == 'move':
+            source = operation['from']
+            if path != source and path.startswith(source + '/'):
+                raise JsonPatchError('Cannot move a value into one of its children')
+            value = _get(doc, source)
+            doc = _add(_remove(doc, source), path, value)
+        elif op == 'copy':
+            doc = _add(doc, path, copy.deepcopy(_get(doc, operation['from'])))
+        elif op == 'test':
+            if not _json_equal(_get(doc, path), operation['value']):
+                raise JsonPatchError(f'Test failed at {path!r}')
+        else:
+            raise JsonPatchError(f'Unknown operation: {op!r}')
+    return doc
+
+
+def apply_merge_patch(doc: Any, patch: Any) -> Any:
+    """
+    Apply an RFC 7396 JSON Merge Patch and return the merged document
+    """
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = copy.deepcopy(doc) if isinstance(doc, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+def _escape_token(token: Any) -> str:
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def make_patch(src: Any, dst: Any, path: str = '') -> list:
+    """
+    Build an RFC 6902 JSON Patch that turns ``src`` into ``dst``.
+    
+    Objects and arrays are compared recursively, so the patch only carries
+    the values that actually changed.
+    """
+    if isinstance(src, dict) and isinstance(dst, dict):
+        operations = [
+            {'op': 'remove', 'path': f'{path}/{_escape_token(key)}'}
+            for key in src if key not in dst
+        ]
+        for key, value in dst.items():
+            child = f'{path}/{_escape_token(key)}'
+            if key in src:
+                operations += make_patch(src[key], value, child)
+            else:
+                operations.append({'op': 'add', 'path': child, 'value': copy.deepcopy(value)})
+        return operations
+    
+    if isinstance(src, list) and isinstance(dst, list):
+        operations = []
+        for index in range(min(len(src), len(dst))):
+            operations += make_patch(src[index], dst[index], f'{path}/{index}')
+        for index in range(len(src), len(dst)):
+            operations.append({'op': 'add', 'path': f'{path}/{index}', 'value': copy.deepcopy(dst[index])})
+        for index in range(len(src) - 1, len(dst) - 1, -1):
+            operations.append({'op': 'remove', 'path': f'{path}/{index}'})
+        return operations
+    
+    if type(src) is type(dst) and src == dst:
+        return []
+    return [{'op': 'replace', 'path': path, 'value': copy.deepcopy(dst)}]
@@ -0,0 +1,30 @@
+"""
+Deferred imports for heavy optional dependencies (Gemini SDK, PDF/DOCX parsers).
+
+``genai = lazy_import('google.generativeai')`` binds a placeholder at module
+load; the real import happens on first attribute access, so workers and
+management commands that never call the AI or parse a resume do not pay for
+it. Import errors surface at that first use, as they would at the call site
+of a function-level import.
+"""
+import importlib
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+    
+    def __init__(self, name):
+        self._name = name
+    
+    def __getattr__(self, attr):
+        # import_module caches in sys.modules and holds the import lock, so
+        # concurrent first uses import once
+        module = importlib.import_module(self._name)
+        return getattr(module, attr)
+    
+    def __repr__(self):
+        return f'<lazy module {self._name!r}>'
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -0,0 +1,62 @@
+"""
+Measure worker startup cost (django.setup() plus loading the URLconf) with
+``python -X importtime`` in fresh interpreters, broken down by top-level
+package. ``--check`` fails when a heavy dependency that should be imported
+lazily (Gemini SDK, PDF/DOCX parsers, WeasyPrint) is loaded at startup.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmarks import load_run, run_startup_benchmark, save_run
+
+
+class Command(BaseCommand):
+    help = 'Benchmark import time of a worker startup'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to start (median is reported)')
+        parser.add_argument('--top', type=int, default=15, help='Packages to list')
+        parser.add_argument('--label', default='', help='Appended to the result file name')
+        parser.add_argument('--compare', help='Saved run to compare with: "latest", a label, a file name or a path')
+        parser.add_argument('--no-save', action='store_true', help='Do not save this run')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail if a deferred heavy dependency is imported at startup',
+        )
+    
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = load_run(options['compare'], kind='startup')
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot load run to compare with: {e}')
+        
+        run = run_startup_benchmark(repeat=options['repeat'], label=options['label'])
+        
+        self.stdout.write(f"Startup wall time: {run['wall_ms']} ms, imports: {run['import_ms']} ms")
+        self.stdout.write(f"{'package':<30}{'ms':>9}{'change':>10}")
+        for name, ms in list(run['packages'].items())[:options['top']]:
+            change = ''
+            if baseline:
+                before = baseline['packages'].get(name)
+                change = f'{ms - before:+.1f}' if before is not None else 'new'
+            self.stdout.write(f'{name:<30}{ms:>9}{change:>10}')
+        if baseline:
+            self.stdout.write(
+                f"Total import time {run['import_ms'] - baseline['import_ms']:+.1f} ms "
+                f"vs {baseline.get('label') or baseline['created_at']} ({baseline.get('git_revision') or 'unknown revision'})"
+            )
+        
+        if not options['no_save']:
+            path = save_run(run, kind='startup')
+            self.stdout.write(self.style.SUCCESS(f'Saved results to {path}'))
+        
+        if run['deferred_loaded']:
+            message = f"Imported at startup but should be lazy: {', '.join(run['deferred_loaded'])}"
+            if options['check']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
@@ -0,0 +1,62 @@
+"""
+Write precompressed .br/.gz variants of static files.
+
+Run after ``collectstatic`` so the front server can serve compressed files
+without compressing them per request. Static published portfolios are
+precompressed when they are built; pass ``--sites`` to also process builds
+made before that.
+"""
+
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.compression import (
+    COMPRESSIBLE_EXTENSIONS,
+    PRECOMPRESSED_SUFFIXES,
+    available_encodings,
+    write_precompressed,
+)
+
+
+class Command(BaseCommand):
+    help = 'Write .br/.gz variants of collected static files for the front server'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Directories to process (default: STATIC_ROOT)')
+        parser.add_argument('--sites', action='store_true', help='Also process STATIC_SITES_ROOT')
+        parser.add_argument('--force', action='store_true', help='Rewrite variants that are up to date')
+    
+    def handle(self, *args, **options):
+        roots = options['paths'] or [settings.STATIC_ROOT]
+        if options['sites']:
+            roots.append(settings.STATIC_SITES_ROOT)
+        
+        files = original_bytes = compressed_bytes = 0
+        for root in roots:
+            if not os.path.isdir(root):
+                self.stderr.write(f'Skipping {root}: not a directory')
+                continue
+            for path in self.find_files(root):
+                if not options['force'] and self.is_up_to_date(path):
+                    continue
+                written = write_precompressed(path)
+                if written:
+                    files += 1
+                    original_bytes += os.path.getsize(path)
+                    compressed_bytes += min(written.values())
+        
+        saved = f' ({100 - compressed_bytes * 100 // original_bytes}% smaller)' if original_bytes else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'Precompressed {files} files: {original_bytes} -> {compressed_bytes} bytes{saved}'
+        ))
+    
+    def find_files(self, root):
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                    yield os.path.join(directory, name)
+    
+    def is_up_to_date(self, path):
+        mtime = os.path.getmtime(path)
+        variants = [path + PRECOMPRESSED_SUFFIXES[encoding] for encoding in available_encodings()]
+        return all(os.path.exists(variant) and os.path.getmtime(variant) >= mtime for variant in variants)
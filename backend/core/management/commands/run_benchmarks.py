@@ -0,0 +1,95 @@
+"""
+Measure p50/p95/p99 latency and throughput of the key API endpoints.
+
+Run ``seed_benchmark_data`` first. Each run is saved as JSON under
+BENCHMARK_RESULTS_DIR; ``--compare latest`` (or a file name) prints the
+change against an earlier run. ``--accept-encoding br`` measures the
+compressed response sizes; compare with a run without it for the
+bandwidth saving.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmarks import SCENARIOS, BenchmarkRunner, compare_runs, load_run, save_run
+
+
+class Command(BaseCommand):
+    help = 'Benchmark key API endpoints and save the results'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=1, help='Client threads per scenario')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            choices=[scenario.name for scenario in SCENARIOS],
+            help='Run only this scenario (repeatable)',
+        )
+        parser.add_argument(
+            '--accept-encoding',
+            default='',
+            help='Accept-Encoding header to send, e.g. "br" or "gzip" (default: none, uncompressed)',
+        )
+        parser.add_argument('--label', default='', help='Appended to the result file name')
+        parser.add_argument('--compare', help='Saved run to compare with: "latest", a file name or a path')
+        parser.add_argument('--no-save', action='store_true', help='Do not save this run')
+    
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--iterations and --concurrency must be at least 1')
+        
+        baseline = None
+        if options['compare']:
+            # Load before running so "latest" means the previous run, not this one
+            try:
+                baseline = load_run(options['compare'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot load run to compare with: {e}')
+        
+        runner = BenchmarkRunner(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            concurrency=options['concurrency'],
+            scenarios=options['scenarios'],
+            accept_encoding=options['accept_encoding'],
+            log=self.stderr.write,
+        )
+        try:
+            run = runner.run(label=options['label'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        self.write_results(run)
+        if baseline:
+            self.write_comparison(baseline, run)
+        if not options['no_save']:
+            path = save_run(run)
+            self.stdout.write(self.style.SUCCESS(f'Saved results to {path}'))
+    
+    def write_results(self, run):
+        self.stdout.write(
+            f"{'scenario':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'bytes':>9}  statuses"
+        )
+        for name, result in run['results'].items():
+            statuses = ' '.join(f'{code}x{n}' for code, n in result['statuses'].items())
+            self.stdout.write(
+                f"{name:<26}{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}"
+                f"{result['throughput_rps']:>9}{str(result['queries']):>9}{str(result.get('bytes')):>9}  {statuses}"
+            )
+    
+    def write_comparison(self, baseline, run):
+        self.stdout.write('')
+        self.stdout.write(
+            f"Change vs {baseline.get('label') or baseline['created_at']} "
+            f"({baseline.get('git_revision') or 'unknown revision'})"
+        )
+        for row in compare_runs(baseline, run):
+            changes = '  '.join(
+                f"{metric.replace('_ms', '').replace('_rps', '')} {self.format_change(value)}"
+                for metric, value in row.items() if metric != 'scenario'
+            )
+            self.stdout.write(f"{row['scenario']:<26}{changes}")
+    
+    def format_change(self, value):
+        return 'n/a' if value is None else f'{value:+.1f}%'
@@ -0,0 +1,76 @@
+"""
+Generate a synthetic data set for benchmarks.
+
+Defaults produce 2,000 users with a portfolio of 10-20 components each,
+3 projects and 5 tagged blog posts per user, 1,000,000 portfolio views and
+200,000 click events spread over the last year.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from core import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, portfolios, blogs and analytics events for benchmarks'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--portfolios-per-user', type=int, default=1)
+        parser.add_argument('--min-components', type=int, default=10)
+        parser.add_argument('--max-components', type=int, default=20)
+        parser.add_argument('--projects-per-user', type=int, default=3)
+        parser.add_argument('--posts-per-user', type=int, default=5)
+        parser.add_argument('--tags', type=int, default=40, help='Distinct blog and project tags')
+        parser.add_argument('--views', type=int, default=1_000_000, help='PortfolioView rows')
+        parser.add_argument('--clicks', type=int, default=200_000, help='ClickEvent rows')
+        parser.add_argument('--days', type=int, default=365, help='Spread timestamps over this many days')
+        parser.add_argument(
+            '--hot-share',
+            type=float,
+            default=0.1,
+            help='Fraction of events sent to the first generated portfolio',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data sets')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete previously generated data first',
+        )
+        parser.add_argument(
+            '--clear-only',
+            action='store_true',
+            help='Delete previously generated data and exit',
+        )
+    
+    def handle(self, *args, **options):
+        if options['min_components'] > options['max_components']:
+            raise CommandError('--min-components must not exceed --max-components')
+        if options['portfolios_per_user'] < 1:
+            raise CommandError('--portfolios-per-user must be at least 1')
+        
+        if options['clear'] or options['clear_only']:
+            deleted = synthetic.clear()
+            self.stdout.write(f'Deleted {deleted} rows of generated data')
+            if options['clear_only']:
+                return
+        
+        generator = synthetic.SyntheticDataGenerator(
+            users=options['users'],
+            portfolios_per_user=options['portfolios_per_user'],
+            components=(options['min_components'], options['max_components']),
+            projects_per_user=options['projects_per_user'],
+            posts_per_user=options['posts_per_user'],
+            tags=options['tags'],
+            views=options['views'],
+            clicks=options['clicks'],
+            days=options['days'],
+            hot_share=options['hot_share'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        counts = generator.generate()
+        summary = ', '.join(f'{count} {name.replace("_", " ")}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary}'))
+        self.stdout.write(f'Generated users log in with password "{synthetic.PASSWORD}"')
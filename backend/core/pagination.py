@@ -0,0 +1,27 @@
+"""
+Keyset (cursor) pagination: every page is a ``WHERE key < cursor ORDER BY key``
+range scan on an index, so deep pages cost the same as the first one.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination with a client-selectable page size. Subclasses set
+    ``ordering``; its first field must be indexed and should be (nearly) unique.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class BlogFeedPagination(KeysetPagination):
+    # ``feed_date`` is Coalesce(published_date, created_at), annotated by the view
+    ordering = ('-feed_date', '-id')
+
+
+class PortfolioViewPagination(KeysetPagination):
+    ordering = ('-viewed_at', '-id')
+
+
+class ClickEventPagination(KeysetPagination):
+    ordering = ('-clicked_at', '-id')
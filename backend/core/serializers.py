@@ -0,0 +1,103 @@
+"""
+Sparse fieldsets for read requests.
+
+``?fields=title,components.id`` keeps only the listed fields (dotted names
+reach into nested serializers) and ``?expand=components`` adds fields a
+serializer declares in ``expandable_fields``. Dropped fields are never
+computed, and ``setup_eager_loading`` only joins, prefetches and loads the
+columns the response will actually contain.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_field_tree(value):
+    """``'a,b.c,b.d'`` -> ``{'a': {}, 'b': {'c': {}, 'd': {}}}``"""
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for part in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def get_field_trees(request):
+    """Parsed ``fields`` and ``expand`` query params, empty for writes"""
+    if request is None or request.method not in SAFE_METHODS:
+        return {}, {}
+    return (
+        parse_field_tree(request.query_params.get('fields')),
+        parse_field_tree(request.query_params.get('expand')),
+    )
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin for ModelSerializers that honours ``?fields=`` and ``?expand=``.
+    
+    Class attributes:
+    - ``expandable_fields``: name -> (serializer class, kwargs), rendered only
+      when requested with ``?expand=``
+    - ``select_related_fields`` / ``prefetch_related_fields``: name -> lookup
+      path needed to render that field without extra queries
+    - ``deferrable_fields``: model columns worth deferring when not requested
+    """
+    expandable_fields = {}
+    select_related_fields = {}
+    prefetch_related_fields = {}
+    deferrable_fields = []
+    
+    def _field_path(self):
+        parts = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                parts.append(node.field_name)
+            node = node.parent
+        return reversed(parts)
+    
+    def _subtree(self, tree):
+        for part in self._field_path():
+            tree = tree.get(part)
+            if not tree:
+                return {}
+        return tree
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        only, expand = get_field_trees(self.context.get('request'))
+        if not only and not expand:
+            return fields
+        
+        for name in self._subtree(expand):
+            if name in self.expandable_fields and name not in fields:
+                serializer_class, kwargs = self.expandable_fields[name]
+                fields[name] = serializer_class(**kwargs)
+        
+        only = self._subtree(only)
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+        return fields
+    
+    @classmethod
+    def get_output_field_names(cls, request):
+        """Top-level field names a read request will render"""
+        only, expand = get_field_trees(request)
+        names = set(cls.Meta.fields) | {name for name in expand if name in cls.expandable_fields}
+        if only:
+            names &= set(only)
+        return names
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        """Join, prefetch and load only what the requested fields need"""
+        names = cls.get_output_field_names(request)
+        select = [path for name, path in cls.select_related_fields.items() if name in names]
+        prefetch = [path for name, path in cls.prefetch_related_fields.items() if name in names]
+        defer = [name for name in cls.deferrable_fields if name not in names]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if defer:
+            queryset = queryset.defer(*defer)
+        return queryset
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import invalidate_scopes
+
+
+@receiver(post_save, sender='portfolios.Portfolio')
+@receiver(post_delete, sender='portfolios.Portfolio')
+def portfolio_changed(sender, instance, **kwargs):
+    invalidate_scopes(('portfolio', instance.pk), ('user', instance.user_id))
+
+
+@receiver(post_save, sender='portfolios.PortfolioComponent')
+@receiver(post_delete, sender='portfolios.PortfolioComponent')
+@receiver(post_save, sender='portfolios.PortfolioSettings')
+@receiver(post_delete, sender='portfolios.PortfolioSettings')
+def portfolio_part_changed(sender, instance, **kwargs):
+    invalidate_scopes(('portfolio', instance.portfolio_id))
+
+
+@receiver(post_save, sender='projects.Project')
+@receiver(post_delete, sender='projects.Project')
+@receiver(post_save, sender='blogs.BlogPost')
+@receiver(post_delete, sender='blogs.BlogPost')
+def user_content_changed(sender, instance, **kwargs):
+    invalidate_scopes(('user', instance.user_id))
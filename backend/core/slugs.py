@@ -0,0 +1,76 @@
+"""
+Unique slug allocation shared by models with an auto-generated slug
+"""
+import re
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Longer digit tails are part of the title ("launch-2024"), not counters
+MAX_SUFFIX_DIGITS = 6
+
+
+def next_free_slug(queryset, base_slug: str) -> str:
+    """
+    Return ``base_slug`` or ``base_slug-N`` with the smallest free N.
+
+    Only slugs in the ``[base-, base.)`` range can collide, so the candidates
+    are read in a single index range scan instead of one ``exists()`` query
+    per candidate, and the first free counter is picked in Python.
+    """
+    prefix = f'{base_slug}-'
+    suffixed = Q(
+        slug__gte=prefix,
+        slug__lt=f'{base_slug}.',
+        slug__regex=rf'^{re.escape(prefix)}[1-9][0-9]{{0,{MAX_SUFFIX_DIGITS - 1}}}$'
+    )
+    taken = set(queryset.filter(Q(slug=base_slug) | suffixed).values_list('slug', flat=True))
+    if base_slug not in taken:
+        return base_slug
+    counters = {int(slug[len(prefix):]) for slug in taken if slug != base_slug}
+    counter = 1
+    while counter in counters:
+        counter += 1
+    return f'{prefix}{counter}'
+
+
+class UniqueSlugMixin:
+    """
+    Model mixin that fills an empty ``slug`` from ``slug_source_field`` on save.
+
+    Slugs are unique within ``slug_scope_fields`` (globally when empty). When a
+    concurrent insert grabs the same slug first, the unique constraint rejects
+    the row and a fresh slug is allocated and saved again.
+    """
+    slug_source_field = 'title'
+    slug_scope_fields = ()
+    slug_max_attempts = 5
+    
+    def get_slug_queryset(self):
+        scope = {field: getattr(self, field) for field in self.slug_scope_fields}
+        queryset = type(self)._default_manager.filter(**scope)
+        if self.pk is not None:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+    
+    def allocate_slug(self) -> str:
+        max_length = self._meta.get_field('slug').max_length
+        # Leave room for a "-N" suffix
+        base_slug = slugify(getattr(self, self.slug_source_field))[:max_length - 11].strip('-')
+        return next_free_slug(self.get_slug_queryset(), base_slug or self._meta.model_name)
+    
+    def save(self, *args, **kwargs):
+        if self.slug:
+            return super().save(*args, **kwargs)
+        
+        for attempt in range(self.slug_max_attempts):
+            self.slug = self.allocate_slug()
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Only retry when we lost a race for the slug
+                if (attempt == self.slug_max_attempts - 1
+                        or not self.get_slug_queryset().filter(slug=self.slug).exists()):
+                    self.slug = ''
+                    raise
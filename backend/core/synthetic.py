@@ -0,0 +1,341 @@
+"""
+Synthetic data for benchmarks.
+
+Rows are written with ``bulk_create`` in batches, so model signals (static
+site builds, search indexing, dashboard cache invalidation) do not fire;
+``generate`` rebuilds the search index once at the end instead. Every
+generated user is named ``bench_<n>`` so the data set can be removed again
+with ``clear``.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+USERNAME_PREFIX = 'bench_'
+PASSWORD = 'bench-password'
+
+WORDS = (
+    'api cache cloud data design django docker frontend graph kubernetes latency '
+    'machine model network python query react render scale search server stack '
+    'system team testing typescript vector web workflow'
+).split()
+
+COMPONENT_TYPES = [
+    'hero_banner', 'about_me_card', 'skills_cloud', 'experience_timeline', 'project_grid',
+    'services_section', 'achievements_counters', 'testimonials_carousel',
+    'blog_preview_grid', 'contact_form', 'footer', 'custom',
+]
+
+REFERRERS = [None, 'https://www.google.com/', 'https://www.linkedin.com/', 'https://github.com/', 'https://t.co/']
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 Version/17.4 Safari/605.1.15',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+]
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """
+    Let ``bulk_create`` keep explicit values for ``auto_now``/``auto_now_add``
+    fields, so generated rows can be spread over time
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class SyntheticDataGenerator:
+    """
+    Generate users with portfolios, components, projects, tagged blog posts and
+    analytics events.
+    
+    A ``hot_share`` fraction of all views and clicks goes to the first
+    generated portfolio so analytics endpoints can be measured against
+    one very large portfolio as well as many ordinary ones.
+    """
+    
+    def __init__(self, users=2000, portfolios_per_user=1, components=(10, 20), projects_per_user=3,
+                 posts_per_user=5, tags=40, views=1_000_000, clicks=200_000, days=365,
+                 hot_share=0.1, batch_size=5000, seed=0, log=None):
+        self.users = users
+        self.portfolios_per_user = portfolios_per_user
+        self.components = components
+        self.projects_per_user = projects_per_user
+        self.posts_per_user = posts_per_user
+        self.tags = tags
+        self.views = views
+        self.clicks = clicks
+        self.days = days
+        self.hot_share = hot_share
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.now = timezone.now()
+        self.log = log or (lambda message: None)
+    
+    def sentence(self, words):
+        return ' '.join(self.random.choice(WORDS) for _ in range(words)).capitalize()
+    
+    def past(self, days=None):
+        return self.now - timedelta(seconds=self.random.uniform(0, (days or self.days) * 86400))
+    
+    def ip_address(self):
+        return f'10.{self.random.randrange(256)}.{self.random.randrange(256)}.{self.random.randrange(1, 255)}'
+    
+    def generate(self):
+        """Create the whole data set and return the number of rows per model"""
+        from accounts.models import UserProfile
+        from analytics.models import ClickEvent, PortfolioView
+        from blogs.models import BlogPost, BlogTag
+        from portfolios.models import Portfolio, PortfolioComponent, PortfolioSettings, Template
+        from projects.models import Project, ProjectTag
+        from search.index import rebuild_index
+        
+        with manual_timestamps(User, Portfolio, Project, BlogPost, PortfolioView, ClickEvent):
+            with transaction.atomic():
+                users = self.create_users(UserProfile)
+                templates = list(Template.objects.filter(is_active=True)) or [None]
+                portfolios = self.create_portfolios(Portfolio, PortfolioSettings, users, templates)
+                components = self.create_components(PortfolioComponent, portfolios)
+                projects = self.create_projects(Project, ProjectTag, users)
+                posts = self.create_posts(BlogPost, BlogTag, users)
+            published = [portfolio.pk for portfolio in portfolios if portfolio.is_published]
+            views = self.create_events(PortfolioView, self.views, published, self.view_event)
+            clicks = self.create_events(ClickEvent, self.clicks, published, self.click_event)
+        
+        self.log('Rebuilding search index')
+        rebuild_index()
+        return {
+            'users': len(users),
+            'portfolios': len(portfolios),
+            'components': components,
+            'projects': projects,
+            'blog_posts': posts,
+            'portfolio_views': views,
+            'click_events': clicks,
+        }
+    
+    def create_users(self, profile_model):
+        self.log(f'Creating {self.users} users')
+        start = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+        password = make_password(PASSWORD)
+        users = []
+        for index in range(start, start + self.users):
+            joined = self.past()
+            users.append(User(
+                username=f'{USERNAME_PREFIX}{index}',
+                email=f'{USERNAME_PREFIX}{index}@bench.example',
+                first_name=self.random.choice(WORDS).capitalize(),
+                password=password,
+                date_joined=joined,
+            ))
+        users = User.objects.bulk_create(users, batch_size=self.batch_size)
+        profile_model.objects.bulk_create(
+            [profile_model(user=user) for user in users],
+            batch_size=self.batch_size
+        )
+        return users
+    
+    def create_portfolios(self, portfolio_model, settings_model, users, templates):
+        self.log(f'Creating {len(users) * self.portfolios_per_user} portfolios')
+        portfolios = []
+        for user in users:
+            for index in range(self.portfolios_per_user):
+                created = self.past()
+                template = self.random.choice(templates)
+                # The first portfolio of every user is public so public_view has a wide key space
+                published = index == 0 or self.random.random() < 0.5
+                portfolios.append(portfolio_model(
+                    user=user,
+                    title=f'{user.first_name} {self.sentence(2)}',
+                    slug=f'{user.username.replace("_", "-")}-{index}',
+                    template=template,
+                    template_type=template.type if template else 'modern',
+                    is_published=published,
+                    published_at=created if published else None,
+                    seo_description=self.sentence(12),
+                    created_at=created,
+                    updated_at=created,
+                ))
+        portfolios = portfolio_model.objects.bulk_create(portfolios, batch_size=self.batch_size)
+        settings_model.objects.bulk_create(
+            [settings_model(portfolio=portfolio) for portfolio in portfolios],
+            batch_size=self.batch_size
+        )
+        return portfolios
+    
+    def component_content(self, component_type):
+        content = {'title': self.sentence(3), 'subtitle': self.sentence(6)}
+        if component_type in ('skills_cloud', 'skills'):
+            content['skills'] = [{'name': word, 'level': self.random.randint(1, 5)} for word in self.random.sample(WORDS, 8)]
+        elif component_type in ('experience_timeline', 'testimonials_carousel', 'services_section'):
+            content['items'] = [
+                {'title': self.sentence(3), 'description': self.sentence(25)}
+                for _ in range(self.random.randint(3, 6))
+            ]
+        else:
+            content['text'] = ' '.join(self.sentence(15) + '.' for _ in range(4))
+        return content
+    
+    def create_components(self, component_model, portfolios):
+        self.log('Creating portfolio components')
+        low, high = self.components
+        
+        def rows():
+            for portfolio in portfolios:
+                for order in range(self.random.randint(low, high)):
+                    component_type = COMPONENT_TYPES[order % len(COMPONENT_TYPES)]
+                    yield component_model(
+                        portfolio=portfolio,
+                        component_type=component_type,
+                        order=order,
+                        content=self.component_content(component_type),
+                    )
+        
+        count = 0
+        for batch in batched(rows(), self.batch_size):
+            component_model.objects.bulk_create(batch)
+            count += len(batch)
+        return count
+    
+    def create_tags(self, tag_model):
+        names = [f'{word}-{index}' for index, word in enumerate(self.random.choices(WORDS, k=self.tags))]
+        tag_model.objects.bulk_create([tag_model(name=name) for name in names], ignore_conflicts=True)
+        return list(tag_model.objects.filter(name__in=names))
+    
+    def create_projects(self, project_model, tag_model, users):
+        self.log(f'Creating {len(users) * self.projects_per_user} projects')
+        tags = self.create_tags(tag_model)
+        projects = []
+        for user in users:
+            for index in range(self.projects_per_user):
+                created = self.past()
+                projects.append(project_model(
+                    user=user,
+                    title=f'{self.sentence(3)} {index}',
+                    slug=f'project-{index}',
+                    description=' '.join(self.sentence(20) + '.' for _ in range(5)),
+                    short_description=self.sentence(12),
+                    created_at=created,
+                    updated_at=created,
+                ))
+        projects = project_model.objects.bulk_create(projects, batch_size=self.batch_size)
+        through = project_model.tags.through
+        through.objects.bulk_create([
+            through(project=project, projecttag=tag)
+            for project in projects
+            for tag in self.random.sample(tags, min(len(tags), self.random.randint(1, 4)))
+        ], batch_size=self.batch_size)
+        return len(projects)
+    
+    def post_markdown(self):
+        sections = []
+        for _ in range(self.random.randint(2, 5)):
+            sections.append(f'## {self.sentence(4)}\n\n' + '\n\n'.join(
+                ' '.join(self.sentence(18) + '.' for _ in range(4)) for _ in range(3)
+            ))
+        return f'# {self.sentence(5)}\n\n' + '\n\n'.join(sections)
+    
+    def create_posts(self, post_model, tag_model, users):
+        self.log(f'Creating {len(users) * self.posts_per_user} blog posts')
+        tags = self.create_tags(tag_model)
+        posts = []
+        for user in users:
+            for index in range(self.posts_per_user):
+                created = self.past()
+                published = self.random.random() < 0.8
+                post = post_model(
+                    user=user,
+                    title=f'{self.sentence(5)} {index}',
+                    slug=f'post-{index}',
+                    content_markdown=self.post_markdown(),
+                    excerpt=self.sentence(20),
+                    published=published,
+                    published_date=created if published else None,
+                    views=self.random.randint(0, 5000) if published else 0,
+                    created_at=created,
+                    updated_at=created,
+                )
+                post.render_content()
+                posts.append(post)
+        posts = post_model.objects.bulk_create(posts, batch_size=self.batch_size)
+        through = post_model.tags.through
+        through.objects.bulk_create([
+            through(blogpost=post, blogtag=tag)
+            for post in posts
+            for tag in self.random.sample(tags, min(len(tags), self.random.randint(1, 4)))
+        ], batch_size=self.batch_size)
+        return len(posts)
+    
+    def event_portfolio(self, portfolio_ids):
+        if self.random.random() < self.hot_share:
+            return portfolio_ids[0]
+        return self.random.choice(portfolio_ids)
+    
+    def view_event(self, model, portfolio_id):
+        return model(
+            portfolio_id=portfolio_id,
+            ip_address=self.ip_address(),
+            user_agent=self.random.choice(USER_AGENTS),
+            referrer=self.random.choice(REFERRERS),
+            viewed_at=self.past(),
+            duration=self.random.choice([0, 0, self.random.randint(5, 600)]),
+        )
+    
+    def click_event(self, model, portfolio_id):
+        return model(
+            portfolio_id=portfolio_id,
+            element_id=f'{self.random.choice(COMPONENT_TYPES)}-{self.random.randint(1, 5)}',
+            element_type=self.random.choice(['button', 'link', 'project', 'social']),
+            clicked_at=self.past(),
+            ip_address=self.ip_address(),
+        )
+    
+    def create_events(self, model, count, portfolio_ids, build):
+        if not count or not portfolio_ids:
+            return 0
+        self.log(f'Creating {count} {model._meta.verbose_name_plural}')
+        rows = (build(model, self.event_portfolio(portfolio_ids)) for _ in range(count))
+        created = 0
+        for batch in batched(rows, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            created += len(batch)
+            if created % (self.batch_size * 20) == 0:
+                self.log(f'  {created}/{count}')
+        return created
+
+
+def clear():
+    """Delete every generated user and, by cascade, everything they own"""
+    from analytics.models import ClickEvent, PortfolioView
+    
+    users = User.objects.filter(username__startswith=USERNAME_PREFIX)
+    deleted = 0
+    # Event rows have no dependants; skip the collector (and its per-row
+    # delete signals) which would otherwise load millions of rows
+    for model in (PortfolioView, ClickEvent):
+        events = model.objects.filter(portfolio__user__in=users)
+        deleted += events._raw_delete(events.db)
+    deleted += users.delete()[0]
+    return deleted
@@ -0,0 +1,30 @@
+"""
+Test helpers for query budgets declared on views
+"""
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTestCase(TestCase):
+    """
+    Any request over its view's declared query budget fails the test
+    (``RequestMetricsMiddleware`` raises ``QueryBudgetExceeded``).
+    
+    ``api_client`` authenticates with a real JWT so the authentication
+    lookup counts against the budget as it does in production.
+    """
+    
+    def api_client(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+    
+    def assertWithinBudget(self, response, status_code=200):
+        metrics = response.request_metrics
+        self.assertEqual(response.status_code, status_code)
+        self.assertIsNotNone(metrics.query_budget, f'{metrics.view} declares no query budget')
+        self.assertLessEqual(metrics.queries, metrics.query_budget, metrics.view)
+        return metrics
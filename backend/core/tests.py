@@ -0,0 +1,399 @@
+import atexit
+import gzip
+import os
+import tempfile
+import threading
+from unittest import mock
+import brotli
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from analytics.models import PortfolioView
+from blogs.models import BlogPost
+from core.cache import CacheNamespace, export_cache, portfolio_cache
+from core.benchmarks import BenchmarkRunner, compare_runs, load_run, profile_startup, save_run
+from core.counters import BufferedCounter
+from core.compression import CompressionMiddleware, negotiate_encoding, write_precompressed
+from core.instrumentation import QueryBudgetExceeded
+from core.jsonpatch import JsonPatchError, apply_merge_patch, apply_patch, make_patch
+from core.serializers import parse_field_tree
+from core.slugs import next_free_slug
+from core.synthetic import SyntheticDataGenerator, clear
+from core.testing import QueryBudgetTestCase
+from portfolios.models import Portfolio, PortfolioComponent
+from portfolios.views import PortfolioViewSet
+
+
+class RequestMetricsMiddlewareTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = self.api_client(self.user)
+    
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_server_timing_header(self):
+        response = self.client.get('/api/v1/portfolios/portfolios/')
+        metrics = response.request_metrics
+        self.assertEqual(metrics.view, 'PortfolioViewSet.list')
+        self.assertGreater(metrics.queries, 0)
+        self.assertIn(f'db;dur={metrics.sql_ms:.1f};desc="{metrics.queries} queries"', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+    
+    @override_settings(SERVER_TIMING_ENABLED=False)
+    def test_server_timing_disabled(self):
+        response = self.client.get('/api/v1/portfolios/portfolios/')
+        self.assertNotIn('Server-Timing', response)
+    
+    def test_budget_exceeded_raises_in_strict_mode(self):
+        budgets = dict(PortfolioViewSet.query_budgets, list=1)
+        with mock.patch.object(PortfolioViewSet, 'query_budgets', budgets):
+            with self.assertLogs('portfolioai.requests', 'WARNING'):
+                with self.assertRaises(QueryBudgetExceeded):
+                    self.client.get('/api/v1/portfolios/portfolios/')
+
+
+class UniqueSlugTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+    
+    def create(self, title, slug=''):
+        return Portfolio.objects.create(user=self.user, title=title, slug=slug)
+    
+    def test_first_free_counter(self):
+        self.assertEqual(self.create('Year').slug, 'year')
+        self.assertEqual(self.create('Year').slug, 'year-1')
+        self.create('Year', 'year-3')
+        self.assertEqual(self.create('Year').slug, 'year-2')
+        self.assertEqual(self.create('Year').slug, 'year-4')
+    
+    def test_digit_tails_in_titles_are_not_counters(self):
+        self.create('Year')
+        self.create('Year 2024')
+        self.create('Year', 'year-123456789012345678901234567890')
+        self.assertEqual(self.create('Year').slug, 'year-1')
+        self.assertEqual(next_free_slug(Portfolio.objects.all(), 'year-2024'), 'year-2024-1')
+    
+    def test_single_query(self):
+        self.create('Year')
+        with self.assertNumQueries(1):
+            self.assertEqual(next_free_slug(Portfolio.objects.all(), 'year'), 'year-1')
+    
+    def test_retries_when_a_concurrent_insert_takes_the_slug(self):
+        self.create('Race')
+        portfolio = Portfolio(user=self.user, title='Race')
+        # The first allocation misses the concurrent "race" row
+        with mock.patch.object(Portfolio, 'allocate_slug', side_effect=['race', 'race-1']) as allocate:
+            portfolio.save()
+        self.assertEqual(allocate.call_count, 2)
+        self.assertEqual(Portfolio.objects.get(pk=portfolio.pk).slug, 'race-1')
+
+
+class BufferedCounterTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('author', 'author@example.com', 'password')
+        self.posts = [
+            BlogPost.objects.create(user=self.user, title=f'Post {index}', content_markdown='Text')
+            for index in range(3)
+        ]
+        self.counter = BufferedCounter(BlogPost, 'views', flush_interval=60, max_pending=2, background=False)
+        self.addCleanup(atexit.unregister, self.counter.close)
+    
+    def test_flush_writes_deltas_with_f_expressions(self):
+        first, second, _ = self.posts
+        self.counter.incr(first.pk)
+        self.counter.incr(first.pk)
+        self.assertEqual(self.counter.incr(second.pk), 1)
+        self.assertEqual(self.counter.value(first), 2)
+        
+        # A concurrent write between buffering and flushing is kept
+        BlogPost.objects.filter(pk=first.pk).update(views=10)
+        # One UPDATE per distinct delta, in a savepoint
+        with self.assertNumQueries(4):
+            self.assertEqual(self.counter.flush(), 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.views, second.views), (12, 1))
+        self.assertEqual(self.counter.pending(first.pk), 0)
+        self.assertEqual(self.counter.flush(), 0)
+    
+    def test_flush_when_too_many_rows_are_dirty(self):
+        for post in self.posts:
+            self.counter.incr(post.pk)
+        self.assertEqual(list(BlogPost.objects.order_by('pk').values_list('views', flat=True)), [1, 1, 1])
+    
+    def test_failed_flush_keeps_deltas(self):
+        self.counter.incr(self.posts[0].pk)
+        with mock.patch.object(BlogPost.objects, 'filter', side_effect=RuntimeError), \
+                self.assertLogs('core.counters', 'ERROR'):
+            self.assertEqual(self.counter.flush(), 0)
+        self.assertEqual(self.counter.pending(self.posts[0].pk), 1)
+    
+    def test_background_flush(self):
+        counter = BufferedCounter(BlogPost, 'views', flush_interval=0.01)
+        self.addCleanup(atexit.unregister, counter.close)
+        flushed = threading.Event()
+        with mock.patch.object(counter, 'flush', side_effect=lambda: flushed.set() or 0):
+            counter.incr(self.posts[0].pk)
+            self.assertTrue(flushed.wait(5))
+            counter.close()
+            counter._timer.join(5)
+        self.assertFalse(counter._timer.is_alive())
+        # A closed counter does not start another thread
+        counter.incr(self.posts[0].pk)
+        self.assertFalse(counter._timer.is_alive())
+
+
+class FieldTreeTests(SimpleTestCase):
+    
+    def test_parse_field_tree(self):
+        self.assertEqual(
+            parse_field_tree('id, title,components.id,components.content.title,,settings.'),
+            {'id': {}, 'title': {}, 'components': {'id': {}, 'content': {'title': {}}}, 'settings': {}}
+        )
+        self.assertEqual(parse_field_tree(None), {})
+
+
+class JsonPatchTests(SimpleTestCase):
+    
+    def test_operations(self):
+        doc = {'a': {'b': [1, 2]}, 'c': 'x'}
+        patched = apply_patch(doc, [
+            {'op': 'add', 'path': '/a/b/-', 'value': 3},
+            {'op': 'remove', 'path': '/a/b/0'},
+            {'op': 'replace', 'path': '/c', 'value': 'y'},
+            {'op': 'move', 'from': '/c', 'path': '/d'},
+            {'op': 'copy', 'from': '/a/b', 'path': '/e'},
+            {'op': 'test', 'path': '/e', 'value': [2, 3]},
+        ])
+        self.assertEqual(patched, {'a': {'b': [2, 3]}, 'd': 'y', 'e': [2, 3]})
+        self.assertEqual(doc, {'a': {'b': [1, 2]}, 'c': 'x'})
+    
+    def test_invalid_pointers(self):
+        for operation in (
+            {'op': 'move', 'from': 5, 'path': '/b'},
+            {'op': 'copy', 'from': '/a', 'path': None},
+            {'op': 'move', 'from': 'a', 'path': '/b'},
+            {'op': 'add', 'path': 'b', 'value': 1},
+        ):
+            with self.assertRaises(JsonPatchError):
+                apply_patch({'a': 1}, [operation])
+    
+    def test_invalid_array_indexes(self):
+        for index in ('²', '١', '01', '-1', ' 1'):
+            with self.assertRaises(JsonPatchError):
+                apply_patch([1, 2], [{'op': 'remove', 'path': f'/{index}'}])
+    
+    def test_test_is_type_strict(self):
+        doc = {'flag': 1, 'enabled': True}
+        with self.assertRaises(JsonPatchError):
+            apply_patch(doc, [{'op': 'test', 'path': '/flag', 'value': True}])
+        with self.assertRaises(JsonPatchError):
+            apply_patch(doc, [{'op': 'test', 'path': '/enabled', 'value': 1}])
+        with self.assertRaises(JsonPatchError):
+            apply_patch(doc, [{'op': 'test', 'path': '/flag', 'value': '1'}])
+        # Numbers compare by value (RFC 6902 section 4.6)
+        apply_patch(doc, [{'op': 'test', 'path': '/flag', 'value': 1.0}])
+    
+    def test_failed_operation_applies_nothing(self):
+        with self.assertRaises(JsonPatchError):
+            apply_patch({'a': 1}, [{'op': 'remove', 'path': '/a'}, {'op': 'remove', 'path': '/missing'}])
+    
+    def test_merge_patch(self):
+        self.assertEqual(
+            apply_merge_patch({'a': {'b': 1, 'c': 2}, 'd': 3}, {'a': {'b': None, 'e': 4}, 'd': [1]}),
+            {'a': {'c': 2, 'e': 4}, 'd': [1]}
+        )
+    
+    def test_make_patch_round_trip(self):
+        src = {'a': [1, 2, 3], 'b': {'c': 'x'}, 'gone': True}
+        dst = {'a': [1, 5], 'b': {'c': 'y', 'd': None}, 'new': 1}
+        self.assertEqual(apply_patch(src, make_patch(src, dst)), dst)
+
+
+class BenchmarkTests(TestCase):
+    
+    def test_seed_and_run(self):
+        counts = SyntheticDataGenerator(users=3, components=(2, 3), posts_per_user=2, views=50, clicks=20).generate()
+        self.assertEqual(counts['users'], 3)
+        self.assertEqual(counts['portfolio_views'], 50)
+        self.assertEqual(PortfolioView.objects.filter(portfolio__user__username__startswith='bench_').count(), 50)
+        
+        runner = BenchmarkRunner(iterations=4, warmup=1, scenarios=['public_view', 'analytics_stats', 'blog_list'])
+        with tempfile.TemporaryDirectory() as directory, override_settings(BENCHMARK_RESULTS_DIR=directory):
+            first = runner.run(label='base')
+            save_run(first)
+            self.assertEqual(load_run('base')['results'], first['results'])
+            for result in first['results'].values():
+                self.assertEqual(result['requests'], 4)
+                self.assertEqual(result['statuses'], {'200': 4})
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            rows = compare_runs(first, runner.run())
+        self.assertEqual([row['scenario'] for row in rows], ['public_view', 'analytics_stats', 'blog_list'])
+        
+        clear()
+        self.assertFalse(PortfolioView.objects.exists())
+
+
+class StartupImportTests(TestCase):
+    
+    def test_heavy_dependencies_are_lazy(self):
+        """Loading the URLconf must not import the Gemini SDK or the resume parsers"""
+        self.assertEqual(profile_startup()['deferred_loaded'], [])
+
+
+class SQLitePragmaTests(TestCase):
+    
+    def test_pragmas_applied_to_new_connections(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+            self.assertEqual(cursor.execute('PRAGMA cache_size').fetchone()[0], -20000)
+            self.assertEqual(cursor.execute('PRAGMA busy_timeout').fetchone()[0], 5000)
+
+
+class CacheNamespaceTests(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.portfolio = Portfolio.objects.create(user=self.user, title='Portfolio')
+    
+    def test_namespaces_do_not_collide(self):
+        portfolio_cache.set(portfolio_cache.key('summary', 1), 'portfolio')
+        export_cache.set(export_cache.key('summary', 1), 'export')
+        self.assertEqual(portfolio_cache.get(portfolio_cache.key('summary', 1)), 'portfolio')
+        self.assertEqual(export_cache.get(export_cache.key('summary', 1)), 'export')
+    
+    def test_component_save_invalidates_portfolio_scope(self):
+        scope = ('portfolio', self.portfolio.pk)
+        other_scope = ('portfolio', self.portfolio.pk + 1)
+        portfolio_cache.set(portfolio_cache.key('summary', scope=scope), 'cached')
+        export_cache.set(export_cache.key('summary', scope=scope), 'cached')
+        portfolio_cache.set(portfolio_cache.key('summary', scope=other_scope), 'other')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            PortfolioComponent.objects.create(portfolio=self.portfolio, component_type='about')
+        
+        self.assertIsNone(portfolio_cache.get(portfolio_cache.key('summary', scope=scope)))
+        self.assertIsNone(export_cache.get(export_cache.key('summary', scope=scope)))
+        self.assertEqual(portfolio_cache.get(portfolio_cache.key('summary', scope=other_scope)), 'other')
+    
+    def test_portfolio_delete_invalidates_user_scope(self):
+        scope = ('user', self.user.pk)
+        portfolio_cache.set(portfolio_cache.key('portfolio_count', scope=scope), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio.delete()
+        self.assertIsNone(portfolio_cache.get(portfolio_cache.key('portfolio_count', scope=scope)))
+    
+    def test_clear_namespace(self):
+        namespace = CacheNamespace('scratch', timeout=60)
+        namespace.set(namespace.key('a'), 1)
+        portfolio_cache.set(portfolio_cache.key('a'), 1)
+        namespace.clear()
+        self.assertIsNone(namespace.get(namespace.key('a')))
+        self.assertEqual(portfolio_cache.get(portfolio_cache.key('a')), 1)
+    
+    def test_evicted_generation_does_not_revive_old_keys(self):
+        key = portfolio_cache.key('a')
+        portfolio_cache.set(key, 'stale')
+        portfolio_cache.clear()
+        cache.delete('generation:namespace:portfolios')
+        self.assertNotEqual(portfolio_cache.key('a'), key)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.payload = {'components': [{'type': 'project', 'title': f'Project {i}'} for i in range(100)]}
+    
+    def process(self, response, accept_encoding='gzip, deflate, br'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+    
+    def test_negotiate_encoding(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'br')
+        self.assertEqual(negotiate_encoding('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(negotiate_encoding('br;q=0, *'), 'gzip')
+        self.assertEqual(negotiate_encoding('identity'), None)
+        self.assertEqual(negotiate_encoding(''), None)
+    
+    def test_compresses_large_json(self):
+        original = JsonResponse(self.payload).content
+        response = self.process(JsonResponse(self.payload), 'br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(brotli.decompress(response.content), original)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        
+        response = self.process(JsonResponse(self.payload), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), original)
+    
+    def test_leaves_small_and_binary_responses(self):
+        response = self.process(JsonResponse({'ok': True}))
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('Vary', response)
+        response = self.process(HttpResponse(b'\0' * 4096, content_type='application/zip'))
+        self.assertNotIn('Content-Encoding', response)
+    
+    def test_uncompressed_client_gets_vary(self):
+        response = self.process(JsonResponse(self.payload), 'identity')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+    
+    def test_weakens_strong_etag(self):
+        response = JsonResponse(self.payload)
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.process(response)['ETag'], 'W/"abc"')
+    
+    def test_streaming_response(self):
+        chunks = [b'line of csv,data\n' * 100] * 5
+        response = self.process(StreamingHttpResponse(iter(chunks), content_type='text/csv'), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+    
+    def test_gzip_length_is_padded(self):
+        lengths = {len(self.process(JsonResponse(self.payload), 'gzip').content) for _ in range(20)}
+        self.assertGreater(len(lengths), 1)
+        chunks = [b'line of csv,data\n' * 100] * 5
+        lengths = set()
+        for _ in range(20):
+            response = self.process(StreamingHttpResponse(iter(chunks), content_type='text/csv'), 'gzip')
+            content = b''.join(response.streaming_content)
+            self.assertEqual(gzip.decompress(content), b''.join(chunks))
+            lengths.add(len(content))
+        self.assertGreater(len(lengths), 1)
+    
+    def test_responses_setting_cookies_are_not_brotli_compressed(self):
+        response = JsonResponse(self.payload)
+        response.set_cookie('csrftoken', 'secret')
+        response = self.process(response, 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), JsonResponse(self.payload).content)
+        
+        # A brotli-only client gets it uncompressed
+        response = JsonResponse(self.payload)
+        response.set_cookie('csrftoken', 'secret')
+        self.assertNotIn('Content-Encoding', self.process(response, 'br'))
+    
+    def test_write_precompressed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.html')
+            with open(path, 'w') as f:
+                f.write('<p>Portfolio</p>' * 500)
+            written = write_precompressed(path)
+            self.assertEqual(set(written), {'br', 'gzip'})
+            with open(path + '.br', 'rb') as f:
+                self.assertEqual(brotli.decompress(f.read()).decode(), '<p>Portfolio</p>' * 500)
+            self.assertEqual(os.path.getmtime(path + '.gz'), os.path.getmtime(path))
+            
+            # Below the threshold the stale variants are removed
+            with open(path, 'w') as f:
+                f.write('<p>Portfolio</p>')
+            self.assertEqual(write_precompressed(path), {})
+            self.assertFalse(os.path.exists(path + '.br'))
@@ -0,0 +1,131 @@
+"""
+Serving export files.
+
+Every completed export stores the SHA-256 of its file, used as a strong
+ETag so clients can revalidate (``If-None-Match``) and resume
+(``Range`` + ``If-Range``) downloads.
+
+With ``EXPORT_DOWNLOAD_OFFLOAD`` set, Django only authorizes the download
+and answers conditional requests; the body is sent by the front server:
+
+- ``x-accel-redirect`` (nginx): ``X-Accel-Redirect`` points at the
+  ``internal`` location ``EXPORT_ACCEL_REDIRECT_LOCATION`` that maps to
+  ``MEDIA_ROOT/exports``
+- ``x-sendfile`` (Apache mod_xsendfile, lighttpd): ``X-Sendfile`` carries
+  the absolute file path
+
+Otherwise the file is streamed by Django, honouring single byte ranges.
+"""
+import hashlib
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single ``bytes=`` range, ``None`` when the
+    header is absent, malformed or asks for several ranges (the whole file
+    is sent then), or ``False`` when it cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def iter_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _offload_response(path):
+    mode = settings.EXPORT_DOWNLOAD_OFFLOAD
+    if mode == 'x-accel-redirect':
+        export_dir = os.path.join(settings.MEDIA_ROOT, 'exports')
+        relative = os.path.relpath(path, export_dir)
+        if relative.startswith(os.pardir):
+            return None
+        response = HttpResponse()
+        location = settings.EXPORT_ACCEL_REDIRECT_LOCATION.rstrip('/')
+        response['X-Accel-Redirect'] = f'{location}/{quote(relative)}'
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = os.path.abspath(path)
+        return response
+    return None
+
+
+def serve_file(request, path, content_type, filename, digest=''):
+    """
+    Response for downloading ``path``: 304/412 for conditional requests,
+    an offload header when configured, else the file or the requested range
+    """
+    etag = f'"{digest}"' if digest else None
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = _offload_response(path)
+    if response is None:
+        size = os.path.getsize(path)
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        if_range = request.META.get('HTTP_IF_RANGE')
+        # Resume only if the file is still the one the client has part of
+        if if_range is not None and (etag is None or if_range.strip() != etag):
+            byte_range = None
+        
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif byte_range is None:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(iter_range(path, start, end), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+    
+    if response.status_code in (200, 206):
+        response['Content-Type'] = content_type
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    if etag:
+        response['ETag'] = etag
+    # Private to the owner, and revalidated before reuse
+    response['Cache-Control'] = 'private, no-cache'
+    return response
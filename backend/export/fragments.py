@@ -0,0 +1,94 @@
+"""
+Incremental export rendering.
+
+Every component is rendered to its own HTML fragment and cached under a key
+built from the component id, its ``updated_at``, the output kind (html/pdf),
+the portfolio template type and a hash of the portfolio-level values the
+fragment reads (title, photos, settings). A page is then assembled from the
+cached fragments, so an export after a small edit only re-renders the
+components that changed.
+"""
+import hashlib
+import json
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from core.cache import export_cache
+
+FRAGMENT_TEMPLATES = {
+    'html': 'export/components/html_component.html',
+    'pdf': 'export/components/pdf_component.html',
+}
+
+PAGE_TEMPLATES = {
+    'html': 'export/portfolio_html.html',
+    'pdf': 'export/portfolio_pdf.html',
+}
+
+FRAGMENT_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def get_settings_hash(portfolio_data, kind, export_date, request):
+    """Hash of everything outside the component itself that a fragment depends on"""
+    values = {
+        'title': portfolio_data.get('title'),
+        'profile_photo_url': portfolio_data.get('profile_photo_url'),
+        'user_profile_photo_url': portfolio_data.get('user_profile_photo_url'),
+        'custom_settings': portfolio_data.get('custom_settings'),
+        'settings': portfolio_data.get('settings'),
+        'host': request.get_host() if request else None,
+    }
+    if kind == 'pdf':
+        # The PDF footer prints the export date
+        values['export_date'] = export_date.date().isoformat()
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def get_fragment_digest(component, kind, template_type, settings_hash):
+    raw = f"{component.get('id')}:{component.get('updated_at')}:{kind}:{template_type}:{settings_hash}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def render_component_fragments(context, kind, request):
+    """
+    Return the rendered HTML of each visible component, in order, reusing cached fragments
+    """
+    from .views import embed_images
+    
+    portfolio_data = context['portfolio']
+    components = context['components']
+    settings_hash = get_settings_hash(portfolio_data, kind, context['export_date'], request)
+    keys = export_cache.keys([
+        ('fragment', get_fragment_digest(component, kind, portfolio_data.get('template_type'), settings_hash))
+        for component in components
+    ])
+    
+    cached = export_cache.get_many(keys)
+    fragments = []
+    missing = {}
+    for key, component in zip(keys, components):
+        if key not in cached:
+            # Only components that changed pay for image embedding and rendering
+            embed_images(component, request)
+            cached[key] = render_to_string(FRAGMENT_TEMPLATES[kind], {
+                'component': component,
+                'portfolio': portfolio_data,
+                'export_date': context['export_date'],
+            })
+            missing[key] = cached[key]
+        fragments.append(mark_safe(cached[key]))
+    
+    if missing:
+        export_cache.set_many(missing, FRAGMENT_TIMEOUT)
+    return fragments
+
+
+def render_portfolio(portfolio, request, kind):
+    """
+    Render the full export page (``kind`` is 'html' or 'pdf') from component fragments
+    """
+    from .views import get_portfolio_context
+    
+    context = get_portfolio_context(portfolio, request, embed_component_images=False)
+    context['component_fragments'] = render_component_fragments(context, kind, request)
+    return render_to_string(PAGE_TEMPLATES[kind], context, request=request)
@@ -0,0 +1,89 @@
+"""
+Starting export jobs: in-flight deduplication and per-user concurrency.
+
+An export is identified by its portfolio, type and a hash of the
+portfolio's content (the portfolio, component and settings versions). A
+request for an export that is already processing gets the existing job
+instead of rendering the same file again, e.g. after a double click or a
+client retry. A partial unique constraint on processing jobs settles
+concurrent identical requests.
+
+Each user may have at most ``EXPORT_MAX_CONCURRENT_PER_USER`` different
+exports processing at once, so one user cannot occupy every worker.
+Jobs processing for longer than ``EXPORT_PROCESSING_TIMEOUT`` seconds were
+left behind by a crashed worker and are marked failed.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+from .models import ExportJob
+
+
+def get_content_hash(portfolio):
+    """Changes whenever anything rendered into an export changes"""
+    try:
+        settings_updated_at = portfolio.settings.updated_at
+    except ObjectDoesNotExist:
+        settings_updated_at = None
+    values = {
+        'portfolio': [portfolio.pk, portfolio.version, portfolio.updated_at],
+        'components': [[component.pk, component.version] for component in portfolio.components.all()],
+        'settings': settings_updated_at,
+    }
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def start_export_job(user, portfolio, export_type):
+    """
+    Return ``(job, created)``. ``created`` is False when an identical export
+    is already processing and ``job`` is that export.
+    
+    Raises ``Throttled`` when the user has too many exports processing.
+    """
+    content_hash = get_content_hash(portfolio)
+    stale_before = timezone.now() - timedelta(seconds=settings.EXPORT_PROCESSING_TIMEOUT)
+    
+    in_flight = []
+    stale = []
+    for job in ExportJob.objects.filter(user=user, status='processing'):
+        (stale if job.created_at < stale_before else in_flight).append(job)
+    if stale:
+        ExportJob.objects.filter(pk__in=[job.pk for job in stale], status='processing').update(
+            status='failed', error_message='Export timed out'
+        )
+    
+    for job in in_flight:
+        if (job.portfolio_id, job.export_type, job.content_hash) == (portfolio.pk, export_type, content_hash):
+            return job, False
+    
+    if len(in_flight) >= settings.EXPORT_MAX_CONCURRENT_PER_USER:
+        raise Throttled(detail=(
+            f'You already have {len(in_flight)} exports in progress. '
+            'Please wait for one to finish.'
+        ))
+    
+    try:
+        with transaction.atomic():
+            job = ExportJob.objects.create(
+                user=user,
+                portfolio=portfolio,
+                export_type=export_type,
+                content_hash=content_hash,
+                status='processing'
+            )
+        return job, True
+    except IntegrityError:
+        # An identical request created its job first
+        job = ExportJob.objects.filter(
+            portfolio=portfolio, export_type=export_type, content_hash=content_hash, status='processing'
+        ).first()
+        if job is None:
+            # ...and has finished already; start again
+            return start_export_job(user, portfolio, export_type)
+        return job, False
@@ -0,0 +1,33 @@
+"""
+Apply the export retention rules (see export.retention).
+
+Run it periodically, e.g. hourly from cron:
+
+    0 * * * * cd /srv/portfolioai/backend && python manage.py expire_exports
+
+``--dry-run`` reports what would be removed without changing anything.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from export.retention import MB, collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Expire old export files and delete stale export jobs'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report only, delete nothing')
+        parser.add_argument('--batch-size', type=int, default=500, help='Jobs updated or deleted per query')
+    
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        report = collect_garbage(dry_run=options['dry_run'], batch_size=options['batch_size'])
+        
+        verb = 'Would expire' if options['dry_run'] else 'Expired'
+        expired = sum(report.expired.values())
+        reasons = ', '.join(f'{count} by {reason}' for reason, count in report.expired.items() if count)
+        self.stdout.write(f"{verb} {expired} exports{f' ({reasons})' if reasons else ''}, {report.freed_bytes / MB:.1f} MB")
+        self.stdout.write(f'Orphaned files: {report.orphans}, {report.orphan_bytes / MB:.1f} MB')
+        self.stdout.write(f'Stale job rows: {report.rows_deleted}')
+        self.stdout.write(self.style.SUCCESS(f'Kept {report.kept} exports, {report.kept_bytes / MB:.1f} MB'))
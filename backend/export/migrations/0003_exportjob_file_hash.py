@@ -0,0 +1,40 @@
+# Generated by Django 5.0.3 on 2026-10-19 07:56
+
+import hashlib
+import os
+from django.db import migrations, models
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_existing_exports(apps, schema_editor):
+    ExportJob = apps.get_model('export', 'ExportJob')
+    jobs = [
+        job for job in ExportJob.objects.filter(status='completed').exclude(file_path='').only('id', 'file_path')
+        if os.path.exists(job.file_path)
+    ]
+    for job in jobs:
+        job.file_hash = file_digest(job.file_path)
+    ExportJob.objects.bulk_update(jobs, ['file_hash'], batch_size=200)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('export', '0002_add_pdf_export_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='file_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the exported file, served as its ETag', max_length=64),
+        ),
+        migrations.RunPython(hash_existing_exports, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.3 on 2026-10-19 07:59
+
+import os
+from django.db import migrations, models
+
+
+def size_existing_exports(apps, schema_editor):
+    ExportJob = apps.get_model('export', 'ExportJob')
+    jobs = [
+        job for job in ExportJob.objects.filter(status='completed').exclude(file_path='').only('id', 'file_path')
+        if os.path.exists(job.file_path)
+    ]
+    for job in jobs:
+        job.file_size = os.path.getsize(job.file_path)
+    ExportJob.objects.bulk_update(jobs, ['file_size'], batch_size=200)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('export', '0003_exportjob_file_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='file_size',
+            field=models.PositiveBigIntegerField(default=0, help_text='Bytes, counted against the retention quotas'),
+        ),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('expired', 'Expired')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='exportjob',
+            index=models.Index(fields=['status', '-completed_at'], name='export_expo_status_c53083_idx'),
+        ),
+        migrations.RunPython(size_existing_exports, migrations.RunPython.noop),
+    ]
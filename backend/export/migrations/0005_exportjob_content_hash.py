@@ -0,0 +1,22 @@
+# Generated by Django 5.0.3 on 2026-10-19 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('export', '0004_exportjob_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='Hash of the exported portfolio content', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='exportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'processing'), models.Q(('content_hash', ''), _negated=True)), fields=('portfolio', 'export_type', 'content_hash'), name='unique_processing_export'),
+        ),
+    ]
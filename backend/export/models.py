@@ -12,6 +12,7 @@ class ExportJob(models.Model):
         ('processing', 'Processing'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
+        ('expired', 'Expired'),
     ]
     
     EXPORT_TYPE_CHOICES = [
@@ -30,12 +31,27 @@ class ExportJob(models.Model):
     export_type = models.CharField(max_length=20, choices=EXPORT_TYPE_CHOICES, default='html')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     file_path = models.CharField(max_length=500, blank=True, help_text="Path to exported file")
+    file_hash = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the exported file, served as its ETag")
+    file_size = models.PositiveBigIntegerField(default=0, help_text="Bytes, counted against the retention quotas")
+    content_hash = models.CharField(max_length=64, blank=True, help_text="Hash of the exported portfolio content")
     error_message = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Retention scans completed jobs newest first
+            models.Index(fields=['status', '-completed_at']),
+        ]
+        constraints = [
+            # At most one export of the same content renders at a time (see export.jobs)
+            models.UniqueConstraint(
+                fields=['portfolio', 'export_type', 'content_hash'],
+                condition=models.Q(status='processing') & ~models.Q(content_hash=''),
+                name='unique_processing_export',
+            ),
+        ]
     
     def __str__(self):
         return f"Export {self.export_type} for {self.portfolio.title} - {self.status}"
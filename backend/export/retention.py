@@ -0,0 +1,140 @@
+"""
+Retention of export artifacts.
+
+Export files in ``MEDIA_ROOT/exports`` are expired, oldest first, when they
+are older than ``EXPORT_MAX_AGE_DAYS``, when a user's exports exceed
+``EXPORT_USER_QUOTA_MB`` (a user's newest export is always kept) or when
+all exports together exceed ``EXPORT_DISK_BUDGET_MB``. Expired jobs keep
+their row with status ``expired`` and the file is deleted. Expired and
+failed rows are deleted after ``EXPORT_JOB_RETENTION_DAYS``.
+
+Sizes come from ``ExportJob.file_size``, so a run reads the export
+directory once, to remove orphaned files (files without a completed
+job). Jobs are expired and deleted in batches of ``batch_size``.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .models import ExportJob
+
+MB = 1024 * 1024
+
+# Files younger than this are never treated as orphans: an export writes
+# its file before its job is marked completed
+ORPHAN_GRACE = timedelta(hours=1)
+
+
+@dataclass
+class RetentionReport:
+    expired: dict = field(default_factory=lambda: {'age': 0, 'quota': 0, 'budget': 0})
+    freed_bytes: int = 0
+    orphans: int = 0
+    orphan_bytes: int = 0
+    rows_deleted: int = 0
+    kept: int = 0
+    kept_bytes: int = 0
+
+
+def get_export_dir():
+    return os.path.join(settings.MEDIA_ROOT, 'exports')
+
+
+def delete_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def plan_expiry(jobs, now):
+    """
+    Split completed jobs, given newest first as (id, user_id, size,
+    completed_at, file_path) tuples, into {job: reason} to expire and the
+    list of kept jobs
+    """
+    oldest = now - timedelta(days=settings.EXPORT_MAX_AGE_DAYS)
+    user_quota = settings.EXPORT_USER_QUOTA_MB * MB
+    disk_budget = settings.EXPORT_DISK_BUDGET_MB * MB
+    
+    expire, kept = {}, []
+    user_bytes = {}
+    total_bytes = 0
+    for job in jobs:
+        _, user_id, size, completed_at, _ = job
+        used = user_bytes.get(user_id)
+        if completed_at is None or completed_at < oldest:
+            expire[job] = 'age'
+        elif used is not None and used + size > user_quota:
+            expire[job] = 'quota'
+        elif total_bytes + size > disk_budget:
+            expire[job] = 'budget'
+        else:
+            user_bytes[user_id] = (used or 0) + size
+            total_bytes += size
+            kept.append(job)
+    return expire, kept
+
+
+def collect_garbage(dry_run=False, batch_size=500, now=None):
+    """Apply the retention rules and return a RetentionReport"""
+    now = now or timezone.now()
+    report = RetentionReport()
+    
+    jobs = ExportJob.objects.filter(status='completed').order_by('-completed_at', '-id').values_list(
+        'id', 'user_id', 'file_size', 'completed_at', 'file_path'
+    )
+    expire, kept = plan_expiry(jobs, now)
+    for (_, _, size, _, _), reason in expire.items():
+        report.expired[reason] += 1
+        report.freed_bytes += size
+    report.kept = len(kept)
+    report.kept_bytes = sum(size for _, _, size, _, _ in kept)
+    
+    expired = list(expire)
+    if not dry_run:
+        for start in range(0, len(expired), batch_size):
+            batch = expired[start:start + batch_size]
+            # Mark first: a file left behind by a crash is removed as an orphan next run
+            ExportJob.objects.filter(pk__in=[job[0] for job in batch], status='completed').update(
+                status='expired', file_path=''
+            )
+            for *_, path in batch:
+                if path:
+                    delete_file(path)
+    
+    # Expired files are already gone (or counted above in a dry run)
+    known = {os.path.abspath(path) for *_, path in kept + expired if path}
+    collect_orphans(known, report, dry_run, now)
+    
+    cutoff = now - timedelta(days=settings.EXPORT_JOB_RETENTION_DAYS)
+    stale = ExportJob.objects.filter(status__in=('expired', 'failed'), created_at__lt=cutoff)
+    if dry_run:
+        report.rows_deleted = stale.count()
+    else:
+        while True:
+            batch = list(stale.values_list('id', flat=True)[:batch_size])
+            if not batch:
+                break
+            report.rows_deleted += ExportJob.objects.filter(pk__in=batch).delete()[0]
+    return report
+
+
+def collect_orphans(known, report, dry_run, now):
+    """Remove files in the export directory that no completed job points to"""
+    export_dir = get_export_dir()
+    if not os.path.isdir(export_dir):
+        return
+    grace = (now - ORPHAN_GRACE).timestamp()
+    with os.scandir(export_dir) as entries:
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False) or os.path.abspath(entry.path) in known:
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > grace:
+                continue
+            report.orphans += 1
+            report.orphan_bytes += stat.st_size
+            if not dry_run:
+                delete_file(entry.path)
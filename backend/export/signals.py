@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from portfolios.models import Portfolio, PortfolioComponent, PortfolioSettings
+from .models import ExportJob
+from .retention import delete_file
+from .static_site import remove_static_site, schedule_static_site_sync
+
+
+@receiver(post_save, sender=Portfolio)
+def portfolio_saved(sender, instance, **kwargs):
+    """Rebuild (or remove) the static site when a portfolio is published, unpublished or edited"""
+    schedule_static_site_sync(instance.pk)
+
+
+@receiver(post_save, sender=PortfolioComponent)
+@receiver(post_delete, sender=PortfolioComponent)
+@receiver(post_save, sender=PortfolioSettings)
+def portfolio_part_changed(sender, instance, **kwargs):
+    schedule_static_site_sync(instance.portfolio_id)
+
+
+@receiver(post_delete, sender=Portfolio)
+def portfolio_deleted(sender, instance, **kwargs):
+    """Remove the static site once the delete commits (a rollback keeps it)"""
+    if settings.STATIC_SITES_ENABLED:
+        slug = instance.slug
+        transaction.on_commit(lambda: remove_static_site(slug))
+
+
+@receiver(post_delete, sender=ExportJob)
+def export_job_deleted(sender, instance, **kwargs):
+    """Delete the file with its job (also when the portfolio or user is deleted)"""
+    if instance.file_path:
+        transaction.on_commit(lambda: delete_file(instance.file_path))
@@ -0,0 +1,176 @@
+"""
+Static pre-generation of published portfolios.
+
+Each build renders ``export/portfolio_html.html`` into a new release
+directory and atomically repoints the ``current`` symlink at it, so the
+front server can serve published portfolios without reaching Django::
+
+    STATIC_SITES_ROOT/<slug>/releases/<version>-<timestamp>/index.html
+    STATIC_SITES_ROOT/<slug>/current -> releases/<version>-<timestamp>
+
+``index.html`` is written with precompressed ``index.html.br``/``.gz``
+siblings for the front server's ``brotli_static``/``gzip_static``.
+
+Builds run after the saving transaction commits, on a single background
+worker thread (``STATIC_SITES_BUILD_IN_BACKGROUND``), so a request does not
+wait for the render. A portfolio already waiting for a build is not queued
+again.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+from core.compression import write_precompressed
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_queued = set()
+_queued_lock = threading.Lock()
+# Portfolio ids changed in this thread's current transaction
+_scheduled = threading.local()
+
+
+def get_site_dir(slug):
+    return os.path.join(settings.STATIC_SITES_ROOT, slug)
+
+
+def build_static_site(portfolio):
+    """
+    Render a published portfolio into a new release and switch ``current`` to it.
+    
+    Returns the path of the new release directory.
+    """
+    from .fragments import render_portfolio
+    
+    html_content = render_portfolio(portfolio, None, 'html')
+    
+    site_dir = get_site_dir(portfolio.slug)
+    releases_dir = os.path.join(site_dir, 'releases')
+    os.makedirs(releases_dir, exist_ok=True)
+    
+    release_name = f"{portfolio.version}-{timezone.now().strftime('%Y%m%d%H%M%S%f')}"
+    # Write into a temporary directory first so a half-written release is never visible
+    tmp_dir = tempfile.mkdtemp(prefix='.build-', dir=releases_dir)
+    index_path = os.path.join(tmp_dir, 'index.html')
+    with open(index_path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    write_precompressed(index_path)
+    os.chmod(tmp_dir, 0o755)
+    release_dir = os.path.join(releases_dir, release_name)
+    os.replace(tmp_dir, release_dir)
+    
+    _switch_current(site_dir, os.path.join('releases', release_name))
+    _prune_releases(releases_dir, keep=release_name)
+    
+    logger.info(f"Static site for portfolio {portfolio.id} built at {release_dir}")
+    return release_dir
+
+
+def remove_static_site(slug):
+    """Remove every release of a portfolio so the front server stops serving it"""
+    shutil.rmtree(get_site_dir(slug), ignore_errors=True)
+
+
+def _switch_current(site_dir, target):
+    current = os.path.join(site_dir, 'current')
+    tmp_link = os.path.join(site_dir, f'.current-{os.getpid()}')
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(target, tmp_link)
+    # rename(2) over the old link is atomic: readers see either release, never neither
+    os.replace(tmp_link, current)
+
+
+def _prune_releases(releases_dir, keep):
+    releases = sorted(
+        (name for name in os.listdir(releases_dir) if not name.startswith('.')),
+        key=lambda name: os.path.getmtime(os.path.join(releases_dir, name)),
+        reverse=True
+    )
+    for name in releases[settings.STATIC_SITES_KEEP_RELEASES:]:
+        if name != keep:
+            shutil.rmtree(os.path.join(releases_dir, name), ignore_errors=True)
+
+
+def sync_static_site(portfolio_id):
+    """
+    Build the static site for a published portfolio, or remove it otherwise
+    """
+    from portfolios.models import Portfolio
+    from portfolios.serializers import PortfolioSerializer
+    
+    portfolio = PortfolioSerializer.setup_eager_loading(
+        Portfolio.objects.all()
+    ).filter(pk=portfolio_id).first()
+    if portfolio is None:
+        return
+    
+    try:
+        if portfolio.is_published:
+            build_static_site(portfolio)
+        else:
+            remove_static_site(portfolio.slug)
+    except Exception as e:
+        # The dynamic public view keeps working; log and carry on
+        logger.error(f"Static site sync failed for portfolio {portfolio_id}: {str(e)}", exc_info=True)
+
+
+def _run_static_site_sync(portfolio_id):
+    with _queued_lock:
+        # Changes committed from now on need another build
+        _queued.discard(portfolio_id)
+    try:
+        sync_static_site(portfolio_id)
+    finally:
+        # Worker threads get their own connection; don't leave it open between builds
+        default_connection.close()
+
+
+def enqueue_static_site_sync(portfolio_id):
+    """Sync a portfolio's static site now, or on the background worker"""
+    global _executor
+    
+    if not settings.STATIC_SITES_BUILD_IN_BACKGROUND:
+        sync_static_site(portfolio_id)
+        return
+    
+    with _queued_lock:
+        if portfolio_id in _queued:
+            return
+        _queued.add(portfolio_id)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='static-site')
+    _executor.submit(_run_static_site_sync, portfolio_id)
+
+
+def _flush_scheduled():
+    portfolio_ids = getattr(_scheduled, 'portfolio_ids', set())
+    _scheduled.portfolio_ids = set()
+    for portfolio_id in sorted(portfolio_ids):
+        enqueue_static_site_sync(portfolio_id)
+
+
+def schedule_static_site_sync(portfolio_id):
+    """
+    Rebuild a portfolio's static site once the current transaction commits.
+    
+    Several changes to the same portfolio inside one transaction (e.g. a
+    bulk component save) trigger a single rebuild.
+    """
+    if not settings.STATIC_SITES_ENABLED:
+        return
+    
+    # Ids wait in a per-thread set; every change registers a flush, the
+    # first one to run after the commit takes the whole set and the rest
+    # find it empty. Ids left by a rolled back transaction are built with
+    # the next commit, which is harmless.
+    if not hasattr(_scheduled, 'portfolio_ids'):
+        _scheduled.portfolio_ids = set()
+    _scheduled.portfolio_ids.add(portfolio_id)
+    transaction.on_commit(_flush_scheduled)
@@ -1,3 +1,398 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.template import engines
+from django.template.loader import get_template
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.testing import QueryBudgetTestCase
+from portfolios.models import Portfolio, PortfolioComponent, PortfolioSettings
+from .downloads import file_digest
+from .fragments import FRAGMENT_TEMPLATES, PAGE_TEMPLATES, render_portfolio
+from .jobs import start_export_job
+from .models import ExportJob
+from .retention import MB, collect_garbage
+from .views import get_portfolio_context
+from . import static_site
 
-# Create your tests here.
+
+class ExportQueryCountTests(TestCase):
+    """
+    HTML export must issue a fixed number of queries, however many
+    components a portfolio has
+    """
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def create_portfolio(self, component_count):
+        portfolio = Portfolio.objects.create(user=self.user, title=f'Portfolio {component_count}')
+        PortfolioSettings.objects.create(portfolio=portfolio)
+        PortfolioComponent.objects.bulk_create([
+            PortfolioComponent(
+                portfolio=portfolio,
+                component_type='custom',
+                order=order,
+                content={'title': f'Section {order}'}
+            )
+            for order in range(component_count)
+        ])
+        return portfolio
+    
+    def test_export_html(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            for component_count in (1, 15):
+                portfolio = self.create_portfolio(component_count)
+                # portfolio + components, in-flight jobs, job insert (in a
+                # savepoint, which the test transaction makes a query) and update
+                with self.assertNumQueries(7):
+                    response = self.client.post(f'/api/v1/export/html/{portfolio.id}/')
+                self.assertEqual(response.status_code, 200)
+                job = ExportJob.objects.get(pk=response.data['job_id'])
+                self.assertEqual(job.file_hash, file_digest(job.file_path))
+
+
+class FragmentRenderTests(TestCase):
+    """
+    Pages assembled from cached fragments must be byte-identical to the
+    single-pass render of the whole page
+    """
+    
+    COMPONENT_TYPES = [
+        'hero_banner', 'about_me_card', 'skills_cloud', 'project_grid', 'blog_preview_grid', 'contact_form',
+        'experience_timeline', 'services_section', 'achievements_counters', 'testimonials_carousel', 'footer',
+    ]
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.portfolio = Portfolio.objects.create(user=self.user, title='Jane & <Co>')
+        content = {
+            'title': 'Title', 'subtitle': 'Sub', 'bio': 'Bio <i>x</i>', 'skills': ['Python', 'Django'],
+            'projects': [{'title': 'P', 'description': 'D', 'technologies': ['x'], 'url': 'https://example.com'}],
+            'posts': [{'title': 'Post', 'excerpt': 'E'}], 'email': 'jane@example.com',
+            'experiences': [{'job_title': 'Dev', 'company': 'Acme'}], 'services': [{'title': 'S', 'description': 'D'}],
+            'achievements': [{'value': '10', 'label': 'L'}], 'testimonials': [{'content': 'Great', 'author': 'A', 'rating': 4}],
+            'links': [{'url': 'https://example.com', 'label': 'Site'}],
+        }
+        for order, component_type in enumerate(self.COMPONENT_TYPES):
+            PortfolioComponent.objects.create(
+                portfolio=self.portfolio, component_type=component_type, order=order, content=content
+            )
+    
+    def render_single_pass(self, kind):
+        """The page with the component template inlined in its loop, rendered at once"""
+        page = get_template(PAGE_TEMPLATES[kind]).template.source
+        component = get_template(FRAGMENT_TEMPLATES[kind]).template.source
+        loop = '{% for fragment in component_fragments %}{{ fragment }}{% endfor %}'
+        self.assertIn(loop, page)
+        source = page.replace(loop, '{% for component in components %}' + component + '{% endfor %}')
+        return engines['django'].from_string(source).render(get_portfolio_context(self.portfolio, None))
+    
+    def test_fragments_match_single_pass_render(self):
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now()):
+            for kind in ('html', 'pdf'):
+                expected = self.render_single_pass(kind)
+                self.assertIn('Acme', expected)
+                # Cold cache, then every fragment from the cache
+                self.assertEqual(render_portfolio(self.portfolio, None, kind), expected)
+                self.assertEqual(render_portfolio(self.portfolio, None, kind), expected)
+
+
+class DownloadExportTests(QueryBudgetTestCase):
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = self.api_client(self.user)
+        portfolio = Portfolio.objects.create(user=self.user, title='My Work')
+        
+        export_dir = os.path.join(self.media_root, 'exports')
+        os.makedirs(export_dir)
+        path = os.path.join(export_dir, 'portfolio_1_1.zip')
+        self.content = bytes(range(256)) * 40
+        with open(path, 'wb') as f:
+            f.write(self.content)
+        self.job = ExportJob.objects.create(
+            user=self.user,
+            portfolio=portfolio,
+            status='completed',
+            file_path=path,
+            file_hash=file_digest(path)
+        )
+        self.url = f'/api/v1/export/jobs/{self.job.pk}/download/'
+        self.etag = f'"{self.job.file_hash}"'
+    
+    def test_full_download(self):
+        response = self.client.get(self.url)
+        self.assertWithinBudget(response)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="My_Work_portfolio.zip"')
+    
+    def test_not_modified(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertWithinBudget(response, 304)
+    
+    def test_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertWithinBudget(response, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+        
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10', HTTP_IF_RANGE=self.etag)
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+        
+        # A changed file is sent whole
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+    
+    def test_offload(self):
+        with override_settings(MEDIA_ROOT=self.media_root, EXPORT_DOWNLOAD_OFFLOAD='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/exports/portfolio_1_1.zip')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        
+        with override_settings(EXPORT_DOWNLOAD_OFFLOAD='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.job.file_path)
+    
+    def test_other_user(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        response = self.api_client(other).get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(EXPORT_MAX_AGE_DAYS=7, EXPORT_USER_QUOTA_MB=1, EXPORT_DISK_BUDGET_MB=2, EXPORT_JOB_RETENTION_DAYS=90)
+class ExportRetentionTests(TestCase):
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.export_dir = os.path.join(self.media_root, 'exports')
+        os.makedirs(self.export_dir)
+        self.now = timezone.now()
+        self.users = [User.objects.create_user(f'user{i}', f'user{i}@example.com', 'password') for i in range(3)]
+        self.portfolios = [Portfolio.objects.create(user=user, title='Portfolio') for user in self.users]
+    
+    def create_job(self, user_index, hours_ago, size_mb=0.1):
+        job = ExportJob.objects.create(
+            user=self.users[user_index],
+            portfolio=self.portfolios[user_index],
+            status='completed',
+            completed_at=self.now - timedelta(hours=hours_ago),
+            file_size=int(size_mb * MB)
+        )
+        job.file_path = os.path.join(self.export_dir, f'portfolio_{job.portfolio_id}_{job.pk}.zip')
+        with open(job.file_path, 'wb') as f:
+            f.write(b'zip')
+        job.save()
+        return job
+    
+    def create_orphan(self, name, hours_ago):
+        path = os.path.join(self.export_dir, name)
+        with open(path, 'wb') as f:
+            f.write(b'zip')
+        mtime = (self.now - timedelta(hours=hours_ago)).timestamp()
+        os.utime(path, (mtime, mtime))
+        return path
+    
+    def create_jobs(self):
+        self.kept = [self.create_job(0, 1, 0.6), self.create_job(1, 2, 0.9)]
+        self.expired = {
+            'age': self.create_job(0, 24 * 8),
+            'quota': self.create_job(0, 3, 0.6),
+            'budget': self.create_job(2, 4, 0.6),
+        }
+        self.old_orphan = self.create_orphan('portfolio_0_0.zip', 2)
+        self.new_orphan = self.create_orphan('portfolio_0_1.zip.tmp', 0)
+        self.stale = ExportJob.objects.create(user=self.users[0], portfolio=self.portfolios[0], status='failed')
+        ExportJob.objects.filter(pk=self.stale.pk).update(created_at=self.now - timedelta(days=91))
+    
+    def test_collect_garbage(self):
+        self.create_jobs()
+        report = collect_garbage(batch_size=2, now=self.now)
+        self.assertEqual(report.expired, {'age': 1, 'quota': 1, 'budget': 1})
+        self.assertEqual((report.orphans, report.rows_deleted, report.kept), (1, 1, 2))
+        
+        for job in self.expired.values():
+            self.assertFalse(os.path.exists(job.file_path))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.file_path), ('expired', ''))
+        for job in self.kept:
+            self.assertTrue(os.path.exists(job.file_path))
+        self.assertFalse(os.path.exists(self.old_orphan))
+        self.assertTrue(os.path.exists(self.new_orphan))
+        self.assertFalse(ExportJob.objects.filter(pk=self.stale.pk).exists())
+        
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        response = client.get(f"/api/v1/export/jobs/{self.expired['age'].pk}/download/")
+        self.assertEqual(response.status_code, 410)
+    
+    def test_dry_run(self):
+        self.create_jobs()
+        report = collect_garbage(dry_run=True, now=self.now)
+        self.assertEqual(report.expired, {'age': 1, 'quota': 1, 'budget': 1})
+        self.assertEqual((report.orphans, report.rows_deleted), (1, 1))
+        self.assertEqual(ExportJob.objects.filter(status='completed').count(), 5)
+        self.assertEqual(len(os.listdir(self.export_dir)), 7)
+    
+    def test_deleting_job_deletes_file(self):
+        job = self.create_job(0, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolios[0].delete()
+        self.assertFalse(os.path.exists(job.file_path))
+
+
+@override_settings(EXPORT_MAX_CONCURRENT_PER_USER=2, EXPORT_PROCESSING_TIMEOUT=600)
+class ExportDeduplicationTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.portfolios = [Portfolio.objects.create(user=self.user, title=f'Portfolio {i}') for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    @override_settings(EXPORT_MAX_CONCURRENT_PER_USER=3)
+    def test_identical_export_attaches(self):
+        job, created = start_export_job(self.user, self.portfolios[0], 'pdf')
+        self.assertTrue(created)
+        response = self.client.post(f'/api/v1/export/pdf/{self.portfolios[0].pk}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['job_id'], job.pk)
+        self.assertEqual(ExportJob.objects.count(), 1)
+        
+        # Another type or changed content is a different export
+        self.assertTrue(start_export_job(self.user, self.portfolios[0], 'html')[1])
+        self.portfolios[0].title = 'Renamed'
+        self.portfolios[0].save()
+        self.assertTrue(start_export_job(self.user, self.portfolios[0], 'pdf')[1])
+    
+    def test_concurrent_identical_insert_is_rejected(self):
+        job, _ = start_export_job(self.user, self.portfolios[0], 'pdf')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ExportJob.objects.create(
+                user=self.user, portfolio=self.portfolios[0], export_type='pdf',
+                content_hash=job.content_hash, status='processing'
+            )
+    
+    def test_per_user_limit(self):
+        start_export_job(self.user, self.portfolios[0], 'pdf')
+        start_export_job(self.user, self.portfolios[1], 'pdf')
+        response = self.client.post(f'/api/v1/export/pdf/{self.portfolios[2].pk}/')
+        self.assertEqual(response.status_code, 429)
+        
+        # Finished and stale jobs do not count
+        ExportJob.objects.filter(portfolio=self.portfolios[0]).update(status='completed')
+        ExportJob.objects.filter(portfolio=self.portfolios[1]).update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertTrue(start_export_job(self.user, self.portfolios[2], 'pdf')[1])
+        self.assertEqual(ExportJob.objects.get(portfolio=self.portfolios[1]).status, 'failed')
+
+
+class StaticSiteSyncTests(TestCase):
+    
+    def setUp(self):
+        self.sites_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sites_root, ignore_errors=True)
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.portfolio = Portfolio.objects.create(user=self.user, title='Site', is_published=True)
+        # Fixtures are saved before the sync is enabled, so they schedule nothing
+        settings_override = self.settings(
+            STATIC_SITES_ENABLED=True, STATIC_SITES_ROOT=self.sites_root, STATIC_SITES_BUILD_IN_BACKGROUND=False
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(vars(static_site._scheduled).clear)
+    
+    def build(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio.save()
+        return os.path.join(self.sites_root, self.portfolio.slug)
+    
+    def test_delete_removes_the_site_on_commit(self):
+        site_dir = self.build()
+        self.assertTrue(os.path.isdir(site_dir))
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Portfolio.objects.filter(pk=self.portfolio.pk).delete()
+            raise RuntimeError
+        self.assertTrue(os.path.isdir(site_dir))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio.delete()
+            self.assertTrue(os.path.isdir(site_dir))
+        self.assertFalse(os.path.exists(site_dir))
+    
+    def test_build_and_remove(self):
+        self.portfolio.title = 'Hello'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio.save()
+        index_path = os.path.join(self.sites_root, self.portfolio.slug, 'current', 'index.html')
+        with open(index_path, encoding='utf-8') as f:
+            self.assertIn('<title>Hello - Portfolio</title>', f.read())
+        self.assertTrue(os.path.exists(index_path + '.gz'))
+        
+        self.portfolio.is_published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio.save()
+        self.assertFalse(os.path.exists(os.path.join(self.sites_root, self.portfolio.slug)))
+    
+    @mock.patch.object(static_site, 'sync_static_site')
+    def test_one_build_per_transaction(self, sync):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.portfolio.save()
+                for order in range(3):
+                    PortfolioComponent.objects.create(portfolio=self.portfolio, component_type='custom', order=order)
+        sync.assert_called_once_with(self.portfolio.pk)
+    
+    @mock.patch.object(static_site, 'sync_static_site')
+    def test_rolled_back_transaction_does_not_swallow_later_changes(self, sync):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.portfolio.save()
+                raise RuntimeError
+            with transaction.atomic():
+                self.portfolio.save()
+        sync.assert_called_once_with(self.portfolio.pk)
+    
+    @override_settings(STATIC_SITES_BUILD_IN_BACKGROUND=True)
+    @mock.patch.object(static_site, 'default_connection')
+    @mock.patch.object(static_site, 'sync_static_site')
+    def test_background_build(self, sync, _):
+        executor = mock.Mock()
+        with mock.patch.object(static_site, '_executor', executor):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.portfolio.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.portfolio.save()
+            # The request only queues the build, and only once while it waits
+            sync.assert_not_called()
+            executor.submit.assert_called_once_with(static_site._run_static_site_sync, self.portfolio.pk)
+            
+            static_site._run_static_site_sync(self.portfolio.pk)
+            sync.assert_called_once_with(self.portfolio.pk)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.portfolio.save()
+            self.assertEqual(executor.submit.call_count, 2)
+        static_site._queued.clear()
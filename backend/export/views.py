@@ -3,12 +3,15 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse, Http404
-from django.template.loader import render_to_string
+from django.http import Http404
 from django.utils import timezone
 from portfolios.models import Portfolio
 from portfolios.serializers import PortfolioSerializer
 from .models import ExportJob
+from .downloads import file_digest, serve_file
+from .fragments import render_portfolio
+from .jobs import start_export_job
+from core.instrumentation import query_budget
 import os
 import zipfile
 import tempfile
@@ -219,12 +222,52 @@ def image_to_base64(image_url, request):
         return image_url
 
 
-def get_portfolio_context(portfolio, request):
+def embed_images(component, request):
+    """
+    Convert the image URLs in a serialized component's content to base64 data URIs
+    """
+    content = component.get('content', {})
+    if isinstance(content, dict):
+        # Handle various image fields
+        image_fields = ['image', 'background_image', 'photo', 'avatar', 'featured_image']
+        for field in image_fields:
+            if field in content and content[field]:
+                content[field] = image_to_base64(content[field], request)
+        
+        # Handle nested structures (projects, posts, etc.)
+        if 'projects' in content and isinstance(content['projects'], list):
+            for project in content['projects']:
+                if isinstance(project, dict) and 'image' in project:
+                    project['image'] = image_to_base64(project.get('image'), request)
+        
+        if 'posts' in content and isinstance(content['posts'], list):
+            for post in content['posts']:
+                if isinstance(post, dict) and 'featured_image' in post:
+                    post['featured_image'] = image_to_base64(post.get('featured_image'), request)
+        
+        if 'experiences' in content and isinstance(content['experiences'], list):
+            for exp in content['experiences']:
+                if isinstance(exp, dict) and 'image' in exp:
+                    exp['image'] = image_to_base64(exp.get('image'), request)
+        
+        if 'testimonials' in content and isinstance(content['testimonials'], list):
+            for testimonial in content['testimonials']:
+                if isinstance(testimonial, dict) and 'avatar' in testimonial:
+                    testimonial['avatar'] = image_to_base64(testimonial.get('avatar'), request)
+    return component
+
+
+def get_portfolio_context(portfolio, request, embed_component_images=True):
     """
     Get portfolio data organized by component type for template rendering
     Includes all components sorted by order
     """
-    # Get portfolio with all components
+    # Get portfolio with all components, loading relations up front if the
+    # caller passed a bare instance
+    if 'components' not in getattr(portfolio, '_prefetched_objects_cache', {}):
+        portfolio = PortfolioSerializer.setup_eager_loading(
+            Portfolio.objects.all()
+        ).get(pk=portfolio.pk)
     serializer = PortfolioSerializer(portfolio, context={'request': request})
     portfolio_data = serializer.data
     
@@ -249,36 +292,11 @@ def get_portfolio_context(portfolio, request):
             portfolio_data['user_profile_photo_url'], request
         )
     
-    # Convert images in component content
-    for component in visible_components:
-        content = component.get('content', {})
-        if isinstance(content, dict):
-            # Handle various image fields
-            image_fields = ['image', 'background_image', 'photo', 'avatar', 'featured_image']
-            for field in image_fields:
-                if field in content and content[field]:
-                    content[field] = image_to_base64(content[field], request)
-            
-            # Handle nested structures (projects, posts, etc.)
-            if 'projects' in content and isinstance(content['projects'], list):
-                for project in content['projects']:
-                    if isinstance(project, dict) and 'image' in project:
-                        project['image'] = image_to_base64(project.get('image'), request)
-            
-            if 'posts' in content and isinstance(content['posts'], list):
-                for post in content['posts']:
-                    if isinstance(post, dict) and 'featured_image' in post:
-                        post['featured_image'] = image_to_base64(post.get('featured_image'), request)
-            
-            if 'experiences' in content and isinstance(content['experiences'], list):
-                for exp in content['experiences']:
-                    if isinstance(exp, dict) and 'image' in exp:
-                        exp['image'] = image_to_base64(exp.get('image'), request)
-            
-            if 'testimonials' in content and isinstance(content['testimonials'], list):
-                for testimonial in content['testimonials']:
-                    if isinstance(testimonial, dict) and 'avatar' in testimonial:
-                        testimonial['avatar'] = image_to_base64(testimonial.get('avatar'), request)
+    # Convert images in component content (deferred to fragment rendering
+    # when the caller only renders changed components)
+    if embed_component_images:
+        for component in visible_components:
+            embed_images(component, request)
     
     # Map component types for backward compatibility
     components_by_type = {}
@@ -340,28 +358,35 @@ def get_portfolio_context(portfolio, request):
     }
 
 
+def export_in_progress(job):
+    """Response for a request that attached to a job already processing"""
+    return Response({
+        'job_id': job.id,
+        'status': 'processing',
+        'message': 'Export already in progress'
+    }, status=status.HTTP_202_ACCEPTED)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def export_html(request, portfolio_id):
     """
     Export portfolio as HTML/CSS/JS bundle
     """
-    portfolio = get_object_or_404(Portfolio, pk=portfolio_id, user=request.user)
-    
-    # Create export job
-    job = ExportJob.objects.create(
-        user=request.user,
-        portfolio=portfolio,
-        export_type='html',
-        status='processing'
+    portfolio = get_object_or_404(
+        PortfolioSerializer.setup_eager_loading(Portfolio.objects.all()),
+        pk=portfolio_id,
+        user=request.user
     )
     
+    # Create export job, or attach to the identical one already running
+    job, created = start_export_job(request.user, portfolio, 'html')
+    if not created:
+        return export_in_progress(job)
+    
     try:
-        # Get portfolio context for template
-        context = get_portfolio_context(portfolio, request)
-        
-        # Render HTML template
-        html_content = render_to_string('export/portfolio_html.html', context, request=request)
+        # Render HTML template from cached component fragments
+        html_content = render_portfolio(portfolio, request, 'html')
         
         # Create temporary directory
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -386,6 +411,8 @@ def export_html(request, portfolio_id):
             # Update job
             job.status = 'completed'
             job.file_path = file_path
+            job.file_hash = file_digest(file_path)
+            job.file_size = os.path.getsize(file_path)
             job.completed_at = timezone.now()
             job.save()
             
@@ -414,16 +441,17 @@ def export_pdf(request, portfolio_id):
     """
     Export portfolio as PDF using WeasyPrint
     """
-    portfolio = get_object_or_404(Portfolio, pk=portfolio_id, user=request.user)
-    
-    # Create export job
-    job = ExportJob.objects.create(
-        user=request.user,
-        portfolio=portfolio,
-        export_type='pdf',
-        status='processing'
+    portfolio = get_object_or_404(
+        PortfolioSerializer.setup_eager_loading(Portfolio.objects.all()),
+        pk=portfolio_id,
+        user=request.user
     )
     
+    # Create export job, or attach to the identical one already running
+    job, created = start_export_job(request.user, portfolio, 'pdf')
+    if not created:
+        return export_in_progress(job)
+    
     try:
         # Check if WeasyPrint is available and can generate PDFs
         is_available, error_msg, error_type = check_weasyprint_availability()
@@ -461,11 +489,8 @@ def export_pdf(request, portfolio_id):
         # Import WeasyPrint (we know it's available from the check)
         from weasyprint import HTML
         
-        # Get portfolio context for template
-        context = get_portfolio_context(portfolio, request)
-        
-        # Render PDF template
-        html_content = render_to_string('export/portfolio_pdf.html', context, request=request)
+        # Render PDF template from cached component fragments
+        html_content = render_portfolio(portfolio, request, 'pdf')
         
         # Create temporary directory
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -563,6 +588,8 @@ def export_pdf(request, portfolio_id):
             # Update job
             job.status = 'completed'
             job.file_path = file_path
+            job.file_hash = file_digest(file_path)
+            job.file_size = os.path.getsize(file_path)
             job.completed_at = timezone.now()
             job.save()
             
@@ -641,13 +668,18 @@ def export_job_detail(request, job_id):
     return Response(response_data)
 
 
+@query_budget(2)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def download_export(request, job_id):
     """
-    Download exported file
+    Download exported file (resumable, or sent by the front server when
+    EXPORT_DOWNLOAD_OFFLOAD is set; see export.downloads)
     """
-    job = get_object_or_404(ExportJob, pk=job_id, user=request.user)
+    job = get_object_or_404(ExportJob.objects.select_related('portfolio'), pk=job_id, user=request.user)
+    
+    if job.status == 'expired':
+        return Response({'error': 'Export has expired, please export again'}, status=status.HTTP_410_GONE)
     
     if job.status != 'completed' or not job.file_path:
         raise Http404("Export not ready")
@@ -663,10 +695,4 @@ def download_export(request, job_id):
         filename = f'{job.portfolio.title.replace(" ", "_")}_portfolio.zip'
         content_type = 'application/zip'
     
-    response = FileResponse(
-        open(job.file_path, 'rb'),
-        content_type=content_type,
-        as_attachment=True,
-        filename=filename
-    )
-    return response
+    return serve_file(request, job.file_path, content_type, filename, job.file_hash)
@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 
 # Load environment variables
 load_dotenv()
@@ -59,6 +60,7 @@ INSTALLED_APPS = [
     'django_filters',
     
     # Local apps
+    'core',
     'accounts',
     'portfolios',
     'resumes',
@@ -67,9 +69,12 @@ INSTALLED_APPS = [
     'blogs',
     'analytics',
     'export',
+    'search',
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.RequestMetricsMiddleware',  # First, so its timings cover the whole stack
+    'core.compression.CompressionMiddleware',  # brotli/gzip; above anything that touches the body
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware should be as high as possible
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -104,11 +109,86 @@ WSGI_APPLICATION = 'portfolioai_backend.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
+# DB_ENGINE selects the profile: 'sqlite' (default, single server) or 'postgresql'
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'portfolioai'),
+            'USER': os.getenv('DB_USER', 'portfolioai'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Persistent connections: reuse one connection per worker instead of connecting per request
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            # Required behind PgBouncer in transaction pooling mode
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_PGBOUNCER', 'False') == 'True',
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+            },
+        }
+    }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / os.getenv('DB_NAME', 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds a writer waits for the lock (busy_timeout) before "database is locked"
+                'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', '5')),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unsupported DB_ENGINE '{DB_ENGINE}', use 'sqlite' or 'postgresql'")
+
+# Applied to every new SQLite connection (core.db.configure_sqlite). WAL lets
+# readers run alongside the writer, and synchronous=NORMAL is durable under WAL
+# except for the last commits before a power loss
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-20000')),  # negative: KiB
+}
+
+
+# Cache
+# CACHE_BACKEND: 'locmem' (default, per process), 'file' (shared by the workers
+# of one host) or 'redis' (shared by all hosts). Apps cache through the
+# namespaces in core.cache.
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+
+if CACHE_BACKEND == 'locmem':
+    CACHE_CONFIG = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'portfolioai',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000'))},
+    }
+elif CACHE_BACKEND == 'file':
+    CACHE_CONFIG = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / os.getenv('CACHE_LOCATION', 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000'))},
+    }
+elif CACHE_BACKEND == 'redis':
+    CACHE_CONFIG = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL', 'redis://localhost:6379/1'),
+    }
+else:
+    raise ImproperlyConfigured(f"Unsupported CACHE_BACKEND '{CACHE_BACKEND}', use 'locmem', 'file' or 'redis'")
 
-DATABASES = {
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        **CACHE_CONFIG,
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'portfolioai'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
     }
 }
 
@@ -154,6 +234,70 @@ STATIC_ROOT = BASE_DIR / os.getenv('STATIC_ROOT', 'staticfiles')
 MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
 MEDIA_ROOT = BASE_DIR / os.getenv('MEDIA_ROOT', 'media')
 
+# Export downloads: '' streams them from Django; 'x-accel-redirect' (nginx)
+# or 'x-sendfile' (Apache/lighttpd) hands the transfer to the front server.
+# The nginx location must be internal and alias MEDIA_ROOT/exports
+EXPORT_DOWNLOAD_OFFLOAD = os.getenv('EXPORT_DOWNLOAD_OFFLOAD', '').lower()
+EXPORT_ACCEL_REDIRECT_LOCATION = os.getenv('EXPORT_ACCEL_REDIRECT_LOCATION', '/protected/exports/')
+
+# Export retention (export.retention, run by the expire_exports command):
+# files are expired when older than EXPORT_MAX_AGE_DAYS, beyond a user's
+# EXPORT_USER_QUOTA_MB or beyond EXPORT_DISK_BUDGET_MB in total. Expired
+# and failed job rows are deleted after EXPORT_JOB_RETENTION_DAYS
+EXPORT_MAX_AGE_DAYS = int(os.getenv('EXPORT_MAX_AGE_DAYS', '7'))
+EXPORT_USER_QUOTA_MB = int(os.getenv('EXPORT_USER_QUOTA_MB', '100'))
+EXPORT_DISK_BUDGET_MB = int(os.getenv('EXPORT_DISK_BUDGET_MB', '2048'))
+EXPORT_JOB_RETENTION_DAYS = int(os.getenv('EXPORT_JOB_RETENTION_DAYS', '90'))
+
+# Export jobs (export.jobs): identical exports already processing are
+# reused; each user may have this many different exports processing, and
+# jobs processing for longer than the timeout (seconds) are marked failed
+EXPORT_MAX_CONCURRENT_PER_USER = int(os.getenv('EXPORT_MAX_CONCURRENT_PER_USER', '2'))
+EXPORT_PROCESSING_TIMEOUT = int(os.getenv('EXPORT_PROCESSING_TIMEOUT', '600'))
+
+# Static pre-generated sites for published portfolios (served directly by the front server)
+STATIC_SITES_ENABLED = os.getenv('STATIC_SITES_ENABLED', 'False') == 'True'
+STATIC_SITES_ROOT = BASE_DIR / os.getenv('STATIC_SITES_ROOT', 'published')
+STATIC_SITES_KEEP_RELEASES = int(os.getenv('STATIC_SITES_KEEP_RELEASES', '3'))
+# Build on a background thread after commit instead of in the request
+STATIC_SITES_BUILD_IN_BACKGROUND = os.getenv('STATIC_SITES_BUILD_IN_BACKGROUND', 'True') == 'True'
+
+# Response compression (core.compression): responses smaller than this many
+# bytes are sent as is. Brotli is used when the client accepts it and the
+# brotli package is installed; quality 0-11 trades CPU for size
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '5'))
+
+# View counters are buffered in memory and written back at most this many seconds apart
+VIEW_COUNTER_FLUSH_INTERVAL = int(os.getenv('VIEW_COUNTER_FLUSH_INTERVAL', '10'))
+
+# Request instrumentation (SQL count/time, AI time, total time)
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', str(DEBUG)) == 'True'
+# Raise instead of logging when a view exceeds its declared query budget (tests)
+QUERY_BUDGET_STRICT = False
+
+# Where run_benchmarks saves its results
+BENCHMARK_RESULTS_DIR = BASE_DIR / os.getenv('BENCHMARK_RESULTS_DIR', 'benchmark_results')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'metrics': {'()': 'core.instrumentation.MetricsFormatter'},
+    },
+    'handlers': {
+        'metrics': {'class': 'logging.StreamHandler', 'formatter': 'metrics'},
+    },
+    'loggers': {
+        # INFO logs every request; WARNING only requests over their budget
+        'portfolioai.requests': {
+            'handlers': ['metrics'],
+            'level': os.getenv('REQUEST_METRICS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Portfolio, PortfolioComponent, PortfolioSettings, Template
+from .models import Portfolio, PortfolioComponent, PortfolioRevision, PortfolioSettings, Template
 
 
 @admin.register(Template)
@@ -30,3 +30,11 @@ class PortfolioComponentAdmin(admin.ModelAdmin):
 class PortfolioSettingsAdmin(admin.ModelAdmin):
     list_display = ['portfolio', 'primary_color', 'font_family', 'created_at']
     search_fields = ['portfolio__title']
+
+
+@admin.register(PortfolioRevision)
+class PortfolioRevisionAdmin(admin.ModelAdmin):
+    list_display = ['portfolio', 'number', 'reason', 'is_snapshot', 'size', 'created_at']
+    list_filter = ['reason', 'is_snapshot', 'created_at']
+    search_fields = ['portfolio__title']
+    readonly_fields = ['data']
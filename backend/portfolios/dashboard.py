@@ -0,0 +1,153 @@
+"""
+Dashboard aggregates computed in a single query and cached per user.
+
+Content counters are invalidated when the user's content changes, once
+the change commits. View counters (portfolio views and blog post views)
+change on every public page view, so they are cached separately for
+``VIEW_STATS_TIMEOUT`` seconds and may lag by that much instead of
+invalidating the whole dashboard on each view. Blog post views are also
+buffered (``blogs.counters.post_views``) and flushed with ``update()``,
+which sends no signal, so ``blog_views`` may lag by a further
+``VIEW_COUNTER_FLUSH_INTERVAL`` seconds.
+"""
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import CharField, Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from analytics.models import PortfolioView
+from core.cache import portfolio_cache
+from blogs.models import BlogPost
+from projects.models import Project
+from resumes.models import ResumeUpload
+from .models import Portfolio
+
+DASHBOARD_STATS_TIMEOUT = 60 * 10
+
+VIEW_STATS_TIMEOUT = 60
+
+VIEW_COUNTERS = ('portfolio_views', 'portfolio_views_30_days', 'blog_views')
+
+RECENT_ACTIVITY_LIMIT = 5
+
+
+def get_cache_key(user_id):
+    return portfolio_cache.key('dashboard_stats', user_id)
+
+
+def get_view_stats_cache_key(user_id):
+    return portfolio_cache.key('dashboard_view_stats', user_id)
+
+
+def invalidate_dashboard_stats(user_id):
+    """
+    Drop the user's cached stats once the current transaction commits, so
+    a concurrent request cannot re-cache the counts from before the change
+    """
+    if user_id is not None:
+        key = get_cache_key(user_id)
+        transaction.on_commit(lambda: portfolio_cache.delete(key))
+
+
+def _scalar(queryset, user_field, aggregate):
+    """
+    Correlated subquery returning one aggregate over ``queryset`` for the outer user
+    """
+    queryset = (
+        queryset.filter(**{user_field: OuterRef('pk')})
+        .order_by()
+        .values(user_field)
+        .annotate(value=aggregate)
+        .values('value')
+    )
+    return Coalesce(Subquery(queryset, output_field=IntegerField()), 0)
+
+
+def _count(model, user_field='user', **filters):
+    return _scalar(
+        model.objects.filter(**filters),
+        user_field,
+        Count('pk')
+    )
+
+
+def _view_counters():
+    month_ago = timezone.now() - timedelta(days=30)
+    return {
+        'portfolio_views': _count(PortfolioView, 'portfolio__user'),
+        'portfolio_views_30_days': _count(PortfolioView, 'portfolio__user', viewed_at__gte=month_ago),
+        'blog_views': _scalar(BlogPost.objects.all(), 'user', Sum('views')),
+    }
+
+
+def compute_dashboard_stats(user):
+    """
+    Compute every dashboard counter with one SELECT on the user row and
+    recent activity with one UNION query.
+    """
+    counters = {
+        'total_portfolios': _count(Portfolio),
+        'published_count': _count(Portfolio, is_published=True),
+        'total_projects': _count(Project),
+        'featured_projects': _count(Project, featured=True),
+        'total_blog_posts': _count(BlogPost),
+        'published_blog_posts': _count(BlogPost, published=True),
+        'total_resumes': _count(ResumeUpload),
+        'parsed_resumes': _count(ResumeUpload, status='completed'),
+        **_view_counters(),
+    }
+    stats = User.objects.filter(pk=user.pk).annotate(**counters).values(*counters).get()
+    stats['drafts_count'] = stats['total_portfolios'] - stats['published_count']
+    stats['recent_activity'] = get_recent_activity(user)
+    return stats
+
+
+def compute_view_stats(user):
+    """Only the view counters, with one SELECT on the user row"""
+    counters = _view_counters()
+    return User.objects.filter(pk=user.pk).annotate(**counters).values(*counters).get()
+
+
+def get_recent_activity(user):
+    """
+    Latest updates across portfolios, projects and blog posts
+    """
+    def recent(model, kind):
+        return (
+            model.objects.filter(user=user)
+            .annotate(kind=Value(kind, output_field=CharField()))
+            .order_by()
+            .values('kind', 'title', 'updated_at')
+        )
+    
+    activity = (
+        recent(Portfolio, 'portfolio')
+        .union(recent(Project, 'project'), recent(BlogPost, 'blog_post'), all=True)
+        .order_by('-updated_at')[:RECENT_ACTIVITY_LIMIT]
+    )
+    return [
+        {
+            'type': f"{item['kind']}_updated",
+            'description': f"Updated {item['kind'].replace('_', ' ')}: {item['title']}",
+            'timestamp': item['updated_at'].isoformat()
+        }
+        for item in activity
+    ]
+
+
+def get_dashboard_stats(user):
+    key = get_cache_key(user.pk)
+    views_key = get_view_stats_cache_key(user.pk)
+    cached = portfolio_cache.get_many([key, views_key])
+    stats = cached.get(key)
+    view_stats = cached.get(views_key)
+    if stats is None:
+        stats = compute_dashboard_stats(user)
+        view_stats = {name: stats[name] for name in VIEW_COUNTERS}
+        portfolio_cache.set(key, stats, DASHBOARD_STATS_TIMEOUT)
+        portfolio_cache.set(views_key, view_stats, VIEW_STATS_TIMEOUT)
+    elif view_stats is None:
+        view_stats = compute_view_stats(user)
+        portfolio_cache.set(views_key, view_stats, VIEW_STATS_TIMEOUT)
+    return {**stats, **view_stats}
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.3 on 2026-10-19 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolios', '0003_update_component_types'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolio',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Incremented on every change, used for optimistic concurrency'),
+        ),
+        migrations.AddField(
+            model_name='portfoliocomponent',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Incremented on every change, used for optimistic concurrency'),
+        ),
+    ]
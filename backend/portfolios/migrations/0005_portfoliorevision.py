@@ -0,0 +1,34 @@
+# Generated by Django 5.0.3 on 2026-10-19 06:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolios', '0004_portfolio_version_portfoliocomponent_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(help_text='Sequential revision number within the portfolio')),
+                ('reason', models.CharField(choices=[('publish', 'Publish'), ('edit', 'Edit'), ('manual', 'Manual'), ('restore', 'Restore')], default='edit', max_length=20)),
+                ('is_snapshot', models.BooleanField(default=False, help_text='True if data is a full snapshot, False if it is a delta against the previous revision')),
+                ('data', models.BinaryField(help_text='zlib-compressed JSON snapshot or JSON Patch')),
+                ('size', models.PositiveIntegerField(default=0, help_text='Stored size in bytes')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('portfolio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='portfolios.portfolio')),
+            ],
+            options={
+                'ordering': ['-number'],
+                'unique_together': {('portfolio', 'number')},
+            },
+        ),
+    ]
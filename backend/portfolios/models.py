@@ -2,6 +2,17 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 import json
+from core.slugs import UniqueSlugMixin
+
+
+def bump_version(instance, save_kwargs):
+    """Increment ``instance.version`` before saving an existing row"""
+    if instance._state.adding:
+        return
+    instance.version += 1
+    update_fields = save_kwargs.get('update_fields')
+    if update_fields is not None:
+        save_kwargs['update_fields'] = set(update_fields) | {'version'}
 
 
 class Template(models.Model):
@@ -35,7 +46,7 @@ class Template(models.Model):
         return self.name
 
 
-class Portfolio(models.Model):
+class Portfolio(UniqueSlugMixin, models.Model):
     """
     Main portfolio instance
     """
@@ -64,6 +75,10 @@ class Portfolio(models.Model):
         default=dict,
         help_text="Interactive features configuration (animations, effects, etc.)"
     )
+    version = models.PositiveIntegerField(
+        default=1,
+        help_text="Incremented on every change, used for optimistic concurrency"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(null=True, blank=True)
@@ -76,15 +91,7 @@ class Portfolio(models.Model):
         return f"{self.user.email} - {self.title}"
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            from django.utils.text import slugify
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while Portfolio.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+        bump_version(self, kwargs)
         super().save(*args, **kwargs)
 
 
@@ -132,6 +139,10 @@ class PortfolioComponent(models.Model):
         help_text="Component content data"
     )
     custom_css = models.TextField(blank=True, help_text="Custom CSS for this component")
+    version = models.PositiveIntegerField(
+        default=1,
+        help_text="Incremented on every change, used for optimistic concurrency"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -141,6 +152,10 @@ class PortfolioComponent(models.Model):
     
     def __str__(self):
         return f"{self.portfolio.title} - {self.component_type} ({self.order})"
+    
+    def save(self, *args, **kwargs):
+        bump_version(self, kwargs)
+        super().save(*args, **kwargs)
 
 
 class PortfolioSettings(models.Model):
@@ -165,3 +180,42 @@ class PortfolioSettings(models.Model):
     
     def __str__(self):
         return f"Settings for {self.portfolio.title}"
+
+
+class PortfolioRevision(models.Model):
+    """
+    Saved version of a portfolio (fields, components and settings).
+    
+    Most revisions store a zlib-compressed JSON Patch against the previous
+    revision; every few revisions a full snapshot is stored so restoring
+    never replays a long chain of deltas.
+    """
+    REASON_CHOICES = [
+        ('publish', 'Publish'),
+        ('edit', 'Edit'),
+        ('manual', 'Manual'),
+        ('restore', 'Restore'),
+    ]
+    
+    portfolio = models.ForeignKey(
+        Portfolio,
+        on_delete=models.CASCADE,
+        related_name='revisions'
+    )
+    number = models.PositiveIntegerField(help_text="Sequential revision number within the portfolio")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default='edit')
+    is_snapshot = models.BooleanField(
+        default=False,
+        help_text="True if data is a full snapshot, False if it is a delta against the previous revision"
+    )
+    data = models.BinaryField(help_text="zlib-compressed JSON snapshot or JSON Patch")
+    size = models.PositiveIntegerField(default=0, help_text="Stored size in bytes")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-number']
+        unique_together = ['portfolio', 'number']
+    
+    def __str__(self):
+        return f"{self.portfolio.title} - revision {self.number}"
@@ -0,0 +1,208 @@
+"""
+Portfolio version history stored as compressed JSON deltas
+"""
+import json
+import zlib
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from core.jsonpatch import apply_patch, make_patch
+from .models import Portfolio, PortfolioComponent, PortfolioRevision, PortfolioSettings
+
+# Store a full snapshot every N revisions to bound restore cost
+SNAPSHOT_EVERY = 20
+
+# Edits within this long of an edit revision are folded into that revision
+EDIT_INTERVAL = timedelta(minutes=5)
+
+PORTFOLIO_FIELDS = [
+    'title', 'template_id', 'template_type', 'custom_settings',
+    'seo_title', 'seo_description', 'seo_keywords', 'meta_keywords',
+    'meta_description', 'pages', 'navigation_enabled', 'interactive_elements',
+]
+
+COMPONENT_FIELDS = ['component_type', 'order', 'is_visible', 'content', 'custom_css']
+
+SETTINGS_FIELDS = [
+    'primary_color', 'secondary_color', 'accent_color',
+    'font_family', 'font_size', 'custom_css',
+]
+
+
+def encode(value):
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+
+def decode(data):
+    return json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+
+
+def build_state(portfolio):
+    """
+    Capture the editable state of a portfolio as a JSON-serializable dict.
+    
+    Components are keyed by id so that deltas touch only the components
+    that changed.
+    """
+    try:
+        settings = portfolio.settings
+    except PortfolioSettings.DoesNotExist:
+        settings = None
+    
+    return {
+        'portfolio': {field: getattr(portfolio, field) for field in PORTFOLIO_FIELDS},
+        'components': {
+            str(component.id): {field: getattr(component, field) for field in COMPONENT_FIELDS}
+            for component in portfolio.components.all()
+        },
+        'settings': {field: getattr(settings, field) for field in SETTINGS_FIELDS} if settings else None,
+    }
+
+
+def get_state(portfolio, number):
+    """
+    Rebuild the state of revision ``number`` from the nearest snapshot and the deltas after it
+    """
+    revisions = list(
+        PortfolioRevision.objects.filter(portfolio=portfolio, number__lte=number)
+        .filter(number__gte=_last_snapshot_number(portfolio, number))
+        .order_by('number')
+    )
+    if not revisions or revisions[-1].number != number:
+        raise PortfolioRevision.DoesNotExist(f'Revision {number} not found')
+    
+    state = None
+    for revision in revisions:
+        data = decode(revision.data)
+        state = data if revision.is_snapshot else apply_patch(state, data)
+    return state
+
+
+def _last_snapshot_number(portfolio, number):
+    return PortfolioRevision.objects.filter(
+        portfolio=portfolio,
+        number__lte=number,
+        is_snapshot=True
+    ).order_by('-number').values_list('number', flat=True).first() or 0
+
+
+def record_revision(portfolio, reason='edit', user=None):
+    """
+    Store a new revision if the portfolio changed since the last one.
+    
+    An edit within ``EDIT_INTERVAL`` of an edit revision rewrites that
+    revision with the current state instead of adding one, so a burst of
+    edits shares a revision and the latest state is always kept. Publish,
+    manual and restore revisions are never rewritten. Returns the new or
+    updated revision, or None.
+    """
+    last = PortfolioRevision.objects.filter(portfolio=portfolio).order_by('-number').first()
+    state = json.loads(json.dumps(build_state(portfolio), default=str))
+    
+    if (
+        reason == 'edit' and last and last.reason == 'edit'
+        and timezone.now() - last.created_at < EDIT_INTERVAL
+    ):
+        return _rewrite_revision(portfolio, last, state, user)
+    
+    if last is None:
+        number, is_snapshot, payload = 1, True, state
+    else:
+        delta = make_patch(get_state(portfolio, last.number), state)
+        if not delta:
+            return None
+        number = last.number + 1
+        is_snapshot = (number - 1) % SNAPSHOT_EVERY == 0
+        payload = state if is_snapshot else delta
+    
+    data = encode(payload)
+    try:
+        with transaction.atomic():
+            return PortfolioRevision.objects.create(
+                portfolio=portfolio,
+                number=number,
+                reason=reason,
+                is_snapshot=is_snapshot,
+                data=data,
+                size=len(data),
+                created_by=user,
+            )
+    except IntegrityError:
+        # A concurrent request recorded this revision number first
+        return None
+
+
+def _rewrite_revision(portfolio, revision, state, user):
+    """
+    Replace the state stored in ``revision``, the latest revision.
+    
+    When the edits were undone, so the previous revision already holds
+    ``state``, the revision is deleted instead.
+    """
+    if revision.is_snapshot:
+        payload = state
+    else:
+        payload = make_patch(get_state(portfolio, revision.number - 1), state)
+    
+    # Only while it is still the latest revision: a later delta is based on it
+    latest = PortfolioRevision.objects.filter(pk=revision.pk).exclude(
+        Exists(PortfolioRevision.objects.filter(portfolio=OuterRef('portfolio'), number__gt=OuterRef('number')))
+    )
+    if not payload:
+        latest.delete()
+        return None
+    if payload == decode(revision.data):
+        return None
+    
+    data = encode(payload)
+    if not latest.update(data=data, size=len(data), created_by=user):
+        return None
+    revision.data, revision.size, revision.created_by = data, len(data), user
+    return revision
+
+
+def diff_revisions(portfolio, number, against=None):
+    """
+    JSON Patch from revision ``against`` (default: the previous one) to revision ``number``
+    """
+    if against is None:
+        against = number - 1
+    source = get_state(portfolio, against) if against > 0 else {}
+    return make_patch(source, get_state(portfolio, number))
+
+
+def restore_revision(portfolio, number, user=None):
+    """
+    Put a portfolio back into the state of revision ``number``
+    """
+    from search.index import reindex_portfolio_components
+    from .serializers import PortfolioComponentBulkSerializer
+    
+    state = get_state(portfolio, number)
+    
+    with transaction.atomic():
+        for field, value in state['portfolio'].items():
+            setattr(portfolio, field, value)
+        portfolio.save()
+        
+        if state['settings'] is not None:
+            PortfolioSettings.objects.update_or_create(portfolio=portfolio, defaults=state['settings'])
+        
+        existing_ids = set(
+            PortfolioComponent.objects.filter(portfolio=portfolio).values_list('id', flat=True)
+        )
+        components = []
+        for component_id, fields in sorted(state['components'].items(), key=lambda item: item[1]['order']):
+            item = {field: fields[field] for field in COMPONENT_FIELDS if field != 'order'}
+            if int(component_id) in existing_ids:
+                item['id'] = int(component_id)
+            components.append(item)
+        
+        serializer = PortfolioComponentBulkSerializer(data={'components': components})
+        serializer.is_valid(raise_exception=True)
+        serializer.save(portfolio=portfolio)
+        reindex_portfolio_components(portfolio)
+    
+    portfolio = Portfolio.objects.get(pk=portfolio.pk)
+    return record_revision(portfolio, reason='restore', user=user)
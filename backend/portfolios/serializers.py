@@ -1,6 +1,9 @@
 from rest_framework import serializers
+from django.db import transaction
 from django.db.models import Max
-from .models import Portfolio, PortfolioComponent, PortfolioSettings, Template
+from django.utils import timezone
+from core.serializers import SparseFieldsetMixin
+from .models import Portfolio, PortfolioComponent, PortfolioRevision, PortfolioSettings, Template
 
 
 class TemplateSerializer(serializers.ModelSerializer):
@@ -9,18 +12,18 @@ class TemplateSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class PortfolioSettingsSerializer(serializers.ModelSerializer):
+class PortfolioSettingsSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = PortfolioSettings
         fields = '__all__'
         read_only_fields = ['portfolio']
 
 
-class PortfolioComponentSerializer(serializers.ModelSerializer):
+class PortfolioComponentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = PortfolioComponent
         fields = '__all__'
-        read_only_fields = ['portfolio']
+        read_only_fields = ['portfolio', 'version']
     
     def validate(self, attrs):
         # Ensure order is unique within portfolio
@@ -49,7 +52,133 @@ class PortfolioComponentSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class PortfolioSerializer(serializers.ModelSerializer):
+class PortfolioComponentBulkItemSerializer(serializers.ModelSerializer):
+    """One entry of a bulk component save; its order is its list position"""
+    id = serializers.IntegerField(required=False)
+    
+    class Meta:
+        model = PortfolioComponent
+        fields = ['id', 'component_type', 'is_visible', 'content', 'custom_css']
+        extra_kwargs = {
+            'component_type': {'required': False},
+        }
+    
+    def validate(self, attrs):
+        if 'id' not in attrs and 'component_type' not in attrs:
+            raise serializers.ValidationError('component_type is required for new components.')
+        return attrs
+
+
+class PortfolioComponentBulkSerializer(serializers.Serializer):
+    """
+    Save a portfolio's components in one transaction.
+    
+    ``components`` is the ordered list: entries with an ``id`` update that
+    component, entries without one create a new component. With
+    ``delete_missing`` (the default) the list is the full set and every other
+    component is deleted; otherwise unlisted components are kept after the
+    listed ones and only the ids in ``delete`` are removed.
+    """
+    components = PortfolioComponentBulkItemSerializer(many=True)
+    delete_missing = serializers.BooleanField(default=True)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    
+    UPDATE_FIELDS = ['component_type', 'is_visible', 'content', 'custom_css', 'order', 'version', 'updated_at']
+    
+    def validate(self, attrs):
+        ids = [item['id'] for item in attrs['components'] if 'id' in item]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError({'components': 'Each component id may appear only once.'})
+        if set(ids) & set(attrs['delete']):
+            raise serializers.ValidationError({'delete': 'Cannot update and delete the same component.'})
+        return attrs
+    
+    def create(self, validated_data):
+        """
+        Apply creates, updates, deletes and reorders with a fixed number of
+        queries (one SELECT, one DELETE, two bulk UPDATEs and one INSERT)
+        """
+        portfolio = validated_data['portfolio']
+        items = validated_data['components']
+        now = timezone.now()
+        
+        with transaction.atomic():
+            existing = {
+                component.id: component
+                for component in PortfolioComponent.objects.select_for_update().filter(portfolio=portfolio)
+            }
+            
+            unknown = [item['id'] for item in items if 'id' in item and item['id'] not in existing]
+            unknown += [pk for pk in validated_data['delete'] if pk not in existing]
+            if unknown:
+                raise serializers.ValidationError({'components': f'Unknown component ids: {sorted(set(unknown))}'})
+            
+            listed_ids = {item['id'] for item in items if 'id' in item}
+            if validated_data['delete_missing']:
+                delete_ids = set(existing) - listed_ids
+            else:
+                delete_ids = set(validated_data['delete'])
+            
+            ordered = []
+            to_create = []
+            for item in items:
+                fields = {key: value for key, value in item.items() if key != 'id'}
+                if 'id' in item:
+                    component = existing[item['id']]
+                    for key, value in fields.items():
+                        setattr(component, key, value)
+                else:
+                    component = PortfolioComponent(portfolio=portfolio, **fields)
+                    to_create.append(component)
+                ordered.append(component)
+            
+            # Unlisted components keep their relative order after the listed ones
+            ordered += [
+                component for component in sorted(existing.values(), key=lambda c: (c.order, c.created_at))
+                if component.id not in listed_ids and component.id not in delete_ids
+            ]
+            to_update = [component for component in ordered if component.pk]
+            
+            if delete_ids:
+                PortfolioComponent.objects.filter(portfolio=portfolio, id__in=delete_ids).delete()
+            
+            if to_update:
+                # Park kept rows on unique negative orders first so that
+                # swapping positions never trips unique_together mid-update
+                for component in to_update:
+                    component.order = -component.id
+                PortfolioComponent.objects.bulk_update(to_update, ['order'])
+            
+            for position, component in enumerate(ordered):
+                component.order = position
+                component.updated_at = now
+                if component.pk:
+                    component.version += 1
+            
+            if to_create:
+                PortfolioComponent.objects.bulk_create(to_create)
+            if to_update:
+                PortfolioComponent.objects.bulk_update(to_update, self.UPDATE_FIELDS)
+        
+        return ordered
+
+
+class JsonPatchSerializer(serializers.Serializer):
+    """
+    Partial update of a JSON field: an RFC 6902 ``patch`` or an RFC 7396
+    ``merge_patch``, applied only if ``version`` is still current
+    """
+    version = serializers.IntegerField(min_value=1)
+    patch = serializers.ListField(child=serializers.DictField(), required=False)
+    merge_patch = serializers.JSONField(required=False)
+    
+    def validate(self, attrs):
+        if ('patch' in attrs) == ('merge_patch' in attrs):
+            raise serializers.ValidationError('Provide exactly one of patch or merge_patch.')
+        return attrs
+
+
+class PortfolioSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     components = PortfolioComponentSerializer(many=True, read_only=True)
     settings = PortfolioSettingsSerializer(read_only=True)
     template_name = serializers.CharField(source='template.name', read_only=True)
@@ -66,9 +195,21 @@ class PortfolioSerializer(serializers.ModelSerializer):
             'settings', 'seo_title', 'seo_description', 'seo_keywords',
             'profile_photo', 'profile_photo_url', 'user_profile_photo_url',
             'meta_keywords', 'meta_description', 'pages', 'navigation_enabled',
-            'interactive_elements', 'created_at', 'updated_at', 'published_at'
+            'interactive_elements', 'version', 'created_at', 'updated_at', 'published_at'
         ]
-        read_only_fields = ['user', 'slug', 'created_at', 'updated_at', 'published_at']
+        read_only_fields = ['user', 'slug', 'version', 'created_at', 'updated_at', 'published_at']
+    
+    # Everything the full representation reads loads in two queries (portfolio row + components)
+    select_related_fields = {
+        'user_email': 'user',
+        'user_profile_photo_url': 'user__profile',
+        'template_name': 'template',
+        'settings': 'settings',
+    }
+    prefetch_related_fields = {'components': 'components'}
+    deferrable_fields = [
+        'custom_settings', 'pages', 'interactive_elements', 'seo_description', 'meta_description'
+    ]
     
     def get_profile_photo_url(self, obj):
         if obj.profile_photo:
@@ -110,7 +251,7 @@ class PortfolioSerializer(serializers.ModelSerializer):
         return portfolio
 
 
-class PortfolioListSerializer(serializers.ModelSerializer):
+class PortfolioListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for list views"""
     user_email = serializers.EmailField(source='user.email', read_only=True)
     template_name = serializers.CharField(source='template.name', read_only=True)
@@ -121,4 +262,21 @@ class PortfolioListSerializer(serializers.ModelSerializer):
             'id', 'title', 'slug', 'template_type', 'is_published',
             'user_email', 'template_name', 'created_at', 'updated_at'
         ]
+    
+    expandable_fields = {
+        'components': (PortfolioComponentSerializer, {'many': True, 'read_only': True}),
+        'settings': (PortfolioSettingsSerializer, {'read_only': True}),
+    }
+    select_related_fields = {
+        'user_email': 'user',
+        'template_name': 'template',
+        'settings': 'settings',
+    }
+    prefetch_related_fields = {'components': 'components'}
+
 
+class PortfolioRevisionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PortfolioRevision
+        fields = ['id', 'number', 'reason', 'is_snapshot', 'size', 'created_by', 'created_at']
+        read_only_fields = fields
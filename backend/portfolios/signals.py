@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .dashboard import invalidate_dashboard_stats
+
+
+@receiver(post_save, sender='portfolios.Portfolio')
+@receiver(post_delete, sender='portfolios.Portfolio')
+@receiver(post_save, sender='projects.Project')
+@receiver(post_delete, sender='projects.Project')
+@receiver(post_save, sender='blogs.BlogPost')
+@receiver(post_delete, sender='blogs.BlogPost')
+@receiver(post_save, sender='resumes.ResumeUpload')
+@receiver(post_delete, sender='resumes.ResumeUpload')
+def user_content_changed(sender, instance, **kwargs):
+    """Drop the owner's cached dashboard stats"""
+    invalidate_dashboard_stats(instance.user_id)
+
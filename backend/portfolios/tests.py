@@ -1,3 +1,498 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from analytics.models import PortfolioView
+from blogs.models import BlogPost
+from core.cache import portfolio_cache
+from core.testing import QueryBudgetTestCase
+from . import revisions
+from .dashboard import get_dashboard_stats, get_view_stats_cache_key
+from .models import Portfolio, PortfolioComponent, PortfolioRevision, PortfolioSettings, Template
 
-# Create your tests here.
+
+class PortfolioQueryCountTests(TestCase):
+    """
+    Portfolio endpoints must issue a fixed number of queries, however many
+    components a portfolio has. Conditional-GET endpoints spend one of them
+    on the ETag/Last-Modified aggregate.
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.template = Template.objects.create(name='Modern', type='modern')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def create_portfolio(self, component_count, title='My Portfolio'):
+        portfolio = Portfolio.objects.create(
+            user=self.user,
+            title=title,
+            template=self.template,
+            is_published=True
+        )
+        PortfolioSettings.objects.create(portfolio=portfolio)
+        PortfolioComponent.objects.bulk_create([
+            PortfolioComponent(
+                portfolio=portfolio,
+                component_type='custom',
+                order=order,
+                content={'title': f'Section {order}'}
+            )
+            for order in range(component_count)
+        ])
+        return portfolio
+    
+    def assert_constant_queries(self, expected, url_for):
+        for component_count in (1, 15):
+            portfolio = self.create_portfolio(component_count, title=f'Portfolio {component_count}')
+            with self.assertNumQueries(expected):
+                response = self.client.get(url_for(portfolio))
+            self.assertEqual(response.status_code, 200)
+    
+    def test_detail(self):
+        self.assert_constant_queries(3, lambda p: f'/api/v1/portfolios/portfolios/{p.id}/')
+    
+    def test_preview(self):
+        self.assert_constant_queries(2, lambda p: f'/api/v1/portfolios/portfolios/{p.id}/preview/')
+    
+    def test_public_view(self):
+        self.client.force_authenticate(None)
+        self.assert_constant_queries(3, lambda p: f'/api/v1/portfolios/portfolios/public/{p.slug}/')
+    
+    def test_list(self):
+        self.assert_constant_queries(3, lambda p: '/api/v1/portfolios/portfolios/')
+    
+    def test_not_modified(self):
+        portfolio = self.create_portfolio(15)
+        url = f'/api/v1/portfolios/portfolios/{portfolio.id}/'
+        etag = self.client.get(url)['ETag']
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        component = portfolio.components.first()
+        component.content = {'title': 'Changed'}
+        component.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class PortfolioQueryBudgetTests(QueryBudgetTestCase):
+    """Hot portfolio endpoints stay within their declared query budgets"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = self.api_client(self.user)
+        template = Template.objects.create(name='Modern', type='modern')
+        for index in range(3):
+            self.portfolio = Portfolio.objects.create(
+                user=self.user,
+                title=f'Portfolio {index}',
+                template=template,
+                is_published=True
+            )
+            PortfolioSettings.objects.create(portfolio=self.portfolio)
+            PortfolioComponent.objects.bulk_create([
+                PortfolioComponent(portfolio=self.portfolio, component_type='custom', order=order)
+                for order in range(10)
+            ])
+    
+    def test_list(self):
+        self.assertWithinBudget(self.client.get('/api/v1/portfolios/portfolios/'))
+    
+    def test_detail(self):
+        self.assertWithinBudget(self.client.get(f'/api/v1/portfolios/portfolios/{self.portfolio.id}/'))
+    
+    def test_preview(self):
+        self.assertWithinBudget(self.client.get(f'/api/v1/portfolios/portfolios/{self.portfolio.id}/preview/'))
+    
+    def test_public_view(self):
+        response = self.api_client().get(f'/api/v1/portfolios/portfolios/public/{self.portfolio.slug}/')
+        metrics = self.assertWithinBudget(response)
+        self.assertEqual(metrics.query_budget, 3)
+    
+    def test_templates(self):
+        self.assertWithinBudget(self.client.get('/api/v1/portfolios/templates/'))
+    
+    def test_dashboard_stats(self):
+        self.assertWithinBudget(self.client.get('/api/v1/portfolios/dashboard/stats/'))
+
+
+class PortfolioValidatorTests(TestCase):
+    """The portfolio ETag covers everything the representation renders"""
+    
+    def setUp(self):
+        from accounts.models import UserProfile
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.profile, _ = UserProfile.objects.get_or_create(user=self.user)
+        self.template = Template.objects.create(name='Modern', type='modern')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.portfolio = Portfolio.objects.create(user=self.user, title='Portfolio', template=self.template)
+        self.url = f'/api/v1/portfolios/portfolios/{self.portfolio.pk}/'
+    
+    def assert_changes_etag(self, change):
+        for url in (self.url, '/api/v1/portfolios/portfolios/'):
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        etags = {url: self.client.get(url)['ETag'] for url in (self.url, '/api/v1/portfolios/portfolios/')}
+        change()
+        for url, etag in etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200, url)
+    
+    def test_template_change(self):
+        def rename():
+            self.template.name = 'Modern 2'
+            self.template.save()
+        self.assert_changes_etag(rename)
+        self.assertEqual(self.client.get(self.url).data['template_name'], 'Modern 2')
+    
+    def test_owner_changes(self):
+        def change_email():
+            self.user.email = 'new@example.com'
+            self.user.save()
+        self.assert_changes_etag(change_email)
+        
+        def change_photo():
+            self.profile.photo = 'profiles/me.png'
+            self.profile.save()
+        self.assert_changes_etag(change_photo)
+    
+    def test_list_validators_cover_the_page_only(self):
+        Portfolio.objects.create(user=self.user, title='Other')
+        url = '/api/v1/portfolios/portfolios/'
+        with CaptureQueriesContext(connection) as queries:
+            etag = self.client.get(url)['ETag']
+        aggregate = next(query['sql'] for query in queries if 'AS "_count"' in query['sql'])
+        self.assertIn('"portfolios_portfolio"."id" IN (', aggregate)
+        
+        Portfolio.objects.filter(title='Other').delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['count']), (200, 1))
+
+
+class DashboardStatsTests(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.portfolio = Portfolio.objects.create(user=self.user, title='Portfolio', is_published=True)
+    
+    def test_views_do_not_invalidate_content_stats(self):
+        stats = get_dashboard_stats(self.user)
+        self.assertEqual((stats['total_portfolios'], stats['portfolio_views']), (1, 0))
+        
+        PortfolioView.objects.create(portfolio=self.portfolio)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dashboard_stats(self.user)['portfolio_views'], 0)
+        
+        # Once the short view counter TTL expires only the view counters are recomputed
+        portfolio_cache.delete(get_view_stats_cache_key(self.user.pk))
+        with self.assertNumQueries(1):
+            stats = get_dashboard_stats(self.user)
+        self.assertEqual((stats['portfolio_views'], stats['portfolio_views_30_days']), (1, 1))
+    
+    def test_content_changes_invalidate_on_commit(self):
+        get_dashboard_stats(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Portfolio.objects.create(user=self.user, title='Draft')
+            # Until the change commits other requests still get the cached stats
+            self.assertEqual(get_dashboard_stats(self.user)['total_portfolios'], 1)
+        stats = get_dashboard_stats(self.user)
+        self.assertEqual((stats['total_portfolios'], stats['drafts_count']), (2, 1))
+    
+    def test_flushed_blog_views_show_with_the_view_counters(self):
+        post = BlogPost.objects.create(user=self.user, title='Post', content_markdown='Text')
+        self.assertEqual(get_dashboard_stats(self.user)['blog_views'], 0)
+        BlogPost.objects.filter(pk=post.pk).update(views=3)
+        portfolio_cache.delete(get_view_stats_cache_key(self.user.pk))
+        self.assertEqual(get_dashboard_stats(self.user)['blog_views'], 3)
+
+
+class ComponentBulkSaveTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.portfolio = Portfolio.objects.create(user=self.user, title='Portfolio')
+        self.components = PortfolioComponent.objects.bulk_create([
+            PortfolioComponent(portfolio=self.portfolio, component_type='custom', order=order, content={'n': order})
+            for order in range(3)
+        ])
+        self.url = f'/api/v1/portfolios/portfolios/{self.portfolio.pk}/components/bulk/'
+    
+    def saved(self):
+        return list(self.portfolio.components.order_by('order').values_list('id', 'order', 'content'))
+    
+    def test_create_update_delete_and_reorder(self):
+        first, second, third = self.components
+        response = self.client.put(self.url, {'components': [
+            {'id': third.pk, 'content': {'n': 'third'}},
+            {'component_type': 'about', 'content': {'n': 'new'}},
+            {'id': first.pk},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        new_id = response.data[1]['id']
+        self.assertEqual(self.saved(), [
+            (third.pk, 0, {'n': 'third'}),
+            (new_id, 1, {'n': 'new'}),
+            (first.pk, 2, {'n': 0}),
+        ])
+        self.assertFalse(PortfolioComponent.objects.filter(pk=second.pk).exists())
+        self.assertEqual(PortfolioComponent.objects.get(pk=first.pk).version, 2)
+    
+    def test_keep_unlisted(self):
+        first, second, third = self.components
+        response = self.client.put(self.url, {
+            'components': [{'id': third.pk}],
+            'delete_missing': False,
+            'delete': [second.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row[:2] for row in self.saved()], [(third.pk, 0), (first.pk, 1)])
+    
+    def test_unknown_id_changes_nothing(self):
+        before = self.saved()
+        response = self.client.put(self.url, {'components': [{'id': 999999}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.saved(), before)
+    
+    def test_failure_rolls_back(self):
+        before = self.saved()
+        payload = {'components': [
+            {'id': self.components[2].pk},
+            {'component_type': 'about'},
+        ]}
+        with mock.patch.object(PortfolioComponent.objects, 'bulk_create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.client.put(self.url, payload, format='json')
+        # The delete and the reorder that ran before the failed insert are undone
+        self.assertEqual(self.saved(), before)
+
+
+class JsonPatchEndpointTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.portfolio = Portfolio.objects.create(user=self.user, title='Portfolio', custom_settings={'theme': 'dark'})
+        self.component = PortfolioComponent.objects.create(
+            portfolio=self.portfolio, component_type='about', order=0, content={'title': 'About', 'tags': []}
+        )
+        self.content_url = f'/api/v1/portfolios/portfolios/{self.portfolio.pk}/components/{self.component.pk}/content/'
+    
+    def test_patch_component_content(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.content_url, {
+                'version': 1,
+                'patch': [{'op': 'add', 'path': '/tags/-', 'value': 'django'}],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['version'], 2)
+        self.component.refresh_from_db()
+        self.assertEqual(self.component.content, {'title': 'About', 'tags': ['django']})
+        self.assertEqual(self.component.version, 2)
+        # post_save receivers ran: the component is searchable with its new content
+        from search.models import SearchDocument
+        self.assertIn('django', SearchDocument.objects.get(kind='component', object_id=self.component.pk).body)
+    
+    def test_merge_patch_portfolio_field(self):
+        response = self.client.patch(
+            f'/api/v1/portfolios/portfolios/{self.portfolio.pk}/json-patch/custom_settings/',
+            {'version': 1, 'merge_patch': {'theme': None, 'font': 'Inter'}},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.portfolio.refresh_from_db()
+        self.assertEqual((self.portfolio.custom_settings, self.portfolio.version), ({'font': 'Inter'}, 2))
+    
+    def test_version_conflict(self):
+        self.component.content = {'title': 'Edited elsewhere'}
+        self.component.save()
+        response = self.client.patch(self.content_url, {
+            'version': 1,
+            'patch': [{'op': 'replace', 'path': '/title', 'value': 'Mine'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['version'], 2)
+        self.component.refresh_from_db()
+        self.assertEqual(self.component.content, {'title': 'Edited elsewhere'})
+    
+    def test_invalid_patch_is_a_client_error(self):
+        for patch in (
+            [{'op': 'move', 'from': 5, 'path': '/b'}],
+            [{'op': 'test', 'path': '/title', 'value': 1}],
+            [{'op': 'replace', 'path': '', 'value': 'not an object'}],
+        ):
+            response = self.client.patch(self.content_url, {'version': 1, 'patch': patch}, format='json')
+            self.assertEqual(response.status_code, 400, patch)
+        self.component.refresh_from_db()
+        self.assertEqual(self.component.version, 1)
+
+
+class RevisionTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.portfolio = Portfolio.objects.create(user=self.user, title='First')
+        self.component = PortfolioComponent.objects.create(
+            portfolio=self.portfolio, component_type='about', order=0, content={'bio': 'Hello'}
+        )
+        self.url = f'/api/v1/portfolios/portfolios/{self.portfolio.pk}/'
+    
+    def edit(self, title):
+        self.portfolio.title = title
+        self.portfolio.save()
+        return revisions.record_revision(self.portfolio, user=self.user)
+    
+    def age_revisions(self):
+        PortfolioRevision.objects.update(created_at=timezone.now() - revisions.EDIT_INTERVAL - timedelta(seconds=1))
+    
+    def test_deltas_and_snapshots(self):
+        first = revisions.record_revision(self.portfolio)
+        self.assertTrue(first.is_snapshot)
+        self.assertIsNone(revisions.record_revision(self.portfolio, reason='manual'))
+        
+        self.age_revisions()
+        second = self.edit('Second')
+        self.assertFalse(second.is_snapshot)
+        self.assertLess(second.size, first.size)
+        self.assertEqual(revisions.diff_revisions(self.portfolio, 2), [
+            {'op': 'replace', 'path': '/portfolio/title', 'value': 'Second'},
+        ])
+        self.assertEqual(revisions.get_state(self.portfolio, 1)['portfolio']['title'], 'First')
+        
+        for number in range(3, revisions.SNAPSHOT_EVERY + 2):
+            self.age_revisions()
+            self.edit(f'Title {number}')
+        snapshot = PortfolioRevision.objects.get(portfolio=self.portfolio, number=revisions.SNAPSHOT_EVERY + 1)
+        self.assertTrue(snapshot.is_snapshot)
+        self.assertEqual(
+            revisions.get_state(self.portfolio, snapshot.number)['portfolio']['title'],
+            f'Title {revisions.SNAPSHOT_EVERY + 1}'
+        )
+    
+    def test_edits_within_interval_update_the_last_revision(self):
+        revisions.record_revision(self.portfolio)
+        self.age_revisions()
+        edit = self.edit('Second')
+        
+        # A burst of edits keeps one revision holding the latest state
+        self.assertEqual(self.edit('Third').pk, edit.pk)
+        self.assertEqual(PortfolioRevision.objects.count(), 2)
+        self.assertEqual(revisions.get_state(self.portfolio, 2)['portfolio']['title'], 'Third')
+        
+        # Publish revisions are never rewritten
+        self.portfolio.title = 'Published'
+        self.portfolio.save()
+        revisions.record_revision(self.portfolio, reason='publish')
+        self.edit('After publish')
+        self.assertEqual(PortfolioRevision.objects.count(), 4)
+        self.assertEqual(revisions.get_state(self.portfolio, 3)['portfolio']['title'], 'Published')
+        self.assertEqual(revisions.get_state(self.portfolio, 4)['portfolio']['title'], 'After publish')
+        
+        # Undoing the edits removes the revision that held them
+        self.assertIsNone(self.edit('Published'))
+        self.assertEqual(PortfolioRevision.objects.count(), 3)
+    
+    def test_component_delete_and_restore(self):
+        revisions.record_revision(self.portfolio)
+        self.age_revisions()
+        response = self.client.delete(f'{self.url}components/{self.component.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(revisions.get_state(self.portfolio, 2)['components'], {})
+        
+        response = self.client.patch(self.url, {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        
+        response = self.client.post(f'{self.url}revisions/1/restore/')
+        self.assertEqual(response.status_code, 200)
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.title, 'First')
+        component = self.portfolio.components.get()
+        self.assertEqual((component.component_type, component.content), ('about', {'bio': 'Hello'}))
+        
+        restore = PortfolioRevision.objects.filter(portfolio=self.portfolio).first()
+        self.assertEqual(restore.reason, 'restore')
+        self.assertEqual(
+            revisions.get_state(self.portfolio, restore.number)['portfolio'],
+            revisions.get_state(self.portfolio, 1)['portfolio']
+        )
+        self.assertEqual(self.client.post(f'{self.url}revisions/99/restore/').status_code, 404)
+
+
+class SparseFieldsetTests(TestCase):
+    
+    COMPONENT_PREFETCH = 'SELECT "portfolios_portfoliocomponent"'
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        template = Template.objects.create(name='Modern', type='modern')
+        self.portfolio = Portfolio.objects.create(
+            user=self.user, title='Portfolio', template=template, custom_settings={'theme': 'dark'}
+        )
+        PortfolioSettings.objects.create(portfolio=self.portfolio, primary_color='#123456')
+        PortfolioComponent.objects.create(portfolio=self.portfolio, component_type='about', order=0, content={'bio': 'Hi'})
+        self.url = f'/api/v1/portfolios/portfolios/{self.portfolio.pk}/'
+    
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [query['sql'] for query in queries]
+    
+    def test_fields_limit_output_and_queries(self):
+        data, queries = self.get(f'{self.url}?fields=id,title')
+        self.assertEqual(set(data), {'id', 'title'})
+        self.assertFalse(any(sql.startswith(self.COMPONENT_PREFETCH) for sql in queries))
+        portfolio_select = next(sql for sql in queries if sql.startswith('SELECT "portfolios_portfolio"."id"'))
+        self.assertNotIn('"custom_settings"', portfolio_select)
+        self.assertNotIn('JOIN "portfolios_template"', portfolio_select)
+        
+        data, queries = self.get(self.url)
+        self.assertTrue(any(sql.startswith(self.COMPONENT_PREFETCH) for sql in queries))
+        self.assertIn('custom_settings', data)
+        self.assertEqual(len(data['components']), 1)
+    
+    def test_nested_fields(self):
+        data, _ = self.get(f'{self.url}?fields=id,components.id,components.content,settings.primary_color')
+        self.assertEqual(set(data), {'id', 'components', 'settings'})
+        self.assertEqual(data['components'], [{'id': self.portfolio.components.get().pk, 'content': {'bio': 'Hi'}}])
+        self.assertEqual(data['settings'], {'primary_color': '#123456'})
+    
+    def test_expand_on_list(self):
+        data, queries = self.get('/api/v1/portfolios/portfolios/')
+        item = data['results'][0]
+        self.assertNotIn('components', item)
+        self.assertFalse(any(sql.startswith(self.COMPONENT_PREFETCH) for sql in queries))
+        
+        data, _ = self.get('/api/v1/portfolios/portfolios/?expand=components,settings&fields=id,components.component_type,settings')
+        item = data['results'][0]
+        self.assertEqual(set(item), {'id', 'components', 'settings'})
+        self.assertEqual(item['components'], [{'component_type': 'about'}])
+        self.assertEqual(item['settings']['primary_color'], '#123456')
+        
+        # Unknown names are ignored
+        data, _ = self.get('/api/v1/portfolios/portfolios/?expand=user&fields=id,nope')
+        item = data['results'][0]
+        self.assertEqual(set(item), {'id'})
+    
+    def test_writes_ignore_sparse_fields(self):
+        response = self.client.patch(f'{self.url}?fields=id', {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Renamed')
+        self.assertIn('components', response.data)
@@ -1,18 +1,29 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PortfolioViewSet, PortfolioComponentViewSet, TemplateViewSet, dashboard_stats
+from .views import PortfolioViewSet, PortfolioComponentViewSet, TemplateViewSet, dashboard_stats, generate_content
 
 router = DefaultRouter()
 router.register(r'templates', TemplateViewSet, basename='template')
 router.register(r'portfolios', PortfolioViewSet, basename='portfolio')
 
 urlpatterns = [
+    # Async view on the URL a viewset action would get; listed before the router
+    path(
+        'portfolios/<int:pk>/generate_content/',
+        generate_content,
+        name='portfolio-generate-content'
+    ),
     path('', include(router.urls)),
     path(
         'portfolios/<int:portfolio_pk>/components/',
         PortfolioComponentViewSet.as_view({'get': 'list', 'post': 'create'}),
         name='portfolio-components-list'
     ),
+    path(
+        'portfolios/<int:portfolio_pk>/components/bulk/',
+        PortfolioComponentViewSet.as_view({'put': 'bulk'}),
+        name='portfolio-components-bulk'
+    ),
     path(
         'portfolios/<int:portfolio_pk>/components/<int:pk>/',
         PortfolioComponentViewSet.as_view({
@@ -23,6 +34,11 @@ urlpatterns = [
         }),
         name='portfolio-components-detail'
     ),
+    path(
+        'portfolios/<int:portfolio_pk>/components/<int:pk>/content/',
+        PortfolioComponentViewSet.as_view({'patch': 'patch_content'}),
+        name='portfolio-components-content'
+    ),
     path('dashboard/stats/', dashboard_stats, name='dashboard_stats'),
 ]
 
@@ -3,41 +3,140 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
-from .models import Portfolio, PortfolioComponent, PortfolioSettings, Template
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.db.models.signals import post_save
+from django.utils import timezone
+from core.async_views import async_api_view
+from core.cache import invalidate_scopes
+from core.conditional import ConditionalGetMixin
+from core.instrumentation import query_budget
+from core.jsonpatch import JsonPatchError, apply_merge_patch, apply_patch
+from .models import Portfolio, PortfolioComponent, PortfolioRevision, PortfolioSettings, Template
 from .serializers import (
     PortfolioSerializer,
     PortfolioListSerializer,
     PortfolioComponentSerializer,
+    PortfolioComponentBulkSerializer,
     PortfolioSettingsSerializer,
+    JsonPatchSerializer,
+    PortfolioRevisionSerializer,
     TemplateSerializer
 )
+from . import revisions
+from .dashboard import get_dashboard_stats
 from ai_services.portfolio_content_generator import (
     generate_portfolio_keywords,
-    generate_component_content,
+    generate_component_content_async,
     optimize_seo_content,
     suggest_improvements,
     generate_meta_description
 )
 
 
-class TemplateViewSet(viewsets.ReadOnlyModelViewSet):
+def apply_json_patch(request, instance, field):
+    """
+    Apply a JSON Patch or Merge Patch to ``instance.<field>`` with optimistic
+    concurrency: the write only lands if the row is still at the client's version
+    """
+    serializer = JsonPatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    version = serializer.validated_data['version']
+    
+    if instance.version != version:
+        return Response(
+            {'error': 'Version conflict', 'version': instance.version},
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    current = getattr(instance, field)
+    try:
+        if 'patch' in serializer.validated_data:
+            patched = apply_patch(current, serializer.validated_data['patch'])
+        else:
+            patched = apply_merge_patch(current, serializer.validated_data['merge_patch'])
+    except JsonPatchError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if type(patched) is not type(current):
+        return Response(
+            {'error': f'{field} must remain a {type(current).__name__}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    model = type(instance)
+    now = timezone.now()
+    with transaction.atomic():
+        # The version check and the write are one statement, so a concurrent
+        # edit that landed first makes this a no-op instead of being overwritten
+        updated = model.objects.filter(pk=instance.pk, version=version).update(
+            **{field: patched},
+            version=F('version') + 1,
+            updated_at=now
+        )
+        if not updated:
+            current_version = model.objects.filter(pk=instance.pk).values_list('version', flat=True).first()
+            return Response(
+                {'error': 'Version conflict', 'version': current_version},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        setattr(instance, field, patched)
+        instance.version = version + 1
+        instance.updated_at = now
+        # Queryset updates skip the save signals; send post_save so the usual
+        # receivers (cache scopes, static site, search index) see the change
+        post_save.send(
+            sender=model,
+            instance=instance,
+            created=False,
+            update_fields=frozenset([field, 'version', 'updated_at']),
+            raw=False,
+            using=model.objects.db
+        )
+    
+    portfolio_id = getattr(instance, 'portfolio_id', instance.pk)
+    revisions.record_revision(Portfolio.objects.get(pk=portfolio_id), user=request.user)
+    
+    return Response({
+        'id': instance.pk,
+        'version': instance.version,
+        'updated_at': now.isoformat()
+    })
+
+
+class TemplateViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing templates (read-only)
     """
     queryset = Template.objects.filter(is_active=True)
     serializer_class = TemplateSerializer
     permission_classes = [IsAuthenticated]
+    # Max queries per action, including the JWT user lookup (see core.instrumentation)
+    query_budgets = {'list': 4, 'retrieve': 3}
 
 
-class PortfolioViewSet(viewsets.ModelViewSet):
+class PortfolioViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing portfolios
     """
     permission_classes = [IsAuthenticated]
+    etag_aggregates = {
+        'components_updated': Max('components__updated_at'),
+        'components_count': Count('components', distinct=True),
+        'settings_updated': Max('settings__updated_at'),
+        # Rendered as template_name, user_email and user_profile_photo_url
+        'template_updated': Max('template__updated_at'),
+        'user_email': Max('user__email'),
+        'profile_updated': Max('user__profile__updated_at'),
+    }
+    query_budgets = {'list': 4, 'retrieve': 4, 'preview': 3, 'public_view': 3}
     
     def get_queryset(self):
-        return Portfolio.objects.filter(user=self.request.user)
+        queryset = Portfolio.objects.filter(user=self.request.user)
+        return self.get_serializer_class().setup_eager_loading(queryset, self.request)
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -58,8 +157,62 @@ class PortfolioViewSet(viewsets.ModelViewSet):
             from django.utils import timezone
             portfolio.published_at = timezone.now()
         portfolio.save()
+        if portfolio.is_published:
+            revisions.record_revision(portfolio, reason='publish', user=request.user)
         return Response(PortfolioSerializer(portfolio, context={'request': request}).data)
     
+    def perform_update(self, serializer):
+        portfolio = serializer.save()
+        revisions.record_revision(portfolio, user=self.request.user)
+    
+    @action(detail=True, methods=['get', 'post'], url_path='revisions')
+    def revision_list(self, request, pk=None):
+        """List saved versions, or save the current state as a new one"""
+        portfolio = self.get_object()
+        if request.method == 'POST':
+            revision = revisions.record_revision(portfolio, reason='manual', user=request.user)
+            if revision is None:
+                return Response({'message': 'No changes since the last revision'})
+            return Response(PortfolioRevisionSerializer(revision).data, status=status.HTTP_201_CREATED)
+        
+        queryset = PortfolioRevision.objects.filter(portfolio=portfolio).defer('data')
+        return Response(PortfolioRevisionSerializer(queryset, many=True).data)
+    
+    @action(detail=True, methods=['get'], url_path=r'revisions/(?P<number>\d+)/diff')
+    def revision_diff(self, request, pk=None, number=None):
+        """JSON Patch from an earlier revision (?against=, default previous) to this one"""
+        portfolio = self.get_object()
+        against = request.query_params.get('against')
+        try:
+            diff = revisions.diff_revisions(
+                portfolio,
+                int(number),
+                int(against) if against is not None else None
+            )
+        except (PortfolioRevision.DoesNotExist, ValueError):
+            return Response({'error': 'Revision not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'number': int(number), 'diff': diff})
+    
+    @action(detail=True, methods=['post'], url_path=r'revisions/(?P<number>\d+)/restore')
+    def restore_revision(self, request, pk=None, number=None):
+        """Restore the portfolio to a saved revision"""
+        portfolio = self.get_object()
+        try:
+            revisions.restore_revision(portfolio, int(number), user=request.user)
+        except PortfolioRevision.DoesNotExist:
+            return Response({'error': 'Revision not found'}, status=status.HTTP_404_NOT_FOUND)
+        portfolio = self.get_queryset().get(pk=portfolio.pk)
+        return Response(PortfolioSerializer(portfolio, context={'request': request}).data)
+    
+    @action(
+        detail=True,
+        methods=['patch'],
+        url_path='json-patch/(?P<field>custom_settings|pages|interactive_elements)'
+    )
+    def json_patch(self, request, pk=None, field=None):
+        """Partially update custom_settings, pages or interactive_elements"""
+        return apply_json_patch(request, self.get_object(), field)
+    
     @action(detail=True, methods=['get'])
     def preview(self, request, pk=None):
         """Get portfolio preview data"""
@@ -70,10 +223,18 @@ class PortfolioViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='public/(?P<slug>[^/.]+)', permission_classes=[AllowAny])
     def public_view(self, request, slug=None):
         """Public view of published portfolio (no auth required)"""
-        try:
-            portfolio = Portfolio.objects.get(slug=slug, is_published=True)
+        queryset = PortfolioSerializer.setup_eager_loading(
+            Portfolio.objects.filter(slug=slug, is_published=True),
+            request
+        )
+        
+        def render():
+            portfolio = queryset.get()
             serializer = PortfolioSerializer(portfolio, context={'request': request})
             return Response(serializer.data)
+        
+        try:
+            return self.conditional_response(request, queryset, render)
         except Portfolio.DoesNotExist:
             return Response(
                 {'error': 'Portfolio not found or not published'},
@@ -113,94 +274,6 @@ class PortfolioViewSet(viewsets.ModelViewSet):
         serializer = PortfolioSerializer(portfolio, context={'request': request})
         return Response(serializer.data)
     
-    @action(detail=True, methods=['post'])
-    def generate_content(self, request, pk=None):
-        """Generate portfolio content using AI"""
-        portfolio = self.get_object()
-        component_type = request.data.get('component_type')
-        context = request.data.get('context', {})
-        
-        if not component_type:
-            return Response(
-                {'error': 'component_type is required'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Get resume data if available
-        resume_data = context.get('resume_data', {})
-        resume_id = context.get('resume_id')
-        
-        # If resume_id is provided, use that specific resume
-        if resume_id and not resume_data:
-            try:
-                from resumes.models import ResumeUpload
-                resume = ResumeUpload.objects.filter(
-                    id=resume_id,
-                    user=request.user,
-                    status='completed'
-                ).select_related('extracted_data').first()
-                
-                if resume:
-                    try:
-                        resume_data_obj = resume.extracted_data
-                        if resume_data_obj and resume_data_obj.structured_data:
-                            resume_data = resume_data_obj.structured_data
-                    except AttributeError:
-                        pass
-            except Exception as e:
-                print(f"Error fetching resume data by ID: {e}")
-                pass
-        
-        # If no resume_data yet, try to get latest resume (backward compatibility)
-        if not resume_data:
-            try:
-                from resumes.models import ResumeUpload
-                latest_resume = ResumeUpload.objects.filter(
-                    user=request.user,
-                    status='completed'
-                ).select_related('extracted_data').order_by('-uploaded_at').first()
-                
-                if latest_resume:
-                    try:
-                        resume_data_obj = latest_resume.extracted_data
-                        if resume_data_obj and resume_data_obj.structured_data:
-                            resume_data = resume_data_obj.structured_data
-                    except AttributeError:
-                        # extracted_data relationship doesn't exist
-                        pass
-            except Exception as e:
-                print(f"Error fetching resume data: {e}")
-                pass
-        
-        context['resume_data'] = resume_data
-        context['template_type'] = portfolio.template_type
-        context['existing_content'] = {}
-        
-        # Get existing component content if editing
-        component_id = request.data.get('component_id')
-        if component_id:
-            try:
-                component = PortfolioComponent.objects.get(
-                    id=component_id,
-                    portfolio=portfolio
-                )
-                context['existing_content'] = component.content
-            except PortfolioComponent.DoesNotExist:
-                pass
-        
-        try:
-            generated_content = generate_component_content(component_type, context)
-            return Response({
-                'component_type': component_type,
-                'content': generated_content,
-                'success': True
-            })
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    
     @action(detail=True, methods=['post'])
     def optimize_seo(self, request, pk=None):
         """Optimize portfolio content for SEO"""
@@ -353,35 +426,133 @@ class PortfolioComponentViewSet(viewsets.ModelViewSet):
         portfolio_id = self.kwargs.get('portfolio_pk')
         portfolio = get_object_or_404(Portfolio, pk=portfolio_id, user=self.request.user)
         serializer.save(portfolio=portfolio)
+        revisions.record_revision(portfolio, user=self.request.user)
+    
+    def perform_update(self, serializer):
+        component = serializer.save()
+        revisions.record_revision(component.portfolio, user=self.request.user)
+    
+    def perform_destroy(self, instance):
+        portfolio = instance.portfolio
+        instance.delete()
+        revisions.record_revision(portfolio, user=self.request.user)
+    
+    def patch_content(self, request, portfolio_pk=None, pk=None):
+        """
+        Partially update the component content with a JSON Patch or Merge Patch
+        """
+        return apply_json_patch(request, self.get_object(), 'content')
+    
+    def bulk(self, request, portfolio_pk=None):
+        """
+        Create, update, delete and reorder all components in one request
+        """
+        portfolio = get_object_or_404(Portfolio, pk=portfolio_pk, user=request.user)
+        serializer = PortfolioComponentBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        from export.static_site import schedule_static_site_sync
+        from search.index import reindex_portfolio_components
+        with transaction.atomic():
+            components = serializer.save(portfolio=portfolio)
+            schedule_static_site_sync(portfolio.pk)
+            reindex_portfolio_components(portfolio)
+            invalidate_scopes(('portfolio', portfolio.pk))
+        revisions.record_revision(portfolio, user=request.user)
+        return Response(PortfolioComponentSerializer(components, many=True).data)
 
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dashboard_stats(request):
     """
-    Get dashboard statistics
+    Get dashboard statistics across portfolios, projects, blog posts,
+    resumes and portfolio views (cached per user)
+    """
+    return Response(get_dashboard_stats(request.user))
+
+@query_budget(5)
+@async_api_view(['POST'])
+async def generate_content(request, pk):
+    """
+    Generate portfolio content using AI (served from PortfolioViewSet's
+    ``generate_content`` URL; async so the model call does not hold a thread)
     """
-    user = request.user
-    
-    portfolios = Portfolio.objects.filter(user=user)
-    total_portfolios = portfolios.count()
-    published_count = portfolios.filter(is_published=True).count()
-    drafts_count = total_portfolios - published_count
-    
-    # Recent activity (simplified)
-    recent_portfolios = portfolios.order_by('-updated_at')[:5]
-    recent_activity = [
-        {
-            'type': 'portfolio_updated',
-            'description': f'Updated portfolio: {p.title}',
-            'timestamp': p.updated_at.isoformat()
-        }
-        for p in recent_portfolios
-    ]
+    try:
+        portfolio = await Portfolio.objects.only('id', 'template_type').aget(pk=pk, user=request.user)
+    except Portfolio.DoesNotExist:
+        return JsonResponse(
+            {'detail': 'No Portfolio matches the given query.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
     
-    return Response({
-        'total_portfolios': total_portfolios,
-        'published_count': published_count,
-        'drafts_count': drafts_count,
-        'recent_activity': recent_activity
-    })
\ No newline at end of file
+    component_type = request.data.get('component_type')
+    context = request.data.get('context', {})
+    
+    if not component_type:
+        return JsonResponse(
+            {'error': 'component_type is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    from resumes.models import ResumeUpload
+    
+    # Get resume data if available
+    resume_data = context.get('resume_data', {})
+    resume_id = context.get('resume_id')
+    
+    resumes = ResumeUpload.objects.filter(
+        user=request.user,
+        status='completed'
+    ).select_related('extracted_data')
+    
+    # If resume_id is provided, use that specific resume; otherwise fall back
+    # to the latest resume (backward compatibility)
+    lookups = []
+    if resume_id:
+        lookups.append(resumes.filter(id=resume_id))
+    lookups.append(resumes.order_by('-uploaded_at'))
+    for lookup in lookups:
+        if resume_data:
+            break
+        try:
+            resume = await lookup.afirst()
+            if resume:
+                try:
+                    resume_data_obj = resume.extracted_data
+                    if resume_data_obj and resume_data_obj.structured_data:
+                        resume_data = resume_data_obj.structured_data
+                except AttributeError:
+                    # extracted_data relationship doesn't exist
+                    pass
+        except Exception as e:
+            print(f"Error fetching resume data: {e}")
+    
+    context['resume_data'] = resume_data
+    context['template_type'] = portfolio.template_type
+    context['existing_content'] = {}
+    
+    # Get existing component content if editing
+    component_id = request.data.get('component_id')
+    if component_id:
+        try:
+            component = await PortfolioComponent.objects.aget(
+                id=component_id,
+                portfolio=portfolio
+            )
+            context['existing_content'] = component.content
+        except PortfolioComponent.DoesNotExist:
+            pass
+    
+    try:
+        generated_content = await generate_component_content_async(component_type, context)
+        return JsonResponse({
+            'component_type': component_type,
+            'content': generated_content,
+            'success': True
+        })
+    except Exception as e:
+        return JsonResponse(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-19 06:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='project',
+            constraint=models.UniqueConstraint(fields=('user', 'slug'), name='unique_project_slug_per_user'),
+        ),
+    ]
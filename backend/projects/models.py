@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.utils.text import slugify
+from core.slugs import UniqueSlugMixin
 
 
 class ProjectCategory(models.Model):
@@ -33,7 +33,7 @@ class ProjectTag(models.Model):
         return self.name
 
 
-class Project(models.Model):
+class Project(UniqueSlugMixin, models.Model):
     """
     User projects
     """
@@ -58,19 +58,13 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    slug_scope_fields = ('user',)
+    
     class Meta:
         ordering = ['-featured', 'order', '-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'slug'], name='unique_project_slug_per_user'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.title}"
-    
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while Project.objects.filter(slug=slug, user=self.user).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
@@ -1,22 +1,24 @@
 from rest_framework import serializers
+from core.bulk import set_related_by_names
+from core.serializers import SparseFieldsetMixin
 from .models import Project, ProjectTag, ProjectCategory
 
 
-class ProjectTagSerializer(serializers.ModelSerializer):
+class ProjectTagSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ProjectTag
         fields = ['id', 'name']
         read_only_fields = ['id']
 
 
-class ProjectCategorySerializer(serializers.ModelSerializer):
+class ProjectCategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ProjectCategory
         fields = ['id', 'name', 'description']
         read_only_fields = ['id']
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     tags = ProjectTagSerializer(many=True, read_only=True)
     tag_names = serializers.ListField(
         child=serializers.CharField(),
@@ -37,15 +39,17 @@ class ProjectSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['user', 'slug', 'created_at', 'updated_at']
     
+    select_related_fields = {'user_email': 'user', 'category_name': 'category'}
+    prefetch_related_fields = {'tags': 'tags'}
+    deferrable_fields = ['description']
+    
     def create(self, validated_data):
         tag_names = validated_data.pop('tag_names', [])
         validated_data['user'] = self.context['request'].user
         project = super().create(validated_data)
         
         # Create or get tags
-        for tag_name in tag_names:
-            tag, _ = ProjectTag.objects.get_or_create(name=tag_name.strip())
-            project.tags.add(tag)
+        set_related_by_names(project, 'tags', ProjectTag, tag_names)
         
         return project
     
@@ -55,10 +59,7 @@ class ProjectSerializer(serializers.ModelSerializer):
         
         # Update tags if provided
         if tag_names is not None:
-            project.tags.clear()
-            for tag_name in tag_names:
-                tag, _ = ProjectTag.objects.get_or_create(name=tag_name.strip())
-                project.tags.add(tag)
+            set_related_by_names(project, 'tags', ProjectTag, tag_names)
         
         return project
 
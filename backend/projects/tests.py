@@ -1,3 +1,71 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.testing import QueryBudgetTestCase
+from .models import Project, ProjectTag
 
-# Create your tests here.
+
+class ProjectQueryBudgetTests(QueryBudgetTestCase):
+    """Project endpoints stay within their query budgets however many projects and tags exist"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = self.api_client(self.user)
+        tags = [ProjectTag.objects.create(name=f'tag-{index}') for index in range(3)]
+        for index in range(10):
+            self.project = Project.objects.create(user=self.user, title=f'Project {index}', description='Description')
+            self.project.tags.set(tags)
+    
+    def test_list(self):
+        self.assertWithinBudget(self.client.get('/api/v1/projects/projects/'))
+    
+    def test_detail(self):
+        self.assertWithinBudget(self.client.get(f'/api/v1/projects/projects/{self.project.id}/'))
+
+
+class ProjectTagWriteTests(TestCase):
+    """Saving a project costs the same number of queries however many tags it has"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        ProjectTag.objects.bulk_create([ProjectTag(name=f'existing-{index}') for index in range(5)])
+    
+    def count_queries(self, send):
+        with CaptureQueriesContext(connection) as queries:
+            response = send()
+        self.assertIn(response.status_code, (200, 201), response.data)
+        return len(queries)
+    
+    def create(self, title, tag_names):
+        return self.client.post(
+            '/api/v1/projects/projects/', {'title': title, 'description': 'Text', 'tag_names': tag_names}, format='json'
+        )
+    
+    def update(self, project, tag_names):
+        return self.client.patch(f'/api/v1/projects/projects/{project.pk}/', {'tag_names': tag_names}, format='json')
+    
+    def test_create(self):
+        self.create('Warm up', ['warm-up'])
+        baseline = self.count_queries(lambda: self.create('One tag', ['new-0']))
+        # Existing and new tags mixed
+        tag_names = [f'existing-{index}' for index in range(5)] + [f'new-{index}' for index in range(1, 11)]
+        with self.assertNumQueries(baseline):
+            response = self.create('Many tags', tag_names)
+        self.assertEqual(sorted(tag['name'] for tag in response.data['tags']), sorted(tag_names))
+    
+    def test_update(self):
+        one = Project.objects.create(user=self.user, title='One', description='Text')
+        one.tags.set(ProjectTag.objects.filter(name='existing-0'))
+        many = Project.objects.create(user=self.user, title='Many', description='Text')
+        many.tags.set(ProjectTag.objects.all())
+        
+        baseline = self.count_queries(lambda: self.update(one, ['new-0']))
+        # Keeps two tags, drops three and adds ten
+        tag_names = ['existing-0', 'existing-1'] + [f'new-{index}' for index in range(1, 11)]
+        with self.assertNumQueries(baseline):
+            self.update(many, tag_names)
+        self.assertEqual(sorted(many.tags.values_list('name', flat=True)), sorted(tag_names))
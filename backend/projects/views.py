@@ -2,6 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from core.conditional import ConditionalGetMixin
 from .models import Project, ProjectTag, ProjectCategory
 from .serializers import (
     ProjectSerializer,
@@ -11,15 +12,19 @@ from .serializers import (
 from ai_services.content_generator import generate_project_content
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing projects
     """
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
+    query_budgets = {'list': 5, 'retrieve': 4}
     
     def get_queryset(self):
-        return Project.objects.filter(user=self.request.user)
+        return ProjectSerializer.setup_eager_loading(
+            Project.objects.filter(user=self.request.user),
+            self.request
+        )
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
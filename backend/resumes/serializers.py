@@ -1,15 +1,16 @@
 from rest_framework import serializers
+from core.serializers import SparseFieldsetMixin
 from .models import ResumeUpload, ResumeData, ParsedSkill
 
 
-class ParsedSkillSerializer(serializers.ModelSerializer):
+class ParsedSkillSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ParsedSkill
         fields = ['id', 'name', 'category', 'confidence_score']
         read_only_fields = ['id']
 
 
-class ResumeDataSerializer(serializers.ModelSerializer):
+class ResumeDataSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     skills = ParsedSkillSerializer(many=True, read_only=True)
     
     class Meta:
@@ -18,7 +19,7 @@ class ResumeDataSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'extracted_at', 'updated_at']
 
 
-class ResumeUploadSerializer(serializers.ModelSerializer):
+class ResumeUploadSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     extracted_data = ResumeDataSerializer(read_only=True)
     user_email = serializers.EmailField(source='user.email', read_only=True)
     file_size = serializers.SerializerMethodField()
@@ -31,6 +32,9 @@ class ResumeUploadSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['user', 'uploaded_at', 'status', 'error_message']
     
+    select_related_fields = {'user_email': 'user', 'extracted_data': 'extracted_data'}
+    prefetch_related_fields = {'extracted_data': 'extracted_data__skills'}
+    
     def get_file_size(self, obj):
         if obj.file:
             try:
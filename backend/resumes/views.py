@@ -14,7 +14,10 @@ class ResumeUploadViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return ResumeUpload.objects.filter(user=self.request.user)
+        return ResumeUploadSerializer.setup_eager_loading(
+            ResumeUpload.objects.filter(user=self.request.user),
+            self.request
+        )
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ['title', 'kind', 'object_id', 'user', 'updated_at']
+    list_filter = ['kind']
+    search_fields = ['title', 'user__email']
+    readonly_fields = ['updated_at']
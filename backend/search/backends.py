@@ -0,0 +1,116 @@
+"""
+Full-text query backends over SearchDocument.
+
+SQLite uses the FTS5 index created by the initial migration; other databases
+fall back to ``icontains`` over the single denormalized table until a native
+backend (e.g. PostgreSQL tsvector) is added to ``BACKENDS``.
+"""
+import re
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from .models import SearchDocument
+
+FTS_TABLE = 'search_searchdocument_fts'
+
+# Private-use markers that survive HTML escaping, swapped for <mark> afterwards
+MARK_START = '\ue000'
+MARK_END = '\ue001'
+
+SNIPPET_TOKENS = 16
+
+
+def highlight(snippet):
+    return escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def tokenize(query):
+    return re.findall(r'\w+', query, flags=re.UNICODE)
+
+
+class SQLiteFTSBackend:
+    """
+    Ranked search using FTS5 ``bm25`` (title weighted above body) and ``snippet``
+    """
+    
+    def search(self, user, query, kinds=None, limit=20, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Quote every token so user input cannot inject FTS5 syntax; prefix-match the last one
+        match = ' '.join(f'"{token}"' for token in tokens) + '*'
+        
+        sql = f"""
+            SELECT d.kind, d.object_id, d.portfolio_id, d.title,
+                   snippet({FTS_TABLE}, 1, %s, %s, '…', {SNIPPET_TOKENS}),
+                   bm25({FTS_TABLE}, 10.0, 1.0) AS rank
+            FROM {FTS_TABLE}
+            JOIN search_searchdocument d ON d.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s AND d.user_id = %s
+        """
+        params = [MARK_START, MARK_END, match, user.pk]
+        if kinds:
+            sql += f" AND d.kind IN ({', '.join(['%s'] * len(kinds))})"
+            params += list(kinds)
+        sql += ' ORDER BY rank LIMIT %s OFFSET %s'
+        params += [limit, offset]
+        
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            {
+                'kind': kind,
+                'id': object_id,
+                'portfolio_id': portfolio_id,
+                'title': title,
+                'snippet': highlight(snippet),
+                'score': round(-rank, 6),
+            }
+            for kind, object_id, portfolio_id, title, snippet, rank in rows
+        ]
+
+
+class FallbackBackend:
+    """
+    Unranked substring search used on databases without a native backend
+    """
+    
+    def search(self, user, query, kinds=None, limit=20, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        queryset = SearchDocument.objects.filter(user=user)
+        if kinds:
+            queryset = queryset.filter(kind__in=kinds)
+        for token in tokens:
+            queryset = queryset.filter(Q(title__icontains=token) | Q(body__icontains=token))
+        documents = queryset.order_by('-updated_at')[offset:offset + limit]
+        return [
+            {
+                'kind': document.kind,
+                'id': document.object_id,
+                'portfolio_id': document.portfolio_id,
+                'title': document.title,
+                'snippet': highlight(self.make_snippet(document.body, tokens)),
+                'score': None,
+            }
+            for document in documents
+        ]
+    
+    def make_snippet(self, text, tokens, width=120):
+        pattern = re.compile('|'.join(re.escape(token) for token in tokens), re.IGNORECASE)
+        found = pattern.search(text)
+        start = max(found.start() - width // 2, 0) if found else 0
+        snippet = text[start:start + width]
+        snippet = pattern.sub(lambda m: f'{MARK_START}{m.group(0)}{MARK_END}', snippet)
+        return ('…' if start else '') + snippet + ('…' if start + width < len(text) else '')
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, FallbackBackend)()
@@ -0,0 +1,128 @@
+"""
+Build and maintain SearchDocument rows for blog posts, projects and portfolio components
+"""
+from django.db.models import F
+from .models import SearchDocument
+
+# Component content keys that hold links, media or styling rather than prose
+NON_TEXT_KEYS = {'url', 'link', 'href', 'image', 'icon', 'avatar', 'photo', 'color', 'style', 'id'}
+
+
+def extract_text(value):
+    """
+    Collect the human-readable strings inside a JSON value
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        return [] if not value or value.startswith(('http://', 'https://', 'data:')) else [value]
+    if isinstance(value, dict):
+        parts = []
+        for key, item in value.items():
+            if str(key).lower() not in NON_TEXT_KEYS:
+                parts.extend(extract_text(item))
+        return parts
+    if isinstance(value, list):
+        parts = []
+        for item in value:
+            parts.extend(extract_text(item))
+        return parts
+    return []
+
+
+def blog_post_document(post):
+    return {
+        'user_id': post.user_id,
+        'title': post.title,
+        'body': '\n'.join(filter(None, [post.excerpt, post.content_markdown])),
+    }
+
+
+def project_document(project):
+    return {
+        'user_id': project.user_id,
+        'title': project.title,
+        'body': '\n'.join(filter(None, [project.short_description, project.description])),
+    }
+
+
+def component_document(component, user_id):
+    content = component.content if isinstance(component.content, dict) else {}
+    return {
+        'user_id': user_id,
+        'portfolio_id': component.portfolio_id,
+        'title': str(content.get('title') or component.get_component_type_display())[:300],
+        'body': '\n'.join(extract_text(content)),
+    }
+
+
+def index_document(kind, object_id, fields):
+    SearchDocument.objects.update_or_create(kind=kind, object_id=object_id, defaults=fields)
+
+
+def remove_document(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def index_blog_post(post):
+    index_document('blog_post', post.pk, blog_post_document(post))
+
+
+def index_project(project):
+    index_document('project', project.pk, project_document(project))
+
+
+def get_component_owner_id(component):
+    """The owner's id, without loading the whole portfolio unless it is already loaded"""
+    from portfolios.models import Portfolio, PortfolioComponent
+    
+    if PortfolioComponent.portfolio.is_cached(component):
+        return component.portfolio.user_id
+    return Portfolio.objects.values_list('user_id', flat=True).get(pk=component.portfolio_id)
+
+
+def index_component(component, user_id=None):
+    if user_id is None:
+        user_id = get_component_owner_id(component)
+    index_document('component', component.pk, component_document(component, user_id))
+
+
+def reindex_portfolio_components(portfolio):
+    """
+    Re-index every component of a portfolio after changes that bypass model
+    signals (bulk saves, queryset updates).
+    """
+    components = list(portfolio.components.all())
+    SearchDocument.objects.filter(kind='component', portfolio_id=portfolio.pk).exclude(
+        object_id__in=[component.pk for component in components]
+    ).delete()
+    for component in components:
+        index_component(component, portfolio.user_id)
+
+
+def rebuild_index():
+    """
+    Rebuild the whole index from scratch. Returns the number of documents.
+    """
+    from blogs.models import BlogPost
+    from portfolios.models import PortfolioComponent
+    from projects.models import Project
+    
+    documents = [
+        SearchDocument(kind='blog_post', object_id=post.pk, **blog_post_document(post))
+        for post in BlogPost.objects.all().iterator()
+    ]
+    documents += [
+        SearchDocument(kind='project', object_id=project.pk, **project_document(project))
+        for project in Project.objects.all().iterator()
+    ]
+    documents += [
+        SearchDocument(
+            kind='component',
+            object_id=component.pk,
+            **component_document(component, component.owner_id)
+        )
+        for component in PortfolioComponent.objects.annotate(owner_id=F('portfolio__user_id')).iterator()
+    ]
+    SearchDocument.objects.all().delete()
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+    return len(documents)
@@ -0,0 +1,14 @@
+"""
+Rebuild the full-text search index from blog posts, projects and portfolio components.
+"""
+
+from django.core.management.base import BaseCommand
+from search.index import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index'
+    
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} documents'))
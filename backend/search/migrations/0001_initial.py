@@ -0,0 +1,37 @@
+# Generated by Django 5.0.3 on 2026-10-19 07:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('blog_post', 'Blog Post'), ('project', 'Project'), ('component', 'Portfolio Component')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('portfolio_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('title', models.CharField(blank=True, max_length=300)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'kind'], name='search_sear_user_id_7b6ee7_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document'),
+        ),
+    ]
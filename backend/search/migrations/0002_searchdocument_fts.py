@@ -0,0 +1,59 @@
+from django.db import migrations
+
+FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_searchdocument_fts USING fts5(
+        title, body,
+        content='search_searchdocument',
+        content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_searchdocument_ai AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_searchdocument_ad AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(search_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_searchdocument_au AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(search_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO search_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    "INSERT INTO search_searchdocument_fts(search_searchdocument_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS search_searchdocument_au',
+    'DROP TRIGGER IF EXISTS search_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS search_searchdocument_ai',
+    'DROP TABLE IF EXISTS search_searchdocument_fts',
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        # The FTS5 index is SQLite-only; other databases use the fallback backend
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+    
+    operations = [
+        migrations.RunPython(run_statements(FTS_SQL), run_statements(DROP_SQL)),
+    ]
@@ -0,0 +1,35 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized searchable text for a blog post, project or portfolio component.
+    
+    On SQLite the rows are mirrored into an FTS5 index by triggers created in
+    the initial migration.
+    """
+    KIND_CHOICES = [
+        ('blog_post', 'Blog Post'),
+        ('project', 'Project'),
+        ('component', 'Portfolio Component'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_documents')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    portfolio_id = models.PositiveBigIntegerField(null=True, blank=True)
+    title = models.CharField(max_length=300, blank=True)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'kind']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
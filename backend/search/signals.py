@@ -0,0 +1,29 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from blogs.models import BlogPost
+from portfolios.models import PortfolioComponent
+from projects.models import Project
+from .index import index_blog_post, index_component, index_project, remove_document
+
+
+@receiver(post_save, sender=BlogPost)
+def blog_post_saved(sender, instance, **kwargs):
+    index_blog_post(instance)
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, **kwargs):
+    index_project(instance)
+
+
+@receiver(post_save, sender=PortfolioComponent)
+def component_saved(sender, instance, **kwargs):
+    index_component(instance)
+
+
+@receiver(post_delete, sender=BlogPost)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=PortfolioComponent)
+def searchable_deleted(sender, instance, **kwargs):
+    kind = {BlogPost: 'blog_post', Project: 'project', PortfolioComponent: 'component'}[sender]
+    remove_document(kind, instance.pk)
@@ -0,0 +1,114 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from blogs.models import BlogPost
+from portfolios.models import Portfolio, PortfolioComponent
+from projects.models import Project
+from .index import index_component, rebuild_index
+from .models import SearchDocument
+
+
+class SearchIndexTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.portfolio = Portfolio.objects.create(user=self.user, title='Portfolio')
+    
+    def document(self, kind, object_id):
+        return SearchDocument.objects.get(kind=kind, object_id=object_id)
+    
+    def test_index_on_save_and_delete(self):
+        post = BlogPost.objects.create(user=self.user, title='Caching', content_markdown='Use **ETags**')
+        project = Project.objects.create(user=self.user, title='Crawler', description='Fetches pages')
+        component = PortfolioComponent.objects.create(
+            portfolio=self.portfolio, component_type='about', order=0,
+            content={'title': 'About', 'bio': 'Backend developer', 'image': 'https://example.com/me.png'}
+        )
+        self.assertEqual(self.document('blog_post', post.pk).body, 'Use **ETags**')
+        self.assertEqual(self.document('project', project.pk).title, 'Crawler')
+        document = self.document('component', component.pk)
+        self.assertEqual((document.user_id, document.portfolio_id), (self.user.pk, self.portfolio.pk))
+        self.assertEqual(document.body, 'About\nBackend developer')
+        
+        post.title = 'HTTP caching'
+        post.save()
+        self.assertEqual(self.document('blog_post', post.pk).title, 'HTTP caching')
+        
+        post.delete()
+        project.delete()
+        component.delete()
+        self.assertFalse(SearchDocument.objects.exists())
+    
+    def test_index_component_reads_only_the_owner_id(self):
+        component = PortfolioComponent.objects.create(portfolio=self.portfolio, component_type='about', order=0)
+        component = PortfolioComponent.objects.get(pk=component.pk)
+        with CaptureQueriesContext(connection) as queries:
+            index_component(component)
+        portfolio_queries = [query['sql'] for query in queries if 'FROM "portfolios_portfolio"' in query['sql']]
+        self.assertEqual(len(portfolio_queries), 1)
+        self.assertNotIn('custom_settings', portfolio_queries[0])
+        
+        # A portfolio already loaded with the component costs nothing
+        component = PortfolioComponent.objects.select_related('portfolio').get(pk=component.pk)
+        with CaptureQueriesContext(connection) as queries:
+            index_component(component)
+        self.assertFalse(any('FROM "portfolios_portfolio"' in query['sql'] for query in queries))
+    
+    def test_rebuild_index(self):
+        BlogPost.objects.create(user=self.user, title='Post', content_markdown='Text')
+        PortfolioComponent.objects.create(portfolio=self.portfolio, component_type='about', order=0)
+        SearchDocument.objects.all().delete()
+        self.assertEqual(rebuild_index(), 2)
+        self.assertEqual(self.document('component', self.portfolio.components.get().pk).user_id, self.user.pk)
+
+
+class SearchViewTests(TestCase):
+    
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def search(self, q, **params):
+        response = self.client.get('/api/v1/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['results']
+    
+    def test_ranking_and_highlighting(self):
+        body_match = BlogPost.objects.create(user=self.user, title='Notes', content_markdown='A short word on django.')
+        title_match = BlogPost.objects.create(user=self.user, title='Django tips', content_markdown='Views and models.')
+        BlogPost.objects.create(user=self.user, title='Unrelated', content_markdown='Nothing here.')
+        
+        results = self.search('django')
+        self.assertEqual([result['id'] for result in results], [title_match.pk, body_match.pk])
+        self.assertIn('<mark>django</mark>', results[1]['snippet'])
+        # The last token is prefix-matched
+        self.assertEqual(len(self.search('djan')), 2)
+    
+    def test_user_only_sees_own_documents(self):
+        draft = BlogPost.objects.create(user=self.other, title='Secret draft', content_markdown='Unpublished', published=False)
+        portfolio = Portfolio.objects.create(user=self.other, title='Hidden', is_published=False)
+        PortfolioComponent.objects.create(portfolio=portfolio, component_type='about', order=0, content={'bio': 'Secret'})
+        self.assertEqual(self.search('secret'), [])
+        
+        # Owners find their own unpublished content
+        self.client.force_authenticate(self.other)
+        results = self.search('secret')
+        self.assertEqual({result['kind'] for result in results}, {'blog_post', 'component'})
+        self.assertIn(draft.pk, [result['id'] for result in results])
+    
+    def test_fts_syntax_is_escaped(self):
+        BlogPost.objects.create(user=self.user, title='Django', content_markdown='NEAR, OR and title are just words here')
+        for query in ('"django', 'django OR', 'NEAR(django', 'title:django', '-django', 'django*', 'django^ )'):
+            self.assertEqual(len(self.search(query)), 1, query)
+        self.assertEqual(self.search('"*'), [])
+    
+    def test_kind_filter_and_validation(self):
+        BlogPost.objects.create(user=self.user, title='Django post', content_markdown='Text')
+        Project.objects.create(user=self.user, title='Django project', description='Text')
+        self.assertEqual([result['kind'] for result in self.search('django', type='project')], ['project'])
+        self.assertEqual(self.client.get('/api/v1/search/', {'q': 'django', 'type': 'user'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/search/').status_code, 400)
@@ -0,0 +1,44 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .backends import get_backend
+from .models import SearchDocument
+
+MAX_LIMIT = 50
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search(request):
+    """
+    Ranked full-text search over the user's blog posts, projects and portfolio components.
+    
+    Query params: q (required), type (comma-separated kinds), limit, offset
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response(
+            {'error': 'q is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    valid_kinds = {kind for kind, _ in SearchDocument.KIND_CHOICES}
+    kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+    if any(kind not in valid_kinds for kind in kinds):
+        return Response(
+            {'error': f"type must be one of: {', '.join(sorted(valid_kinds))}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), MAX_LIMIT)
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+    except ValueError:
+        return Response(
+            {'error': 'limit and offset must be integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    results = get_backend().search(request.user, query, kinds=kinds, limit=limit, offset=offset)
+    return Response({'query': query, 'results': results})
@@ -966,7 +966,7 @@ type BlogPost = {
 };
 
 type BlogPostListResponse = Array<BlogPost> | {
-  count: number;
+  count?: number;
   next: string | null;
   previous: string | null;
   results: Array<BlogPost>;